@@ -1,7 +1,14 @@
 import sys
 import os
 
-from .main import app
-
 base_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(base_dir.replace('app', ''))
+
+
+def __getattr__(name):
+    # ``app:app`` (run.py, uvicorn) still resolves, but importing a submodule
+    # such as app.config no longer builds the whole FastAPI application.
+    if name == "app":
+        from .main import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
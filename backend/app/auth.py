@@ -5,7 +5,6 @@ from fastapi import HTTPException
 from fastapi.security.api_key import APIKeyHeader
 from fastapi import Security, HTTPException
 from starlette.status import HTTP_403_FORBIDDEN
-from jose import jwt, JWTError
 
 
 
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings,SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -8,15 +9,64 @@ class Settings(BaseSettings):
     db_password: str
     db_name: str
     api_key: str
-    # mail_username: str
-    # mail_password: str
-    # mail_from: str
-    # mail_port: int = 587
-    # mail_server: str = "smtp.gmail.com"
-    # mail_from_name: str = "Booking System"
+    # Serve the CRUD routes from the AsyncSession/asyncpg path instead of the threadpool
+    db_async: bool = False
+    # serverless | server | external-pooler, see app/db/pool.py (auto-detected when empty)
+    db_pool_profile: str = ""
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    # "postgres" fans list events out across processes with LISTEN/NOTIFY,
+    # "memory" keeps them in-process (single node, tests)
+    events_backend: str = "postgres"
+    # Cache of rendered item lists: "memory" (per process), "redis" (shared) or "off"
+    list_cache_backend: str = "memory"
+    # Redis URL for list_cache_backend=redis, e.g. redis://localhost:6379/0
+    list_cache_url: str = ""
+    # Idempotency-Key store of the create endpoints: "memory" (per process), "database" (shared) or "off"
+    idempotency_backend: str = "memory"
+    # Requests issuing more SQL statements than this are logged and counted
+    # as over budget (N+1 detection); 0 disables the check
+    query_budget: int = 20
+    # Admission control (app/shared/admission.py), per process, 0 disables a limit:
+    # reads / writes in flight before new ones are answered 503 instead of queueing
+    admission_max_reads: int = 64
+    admission_max_writes: int = 32
+    # Shed new requests while the recent connection pool wait is above this
+    admission_max_pool_wait_ms: float = 200
+    # Token bucket per API key / list: sustained requests per second and burst size
+    rate_limit_per_second: float = 10
+    rate_limit_burst: int = 50
+    # Level of the app logger (DEBUG, INFO, WARNING, ...)
+    log_level: str = "INFO"
+    # "text" (uvicorn's console format) or "json" (one object per line)
+    log_format: str = "text"
+    # Share of successful access log lines kept; errors and slow requests are always logged
+    log_sample_rate: float = 1.0
+    # Per-route overrides of log_sample_rate, e.g. {"GET /api/items": 0.01}
+    log_sample_routes: dict[str, float] = {}
+    # Requests at least this slow are always logged
+    log_slow_request_ms: float = 500
+    # Outbound email (app/utils/email.py); sending is off while mail_server is empty
+    mail_server: str = ""
+    mail_port: int = 587
+    mail_starttls: bool = True
+    mail_username: str = ""
+    mail_password: str = ""
+    mail_from: str = ""
+    mail_from_name: str = "Smart Shopping List"
+    # Sender threads, and so at most this many open SMTP connections, per process
+    mail_workers: int = 2
+    # Where share links in emails point, e.g. https://www.harshad.shop/share/<share_code>
+    frontend_url: str = "https://www.harshad.shop"
 
     model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8')
 
+@lru_cache()
+def get_settings():
+    return Settings()
+
 APP_CONFIG = dict(
     title="Smart Shopping List",
     description="API for managing a smart shopping list application.",
@@ -7,7 +7,9 @@ CREATE TABLE shopping_lists (
     name TEXT DEFAULT 'My Grocery List',
     share_code TEXT UNIQUE DEFAULT encode(gen_random_bytes(6), 'hex'),
     is_public BOOLEAN DEFAULT TRUE,
-    created_at TIMESTAMP DEFAULT NOW()
+    created_at TIMESTAMP DEFAULT NOW(),
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 -- ========== GROCERY ITEMS TABLE ==========
@@ -19,9 +21,54 @@ CREATE TABLE grocery_items (
     category TEXT DEFAULT 'Others',
     bought BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT NOW(),
-    updated_at TIMESTAMP DEFAULT NOW()
+    updated_at TIMESTAMP DEFAULT NOW(),
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX ix_grocery_items_list_created_id ON grocery_items (list_id, created_at DESC, id DESC);
+CREATE INDEX ix_grocery_items_list_version ON grocery_items (list_id, version);
+
+-- ========== DELETED ITEMS (delta sync tombstones) ==========
+CREATE TABLE grocery_item_tombstones (
+    item_id INTEGER PRIMARY KEY,
+    list_id UUID NOT NULL REFERENCES shopping_lists(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    deleted_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX ix_grocery_item_tombstones_list_version ON grocery_item_tombstones (list_id, version);
+CREATE INDEX ix_grocery_item_tombstones_deleted_at ON grocery_item_tombstones (deleted_at);
+
+-- Newest version whose tombstones were pruned; older delta sync cursors get a full resync
+CREATE TABLE grocery_item_tombstone_horizons (
+    list_id UUID PRIMARY KEY REFERENCES shopping_lists(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL
+);
+
+-- ========== UNDELIVERABLE EMAILS (app/utils/email.py dead letters) ==========
+CREATE TABLE email_dead_letters (
+    id SERIAL PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    html TEXT NOT NULL,
+    text TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    failed_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- ========== IDEMPOTENCY KEYS (IDEMPOTENCY_BACKEND=database) ==========
+CREATE TABLE idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status INTEGER,
+    headers JSONB,
+    body BYTEA,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX ix_idempotency_keys_created_at ON idempotency_keys (created_at);
+
 -- ========== OPTIONAL CATEGORIES TABLE ==========
 CREATE TABLE categories (
     id SERIAL PRIMARY KEY,
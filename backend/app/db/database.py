@@ -1,25 +1,134 @@
-from sqlalchemy import create_engine
+import os
+import threading
+
 from urllib.parse import quote_plus
-from sqlalchemy.orm import sessionmaker, declarative_base
-from dotmap import DotMap
+from sqlalchemy.orm import declarative_base
+
+from app.config import get_settings
+
+# Engines and session factories are built on first use rather than at import,
+# so a Lambda cold start only pays for them when a request needs the database.
+# ``engine``, ``async_engine`` and the URLs stay importable as module attributes
+# through ``__getattr__`` below.
+
+_lock = threading.Lock()
+_engine = None
+_async_engine = None
+_session_factory = None
+_async_session_factory = None
+
+
+def _database_urls(settings) -> tuple:
+    from dotmap import DotMap
+
+    db = {}
+    for key, value in vars(settings).items():
+        _key = key.replace('db_', '')
+        db[_key] = value
+    db = DotMap(db)
+
+    dialect = 'postgresql'
+    password = quote_plus(db.password)
+    if db.host.startswith('/'):
+        # Unix socket directory (local clusters, e.g. the benchmark stand-in)
+        location = f'/{db.name}?host={quote_plus(db.host)}&port={db.port}'
+    else:
+        location = f'{db.host}:{db.port}/{db.name}'
+    sync_url = f'{dialect}://{db.user}:{password}@{location}'
+    async_url = f'{dialect}+asyncpg://{db.user}:{password}@{location}'
+    return sync_url, async_url
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                from sqlalchemy import create_engine
+                from app.db.pool import engine_options
+
+                from app.shared.timing import instrument_engine
+
+                settings = get_settings()
+                _engine = create_engine(_database_urls(settings)[0], **engine_options(settings))
+                instrument_engine(_engine)
+    return _engine
+
+
+def get_async_engine():
+    """Async path (asyncpg); ``None`` unless DB_ASYNC is set, so the driver stays optional."""
+    global _async_engine
+    settings = get_settings()
+    if _async_engine is None and settings.db_async:
+        with _lock:
+            if _async_engine is None:
+                from sqlalchemy.ext.asyncio import create_async_engine
+                from app.db.pool import engine_options
+                from app.shared.timing import instrument_engine
+
+                _async_engine = create_async_engine(
+                    _database_urls(settings)[1], **engine_options(settings, is_async=True)
+                )
+                instrument_engine(_async_engine.sync_engine)
+    return _async_engine
+
+
+def SessionLocal():
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.orm import sessionmaker
+
+        _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    return _session_factory()
+
+
+def AsyncSessionLocal():
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_session_factory = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_session_factory()
+
+
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    if name == "SQLALCHEMY_DATABASE_URL":
+        return _database_urls(get_settings())[0]
+    if name == "ASYNC_SQLALCHEMY_DATABASE_URL":
+        return _database_urls(get_settings())[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _dispose_pools_after_fork():
+    # Connections inherited from the parent must not be shared with it;
+    # close=False drops them without sending a terminate on the parent's sockets.
+    if _engine is not None:
+        _engine.dispose(close=False)
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+
 
-from app.config import Settings
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_pools_after_fork)
 
-settings = Settings()
 
-db = {}
-for key, value in vars(settings).items():
-    _key = key.replace('db_', '')
-    db[_key] = value
-db = DotMap(db)
+def get_pool_metrics() -> dict:
+    from app.db.pool import pool_stats
 
-dialect = 'postgresql'
-password = quote_plus(db.password)
-SQLALCHEMY_DATABASE_URL = f'{dialect}://{db.user}:{password}@{db.host}:{db.port}/{db.name}'
+    metrics = {"sync": pool_stats(_engine.pool) if _engine is not None else None}
+    if _async_engine is not None:
+        metrics["async"] = pool_stats(_async_engine.sync_engine.pool)
+    return metrics
 
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+def recent_pool_wait() -> float:
+    """Recent connection checkout wait in seconds, the larger of the sync and async pools."""
+    pools = [engine.pool for engine in (_engine, _async_engine and _async_engine.sync_engine) if engine is not None]
+    return max((pool.metrics.recent_wait() for pool in pools if hasattr(pool, "metrics")), default=0.0)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
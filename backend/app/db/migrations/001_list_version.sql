@@ -0,0 +1,3 @@
+-- Version counter bumped by every item write, used for ETag / Last-Modified on GET /api/items
+ALTER TABLE shopping_lists ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE shopping_lists ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
@@ -0,0 +1,4 @@
+-- Newest-first listing and keyset pagination of GET /api/items: ORDER BY created_at DESC, id DESC
+-- per list becomes an index range scan. CONCURRENTLY avoids blocking writes; run outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_grocery_items_list_created_id
+    ON grocery_items (list_id, created_at DESC, id DESC);
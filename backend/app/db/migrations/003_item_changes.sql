@@ -0,0 +1,14 @@
+-- Delta sync (GET /api/items/changes): items carry the list version of their last write,
+-- deletes leave a tombstone. Existing items keep version 0, so a first sync returns them all.
+ALTER TABLE grocery_items ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS grocery_item_tombstones (
+    item_id INTEGER PRIMARY KEY,
+    list_id UUID NOT NULL REFERENCES shopping_lists(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    deleted_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS ix_grocery_item_tombstones_list_version ON grocery_item_tombstones (list_id, version);
+-- CONCURRENTLY avoids blocking writes; run outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_grocery_items_list_version ON grocery_items (list_id, version);
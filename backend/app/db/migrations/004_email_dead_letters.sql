@@ -0,0 +1,11 @@
+-- Emails the outbound queue gave up on (permanent SMTP errors or out of retries).
+CREATE TABLE IF NOT EXISTS email_dead_letters (
+    id SERIAL PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    html TEXT NOT NULL,
+    text TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT,
+    failed_at TIMESTAMPTZ DEFAULT NOW()
+);
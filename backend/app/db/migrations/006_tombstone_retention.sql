@@ -0,0 +1,9 @@
+-- Delete tombstones older than TOMBSTONE_RETENTION_SECONDS are pruned; each list remembers
+-- the newest version pruned, and GET /api/items/changes answers older cursors with a full resync.
+CREATE TABLE IF NOT EXISTS grocery_item_tombstone_horizons (
+    list_id UUID PRIMARY KEY REFERENCES shopping_lists(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL
+);
+
+-- CONCURRENTLY avoids blocking deletes; run outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_grocery_item_tombstones_deleted_at ON grocery_item_tombstones (deleted_at);
@@ -0,0 +1,173 @@
+"""
+Connection pool profiles and checkout metrics.
+
+Profiles (``DB_POOL_PROFILE``):
+
+* ``serverless``: one pooled connection per process (a Lambda container serves
+  one request at a time), pre-pinged and recycled so a frozen container does
+  not hand out a dead socket after thawing.
+* ``server``: sized QueuePool with overflow and a checkout timeout for
+  long-running uvicorn workers.
+* ``external-pooler``: no client-side pooling and no prepared statement
+  caching, for PgBouncer in transaction mode. LISTEN/NOTIFY does not work
+  through a transaction-mode pooler, so use ``EVENTS_BACKEND=memory`` or point
+  the app at Postgres directly when the change feed is needed.
+
+When unset the profile is ``serverless`` on AWS Lambda and ``server`` elsewhere.
+"""
+import math
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+PROFILES = ("serverless", "server", "external-pooler")
+# Time constant of the recent checkout wait average; older waits fade out over a few of these.
+RECENT_WAIT_WINDOW_SECONDS = 1.0
+
+
+class PoolMetrics:
+    """
+    Thread-safe checkout counters for one pool, and ``recent_wait()``: the
+    checkout wait averaged over the last ``RECENT_WAIT_WINDOW_SECONDS`` or so,
+    which decays towards zero while nothing checks out.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._recent_wait = 0.0
+        self._recent_at = clock()
+
+    def _decayed(self, now: float) -> float:
+        return self._recent_wait * math.exp(-(now - self._recent_at) / RECENT_WAIT_WINDOW_SECONDS)
+
+    def record(self, waited: float, timed_out: bool = False):
+        now = self._clock()
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            # weighted by the time since the last checkout, with a floor so a burst still moves it
+            weight = 1 - math.exp(-(now - self._recent_at) / RECENT_WAIT_WINDOW_SECONDS)
+            self._recent_wait = self._decayed(now) + max(weight, 0.1) * (waited - self._decayed(now))
+            self._recent_at = now
+
+    def recent_wait(self) -> float:
+        with self._lock:
+            return self._decayed(self._clock())
+
+
+class _TimedCheckout:
+    """Pool mixin that times every checkout, including waits for a free slot."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the counters.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def resolve_profile(settings) -> str:
+    profile = settings.db_pool_profile or (
+        "serverless" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "server"
+    )
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_POOL_PROFILE {profile!r}, expected one of {', '.join(PROFILES)}")
+    return profile
+
+
+def engine_options(settings, is_async: bool = False) -> dict:
+    """Keyword arguments for ``create_engine`` / ``create_async_engine`` for the configured profile."""
+    profile = resolve_profile(settings)
+    queue_pool = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+
+    if profile == "serverless":
+        return dict(
+            poolclass=queue_pool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+        )
+    if profile == "server":
+        return dict(
+            poolclass=queue_pool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+        )
+
+    options = dict(poolclass=TimedNullPool)
+    if is_async:
+        # asyncpg prepares statements per connection; PgBouncer may hand the
+        # next statement to a different server connection.
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return options
+
+
+def pool_stats(pool) -> dict:
+    """Snapshot of checkout metrics and saturation for ``pool``."""
+    metrics = getattr(pool, "metrics", None) or PoolMetrics()
+    stats = {
+        "pool": type(pool).__name__,
+        "checkouts": metrics.checkouts,
+        "timeouts": metrics.timeouts,
+        "wait_seconds_total": round(metrics.wait_seconds_total, 6),
+        "wait_seconds_max": round(metrics.wait_seconds_max, 6),
+        "wait_seconds_avg": round(metrics.wait_seconds_total / metrics.checkouts, 6) if metrics.checkouts else 0.0,
+        "wait_seconds_recent": round(metrics.recent_wait(), 6),
+    }
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            capacity=capacity,
+            saturation=round(pool.checkedout() / capacity, 4) if capacity else None,
+        )
+    return stats
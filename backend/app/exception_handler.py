@@ -11,8 +11,10 @@ from fastapi.exception_handlers import (
 from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 from app.logger import logger
+from app.shared.constants import SHED_RETRY_AFTER_SECONDS
 
 class ErrorResponseBuilder:
     """Helper class to build consistent error responses."""
@@ -158,13 +160,13 @@ async def unhandled_exception_handler(
     
     # Log the error
     logger.error(
-        f'{host}:{port} - "{request.method} {url}" 500 Internal Server Error '
-        f'<{exc_name}: {exc_value}>'
+        '%s:%s - "%s %s" 500 Internal Server Error <%s: %s>',
+        host, port, request.method, url, exc_name, exc_value,
     )
     
     if isinstance(exc, IntegrityError):
         error_message = str(exc.orig)
-        logger.error(f"Database IntegrityError: {error_message}")
+        logger.error("Database IntegrityError: %s", error_message)
         
         error_response = ErrorResponseBuilder.build_error_response(
             status_code=409,
@@ -174,6 +176,20 @@ async def unhandled_exception_handler(
             details=error_message
         )
         return JSONResponse(content=error_response, status_code=409)
+
+    if isinstance(exc, PoolTimeoutError):
+        # No connection within pool_timeout: the database is overloaded, not the request wrong.
+        error_response = ErrorResponseBuilder.build_error_response(
+            status_code=503,
+            error_type="Service Unavailable",
+            message="Server busy, retry later.",
+            request=request
+        )
+        return JSONResponse(
+            content=error_response,
+            status_code=503,
+            headers={"Retry-After": str(SHED_RETRY_AFTER_SECONDS)}
+        )
     
     error_response = ErrorResponseBuilder.build_error_response(
         status_code=500,
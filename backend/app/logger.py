@@ -1,8 +1,132 @@
+"""
+App logging.
+
+``configure_logging`` (called from ``app.main``) sets the level and format
+from ``Settings`` and moves the writing of log lines off the request path:
+records go through a ``QueueHandler`` to a ``QueueListener`` thread that
+formats and writes them. The calling thread only resolves the message
+arguments. On AWS Lambda records are written synchronously instead, since a
+frozen container would hold queued lines until its next invocation.
+"""
+import atexit
+import copy
 import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
 
 # Disable uvicorn access logger
 uvicorn_access = logging.getLogger("uvicorn.access")
 uvicorn_access.disabled = True
 
 logger = logging.getLogger("uvicorn")
-logger.setLevel(logging.getLevelName(logging.DEBUG))
\ No newline at end of file
+
+# LogRecord attributes (and uvicorn's color_message); anything else on a record came from ``extra=``.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "color_message"}
+
+
+class TextFormatter(logging.Formatter):
+    """uvicorn's console format: ``INFO:     message``."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        line = f"{record.levelname + ':':<9} {record.message}"
+        if record.exc_text:
+            line = f"{line}\n{record.exc_text}"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with ``extra=`` fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the arguments now (they may change once the caller returns)
+        # and render the traceback while it still exists; leave the
+        # formatting itself to the listener thread.
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_queue_handler = None
+_listener = None
+_output = None
+
+
+def _start_listener():
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue_handler.queue, _output, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener_after_fork():
+    # The listener thread does not survive fork(); the child gets its own.
+    global _listener
+    if _listener is not None:
+        _listener = None
+        _start_listener()
+
+
+def configure_logging(settings, stream=None, use_queue: bool = None):
+    """
+    Configure the ``uvicorn`` logger the app logs to.
+
+    ``use_queue`` defaults to ``True`` except on AWS Lambda.
+    """
+    global _queue_handler, _output
+    if use_queue is None:
+        use_queue = not os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
+
+    _stop_listener()
+    _output = logging.StreamHandler(stream or sys.stderr)
+    _output.setFormatter(JsonFormatter() if settings.log_format == "json" else TextFormatter())
+
+    if use_queue:
+        _queue_handler = _DeferredFormatQueueHandler(queue.SimpleQueue())
+        _start_listener()
+        logger.handlers = [_queue_handler]
+    else:
+        _queue_handler = None
+        logger.handlers = [_output]
+    logger.setLevel(settings.log_level.upper())
+    logger.propagate = False
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
+atexit.register(_stop_listener)
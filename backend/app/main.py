@@ -2,15 +2,22 @@ from fastapi import APIRouter, FastAPI, Depends
 from fastapi.exceptions import HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from mangum import Mangum
 from app.config import  Settings,APP_CONFIG
 from app.shared.dependencies import get_settings
+from app.db.database import get_pool_metrics
 
 
 
 from app.exception_handler import request_validation_exception_handler
 from app.exception_handler import http_exception_handler, unhandled_exception_handler
-from app.middleware import log_request_middleware
+from app.logger import configure_logging
+from app.middleware import AdmissionMiddleware, IdempotencyMiddleware, RequestTimingMiddleware
+from app.shared import metrics
+from app.shared.list_cache import get_list_cache
+from app.utils import auto_categorize
+from app.utils.email import flush_mail, get_mail_queue
 from app.routers import items
 
 
@@ -20,9 +27,20 @@ origins = [
     "https://harshad.shop",
     "http://www.harshad.shop",
 ]
+# Settings are read at import, not on first use: logging must be configured
+# before the first log line, and DB_ASYNC decides which routers are
+# registered below. Engines and connection pools are still built on first use
+# (app/db/database.py).
+settings = get_settings()
+configure_logging(settings)
+
 app = FastAPI(**APP_CONFIG)
 
-app.middleware("http")(log_request_middleware)
+# Inside admission control, so a replayed retry still counts against the limits.
+app.add_middleware(IdempotencyMiddleware)
+# Inside the timing middleware, so shed and throttled requests are logged and counted too.
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(RequestTimingMiddleware)
 
 
 app.add_middleware(
@@ -31,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After", "Idempotent-Replayed"],
 )
 app.add_exception_handler(RequestValidationError, request_validation_exception_handler)
 app.add_exception_handler(HTTPException, http_exception_handler)
@@ -45,6 +64,24 @@ async def root() -> dict:
     '''
     return {'msg': 'SMART SHOPPING LIST API'}
 
+@app.get('/metrics/pool', tags=['root'])
+async def pool_metrics() -> dict:
+    ''' Connection pool checkout wait time and saturation for this process '''
+    return get_pool_metrics()
+
+@app.get('/metrics', tags=['root'], response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    ''' Request, connection pool, cache and email queue metrics of this process (uvicorn worker or Lambda container), Prometheus text format '''
+    list_cache = get_list_cache()
+    caches = {
+        "list_items": list_cache.stats() if list_cache is not None else None,
+        "share_code": items.share_code_cache.stats(),
+        "categories": auto_categorize.cache_stats(),
+    }
+    mail_queue = get_mail_queue()
+    mail = mail_queue.stats() if mail_queue is not None else None
+    return PlainTextResponse(metrics.render(get_pool_metrics(), caches, mail), media_type=metrics.CONTENT_TYPE)
+
 # @app.get('/db', tags=['root'])
 # async def get_db(
 #         settings: Settings = Depends(get_settings)
@@ -53,10 +90,21 @@ async def root() -> dict:
 
 api_v1_router = APIRouter(prefix="/api")
 
+if settings.db_async:
+    from app.routers import items_async
 
+    api_v1_router.include_router(items_async.router)
 api_v1_router.include_router(items.router)
 
 app.include_router(api_v1_router)
 
-handler = Mangum(app, lifespan="off") 
+_mangum = Mangum(app, lifespan="off")
+
+
+def handler(event, context):
+    """AWS Lambda entry point: the app through Mangum, then deliver the email it queued."""
+    try:
+        return _mangum(event, context)
+    finally:
+        flush_mail()
 
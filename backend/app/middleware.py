@@ -1,28 +1,275 @@
 import http
+import logging
+import random
 import time
 
-from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 
+from app.config import get_settings
+from app.exception_handler import ErrorResponseBuilder
 from app.logger import logger
+from app.shared import timing
+from app.shared.admission import AdmissionController, RateLimiter, client_key, retry_after
+from app.shared import idempotency
+from app.shared.constants import IDEMPOTENCY_MAX_KEY_LENGTH, IDEMPOTENCY_WAIT_SECONDS, SHED_RETRY_AFTER_SECONDS
+from app.shared.metrics import UNMATCHED_ROUTE, request_metrics
 
 
-async def log_request_middleware(request: Request, call_next):
+class RequestTimingMiddleware:
     """
-    This middleware will log all requests and their processing time.
+    Pure ASGI middleware that logs every request with its processing time and
+    records it in ``request_metrics``. Unlike ``BaseHTTPMiddleware`` it passes
+    response messages straight through, so streamed bodies are not buffered.
     E.g. log:
-    0.0.0.0:1234 - GET /ping 200 OK 1.00ms
+    0.0.0.0:1234 - "GET /ping" 200 OK 1.00ms
+
+    The DB / handler / serialization breakdown (see ``app.shared.timing``) is
+    sent as a ``Server-Timing`` header and logged in the ``timing`` field.
+    Requests issuing more than ``QUERY_BUDGET`` statements are logged as a
+    warning and counted.
+
+    Successful requests are logged for a sampled share only
+    (``LOG_SAMPLE_RATE`` / ``LOG_SAMPLE_ROUTES``); errors and requests slower
+    than ``LOG_SLOW_REQUEST_MS`` always are.
     """
-    logger.debug("middleware: log_request_middleware")
-    url = f"{request.url.path}?{request.query_params}" if request.query_params else request.url.path
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = (time.time() - start_time) * 1000
-    formatted_process_time = "{0:.2f}".format(process_time)
-    host = getattr(getattr(request, "client", None), "host", None)
-    port = getattr(getattr(request, "client", None), "port", None)
+
+    def __init__(self, app, metrics=request_metrics, settings=None):
+        settings = settings or get_settings()
+        self.app = app
+        self.metrics = metrics
+        self.query_budget = settings.query_budget
+        self.sample_rate = settings.log_sample_rate
+        self.sample_routes = settings.log_sample_routes
+        self.slow_request_seconds = settings.log_slow_request_ms / 1000
+
+    def _sample_rate(self, method: str, route: str, status_code: int, process_time: float) -> float:
+        if status_code >= 400 or process_time >= self.slow_request_seconds:
+            return 1.0
+        return self.sample_routes.get(f"{method} {route}", self.sample_rate)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start_time = time.perf_counter()
+        request_timing, token = timing.start_request()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                request_timing.mark_response_start()
+                server_timing = request_timing.server_timing(request_timing.phases())
+                message["headers"] = [*message.get("headers", ()), (b"server-timing", server_timing.encode("latin-1"))]
+            await send(message)
+
+        self.metrics.started()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timing.end_request(token)
+            process_time = time.perf_counter() - start_time
+            # The router stores the matched route in the (shared) scope.
+            route = getattr(scope.get("route"), "path_format", UNMATCHED_ROUTE)
+            self.metrics.finished(scope["method"], route, status_code, process_time)
+            if self.query_budget and request_timing.db_count > self.query_budget:
+                self.metrics.over_query_budget(scope["method"], route)
+                logger.warning(
+                    '"%s %s" issued %d queries, over the budget of %d',
+                    scope["method"], route, request_timing.db_count, self.query_budget,
+                )
+            if logger.isEnabledFor(logging.INFO):
+                sample_rate = self._sample_rate(scope["method"], route, status_code, process_time)
+                if sample_rate >= 1 or random.random() < sample_rate:
+                    _log_request(scope, route, status_code, process_time, request_timing, sample_rate)
+
+
+def _log_request(scope, route: str, status_code: int, process_time: float, request_timing, sample_rate: float):
+    path = scope["path"]
+    query = scope.get("query_string", b"")
+    url = f"{path}?{query.decode('latin-1')}" if query else path
+    host, port = scope.get("client") or (None, None)
     try:
-        status_phrase = http.HTTPStatus(response.status_code).phrase
+        status_phrase = http.HTTPStatus(status_code).phrase
     except ValueError:
-        status_phrase=""
-    logger.info(f'{host}:{port} - "{request.method} {url}" {response.status_code} {status_phrase} {formatted_process_time}ms')
-    return response
\ No newline at end of file
+        status_phrase = ""
+    logger.info(
+        '%s:%s - "%s %s" %d %s %.2fms', host, port, scope["method"], url, status_code, status_phrase, process_time * 1000,
+        extra={
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(process_time * 1000, 3),
+            "timing": dict(request_timing.phases(), db_queries=request_timing.db_count),
+            "sample_rate": sample_rate,
+        },
+    )
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware that sheds ``/api`` requests with ``503`` when this
+    process is over its concurrency or pool wait budget, and throttles clients
+    over their rate limit with ``429`` (see ``app.shared.admission``). Event
+    streams are long-lived and not counted.
+    """
+
+    def __init__(self, app, metrics=request_metrics, settings=None, pool_wait=None):
+        settings = settings or get_settings()
+        if pool_wait is None:
+            from app.db.database import recent_pool_wait as pool_wait
+        self.app = app
+        self.metrics = metrics
+        self.controller = AdmissionController(
+            settings.admission_max_reads,
+            settings.admission_max_writes,
+            settings.admission_max_pool_wait_ms / 1000,
+            pool_wait,
+        )
+        self.rate_limiter = (
+            RateLimiter(settings.rate_limit_per_second, settings.rate_limit_burst)
+            if settings.rate_limit_per_second > 0 else None
+        )
+        self.api_key = settings.api_key.encode() if settings.api_key else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api/") or scope["path"].endswith("/events"):
+            await self.app(scope, receive, send)
+            return
+
+        if self.rate_limiter is not None:
+            key = client_key(scope, self.api_key)
+            wait = self.rate_limiter.acquire(key) if key is not None else 0
+            if wait:
+                self.metrics.throttled()
+                await _reject(scope, send, 429, "Too Many Requests", "Rate limit exceeded, retry later.", wait)
+                return
+
+        method = scope["method"]
+        reason = self.controller.admit(method)
+        if reason is not None:
+            self.metrics.shed(reason)
+            await _reject(scope, send, 503, "Service Unavailable", "Server busy, retry later.", SHED_RETRY_AFTER_SECONDS)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(method)
+
+
+class IdempotencyMiddleware:
+    """
+    Pure ASGI middleware that makes the create endpoints safe to retry with an
+    ``Idempotency-Key`` header (see ``app.shared.idempotency``): the first
+    response is stored, retries are answered from the store, and a retry of a
+    request still in flight waits for it (``409`` after
+    ``IDEMPOTENCY_WAIT_SECONDS``). Requests without the header pass through.
+    """
+
+    ROUTES = frozenset({("POST", "/api/items"), ("POST", "/api/items/bulk"), ("POST", "/api/list")})
+
+    def __init__(self, app, store=None, settings=None):
+        settings = settings or get_settings()
+        self.app = app
+        self.store = store if store is not None else idempotency.get_idempotency_store()
+        self.api_key = settings.api_key.encode() if settings.api_key else None
+
+    async def __call__(self, scope, receive, send):
+        if self.store is None or scope["type"] != "http" or (scope["method"], scope["path"]) not in self.ROUTES:
+            await self.app(scope, receive, send)
+            return
+        header = next((value for name, value in scope["headers"] if name == b"idempotency-key"), None)
+        if header is None:
+            await self.app(scope, receive, send)
+            return
+        if not header or len(header) > IDEMPOTENCY_MAX_KEY_LENGTH:
+            await _reject(scope, send, 400, "Bad Request",
+                          f"Idempotency-Key must be 1 to {IDEMPOTENCY_MAX_KEY_LENGTH} characters.")
+            return
+
+        body, receive = await _buffer_body(receive)
+        key = f"{scope['method']} {scope['path']} {idempotency.client_scope(scope, body, self.api_key)} {header.decode('latin-1')}"
+        request_fingerprint = idempotency.fingerprint(scope.get("query_string", b""), body)
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            state, stored = await self.store.claim(key, request_fingerprint)
+            if state == idempotency.PENDING:
+                remaining = deadline - time.monotonic()
+                stored = await self.store.wait(key, remaining) if remaining > 0 else None
+                if stored is None and time.monotonic() >= deadline:
+                    await _reject(scope, send, 409, "Conflict",
+                                  "A request with this Idempotency-Key is still in progress.", SHED_RETRY_AFTER_SECONDS)
+                    return
+                if stored is None:
+                    # The first request failed and released the key: claim it again.
+                    continue
+                state = idempotency.DONE
+            break
+
+        if state == idempotency.MISMATCH:
+            await _reject(scope, send, 422, "Unprocessable Entity",
+                          "Idempotency-Key was already used for a different request.")
+            return
+        if state == idempotency.DONE:
+            await _replay(stored, send)
+            return
+
+        status_code, headers, chunks = 500, [], []
+
+        async def send_wrapper(message):
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in message.get("headers", ())]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            await self.store.release(key)
+            raise
+        if status_code >= 500:
+            # Not stored: a retry should run the request again.
+            await self.store.release(key)
+        else:
+            await self.store.complete(key, idempotency.StoredResponse(request_fingerprint, status_code, headers, b"".join(chunks)))
+
+
+async def _buffer_body(receive):
+    """The whole request body, and a ``receive`` that hands it to the app again."""
+    chunks, more_body = [], True
+    while more_body:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    body, replayed = b"".join(chunks), False
+
+    async def replay_receive():
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return body, replay_receive
+
+
+async def _replay(stored, send):
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": stored.status, "headers": headers})
+    await send({"type": "http.response.body", "body": stored.body})
+
+
+async def _reject(scope, send, status_code: int, error_type: str, message: str, wait: float = None):
+    body = ErrorResponseBuilder.build_error_response(status_code, error_type, message, Request(scope))
+    headers = {"Retry-After": retry_after(wait)} if wait is not None else None
+    response = JSONResponse(jsonable_encoder(body), status_code=status_code, headers=headers)
+    await response(scope, None, send)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, Text, TIMESTAMP, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+# ========== SQLAlchemy MODELS ==========
+
+class EmailDeadLetter(Base):
+    """An email the queue gave up on (app/utils/email.py), kept to inspect and resend."""
+
+    __tablename__ = "email_dead_letters"
+
+    id = Column(Integer, primary_key=True)
+    recipient = Column(Text, nullable=False)
+    subject = Column(Text, nullable=False)
+    html = Column(Text, nullable=False)
+    text = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    error = Column(Text)
+    failed_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+# ========== CRUD FUNCTIONS ==========
+
+# 2️⃣➕ Store undeliverable emails in one INSERT
+def add_dead_letters(db: Session, messages: list):
+    db.execute(insert(EmailDeadLetter), [
+        {
+            "recipient": message.to,
+            "subject": message.subject,
+            "html": message.html,
+            "text": message.text,
+            "attempts": message.attempts,
+            "error": message.error,
+        }
+        for message in messages
+    ])
+    db.commit()
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Index, Integer, LargeBinary, Text, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+# ========== SQLAlchemy MODELS ==========
+
+class IdempotencyKey(Base):
+    """
+    A create request by ``Idempotency-Key`` and its stored response, for the
+    ``database`` backend of app/shared/idempotency.py. No status yet means the
+    first request is still running.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    # "<method> <path> <client scope hash> <Idempotency-Key>"
+    key = Column(Text, primary_key=True)
+    fingerprint = Column(Text, nullable=False)
+    status = Column(Integer)
+    headers = Column(JSONB)
+    body = Column(LargeBinary)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_created_at", created_at),
+    )
@@ -1,12 +1,22 @@
-from sqlalchemy import Column, String, Boolean, Integer, TIMESTAMP, ForeignKey
+from sqlalchemy import (
+    Column, String, Boolean, Integer, TIMESTAMP, ForeignKey, Index,
+    any_, bindparam, cast, column, delete, insert, select, tuple_, update, values,
+)
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert as pg_insert
 from sqlalchemy.orm import relationship, Session
+import logging
+import time
 import uuid
 
 from app.db.database import Base
-from app.schemas.items import GroceryCreate, GroceryUpdate
-from app.utils.auto_categorize import auto_categorize
+from app.schemas.items import GroceryBatchUpdate, GroceryCreate, GroceryOut, GroceryUpdate, ListOut
+from app.shared import events, list_cache
+from app.shared.constants import TOMBSTONE_PRUNE_INTERVAL_SECONDS, TOMBSTONE_RETENTION_SECONDS
+from app.utils.auto_categorize import auto_categorize, auto_categorize_many
+
+logger = logging.getLogger(__name__)
 
 
 # ========== SQLAlchemy MODELS ==========
@@ -19,6 +29,9 @@ class ShoppingList(Base):
     share_code = Column(String, unique=True, default=lambda: uuid.uuid4().hex[:8])
     is_public = Column(Boolean, default=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # Bumped by every item write; drives the ETag / Last-Modified of GET /api/items
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
     items = relationship("GroceryItem", back_populates="list", cascade="all, delete")
 
@@ -34,12 +47,290 @@ class GroceryItem(Base):
     bought = Column(Boolean, default=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+    # List version of the item's last write; GET /api/items/changes returns items newer than a cursor
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
     list = relationship("ShoppingList", back_populates="items")
 
+    # Load server-generated timestamps with RETURNING on flush, for change events.
+    __mapper_args__ = {"eager_defaults": True}
+    # Serves the newest-first listing and keyset pages of GET /api/items as index range scans,
+    # and the per-list change scans of GET /api/items/changes.
+    __table_args__ = (
+        Index("ix_grocery_items_list_created_id", "list_id", created_at.desc(), id.desc()),
+        Index("ix_grocery_items_list_version", "list_id", version),
+    )
+
+
+class ItemTombstone(Base):
+    """A deleted item, kept so delta syncs can tell clients to drop it."""
+
+    __tablename__ = "grocery_item_tombstones"
+
+    item_id = Column(Integer, primary_key=True)
+    list_id = Column(UUID(as_uuid=True), ForeignKey("shopping_lists.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_grocery_item_tombstones_list_version", "list_id", version),
+        Index("ix_grocery_item_tombstones_deleted_at", deleted_at),
+    )
+
+
+class TombstoneHorizon(Base):
+    """
+    The newest list version whose tombstones were pruned: a delta sync cursor
+    older than it may have missed deletes, and gets the whole list instead.
+    """
+
+    __tablename__ = "grocery_item_tombstone_horizons"
+
+    list_id = Column(UUID(as_uuid=True), ForeignKey("shopping_lists.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False)
+
+
+# Columns of GroceryOut in its field order, for list reads that skip the ORM
+# (see app/shared/serialization.py).
+ITEM_COLUMNS = tuple(GroceryItem.__table__.c[name] for name in GroceryOut.model_fields)
+# Columns of ListOut in its field order.
+LIST_COLUMNS = tuple(ShoppingList.__table__.c[name] for name in ListOut.model_fields)
+
 
 # ========== CRUD FUNCTIONS ==========
 
+def touch_list_stmt(list_id):
+    """Bump the version of a list and return the new one."""
+    return _touch_lists_stmt(ShoppingList.id == list_id)
+
+
+def _touch_lists_stmt(criteria):
+    return (
+        update(ShoppingList)
+        .where(criteria)
+        .values(version=ShoppingList.version + 1, updated_at=func.now())
+        .returning(ShoppingList.id, ShoppingList.version)
+    )
+
+
+def _touched_lists_of(item_ids):
+    """
+    CTE bumping the version of the lists that own ``item_ids``. Item writes
+    join it, so they lock the list row first and stamp the items with the new
+    version: writes to one list are serialized and their versions follow
+    commit order, which makes the version a safe delta sync cursor.
+    """
+    items = GroceryItem.__table__
+    return _touch_lists_stmt(ShoppingList.id.in_(select(items.c.list_id).where(items.c.id.in_(item_ids)))).cte(
+        "touched_lists"
+    )
+
+
+def item_update_values(item_update: GroceryUpdate) -> dict:
+    values = {}
+    if item_update.name is not None:
+        values["name"] = item_update.name
+        values["category"] = auto_categorize(item_update.name)
+    if item_update.quantity is not None:
+        values["quantity"] = item_update.quantity
+    if item_update.bought is not None:
+        values["bought"] = item_update.bought
+    # An empty update still locks and returns the row; assigning updated_at
+    # to itself keeps the onupdate timestamp from moving.
+    return values or {"updated_at": GroceryItem.updated_at}
+
+
+def update_item_stmt(item_id: int, item_update: GroceryUpdate):
+    """``UPDATE ... RETURNING`` one item and touch its list, in one round trip."""
+    items = GroceryItem.__table__
+    touched = _touched_lists_of([item_id])
+    return (
+        update(items)
+        .where(items.c.id == item_id, items.c.list_id == touched.c.id)
+        .values(version=touched.c.version, **item_update_values(item_update))
+        .returning(*items.c)
+    )
+
+
+def update_items_stmt(changes: dict):
+    """
+    One ``UPDATE ... FROM (VALUES ...) RETURNING`` for ``{item_id: {field: value}}``.
+
+    Fields missing from a change are sent as NULL and keep their current
+    value; only renamed items are re-categorized.
+    """
+    renamed = [item_id for item_id, fields in changes.items() if "name" in fields]
+    categories = dict(zip(renamed, auto_categorize_many([changes[item_id]["name"] for item_id in renamed])))
+    new_values = values(
+        column("id", Integer),
+        column("name", String),
+        column("category", String),
+        column("quantity", Integer),
+        column("bought", Boolean),
+        name="changes",
+    ).data([
+        (item_id, fields.get("name"), categories.get(item_id), fields.get("quantity"), fields.get("bought"))
+        for item_id, fields in changes.items()
+    ])
+
+    items = GroceryItem.__table__
+    touched = _touched_lists_of(list(changes))
+    # VALUES columns that are NULL in every row come back untyped; cast them.
+    return (
+        update(items)
+        .where(items.c.id == new_values.c.id, items.c.list_id == touched.c.id)
+        .values(
+            name=func.coalesce(cast(new_values.c.name, String), items.c.name),
+            category=func.coalesce(cast(new_values.c.category, String), items.c.category),
+            quantity=func.coalesce(cast(new_values.c.quantity, Integer), items.c.quantity),
+            bought=func.coalesce(cast(new_values.c.bought, Boolean), items.c.bought),
+            version=touched.c.version,
+        )
+        .returning(*items.c)
+    )
+
+
+def delete_item_stmt(item_id: int):
+    """
+    ``DELETE`` one item, touch its list and leave a tombstone, in one round
+    trip. Returns ``(id, list_id)`` of the deleted item.
+    """
+    items = GroceryItem.__table__
+    touched = _touched_lists_of([item_id])
+    deleted = (
+        delete(items)
+        .where(items.c.id == item_id, items.c.list_id == touched.c.id)
+        .returning(items.c.id, items.c.list_id, touched.c.version)
+        .cte("deleted_items")
+    )
+    tombstones = ItemTombstone.__table__
+    return (
+        insert(tombstones)
+        .from_select(["item_id", "list_id", "version"], select(deleted.c.id, deleted.c.list_id, deleted.c.version))
+        .returning(tombstones.c.item_id.label("id"), tombstones.c.list_id)
+    )
+
+
+def list_version_stmt(list_id):
+    return select(ShoppingList.version, ShoppingList.updated_at).where(ShoppingList.id == list_id)
+
+
+def _touch_list(db: Session, list_id):
+    """Bump the list version in the current transaction; returns the new version (``None`` if no such list)."""
+    touched = db.execute(touch_list_stmt(list_id)).first()
+    return touched.version if touched is not None else None
+
+
+def get_list_version(db: Session, list_id):
+    """Single-row lookup of ``(version, updated_at)`` for a list, or ``None`` if it does not exist."""
+    return db.execute(list_version_stmt(list_id)).first()
+
+
+def items_stmt(list_id, limit: int = None, after: tuple = None):
+    """
+    ``ITEM_COLUMNS`` rows of a list's items, newest first. ``id`` breaks ties between items created in
+    the same transaction (bulk adds share ``created_at``).
+
+    ``after`` is a decoded ``(created_at, id)`` cursor; only items strictly
+    older than it are returned, so pages stay stable while items are added.
+    """
+    stmt = (
+        select(*ITEM_COLUMNS)
+        .where(GroceryItem.list_id == list_id)
+        .order_by(GroceryItem.created_at.desc(), GroceryItem.id.desc())
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(GroceryItem.created_at, GroceryItem.id) < tuple_(*after))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def lists_with_items_stmt(list_ids: list):
+    """
+    ``LIST_COLUMNS + ITEM_COLUMNS`` rows of several lists and their items in
+    one ``= ANY(...)`` query, each list's items newest first. A list without
+    items has one row with ``None`` item columns.
+    """
+    ids = bindparam("list_ids", list_ids, type_=ARRAY(UUID(as_uuid=True)))
+    return (
+        select(*LIST_COLUMNS, *ITEM_COLUMNS)
+        .select_from(ShoppingList)
+        .outerjoin(GroceryItem, GroceryItem.list_id == ShoppingList.id)
+        .where(ShoppingList.id == any_(ids))
+        .order_by(ShoppingList.id, GroceryItem.created_at.desc(), GroceryItem.id.desc())
+    )
+
+
+def group_lists_with_items(rows) -> dict:
+    """``{list_id: (list_columns, [item_rows])}`` from ``lists_with_items_stmt`` rows, in one pass."""
+    lists, split = {}, len(LIST_COLUMNS)
+    for row in rows:
+        entry = lists.get(row[0])
+        if entry is None:
+            entry = lists[row[0]] = (row[:split], [])
+        if row[split] is not None:
+            entry[1].append(row[split:])
+    return lists
+
+
+def changed_items_stmt(list_id, since: int):
+    """``ITEM_COLUMNS`` rows of a list's items written after list version ``since``."""
+    return select(*ITEM_COLUMNS).where(GroceryItem.list_id == list_id, GroceryItem.version > since)
+
+
+def deleted_items_stmt(list_id, since: int):
+    """Ids of a list's items deleted after list version ``since``."""
+    return select(ItemTombstone.item_id).where(ItemTombstone.list_id == list_id, ItemTombstone.version > since)
+
+
+def changes_version_stmt(list_id):
+    """``(version, horizon)`` of a list: its version and its ``TombstoneHorizon`` (0 before any prune)."""
+    return (
+        select(ShoppingList.version, func.coalesce(TombstoneHorizon.version, 0).label("horizon"))
+        .outerjoin(TombstoneHorizon, TombstoneHorizon.list_id == ShoppingList.id)
+        .where(ShoppingList.id == list_id)
+    )
+
+
+def prune_tombstones_stmt(retention_seconds: float = TOMBSTONE_RETENTION_SECONDS):
+    """
+    Delete tombstones older than ``retention_seconds`` and raise the
+    ``TombstoneHorizon`` of their lists past them, in one round trip.
+    List rows are not locked, so pruning never waits on item writes.
+    """
+    tombstones = ItemTombstone.__table__
+    pruned = (
+        delete(tombstones)
+        .where(tombstones.c.deleted_at < func.now() - func.make_interval(0, 0, 0, 0, 0, 0, retention_seconds))
+        .returning(tombstones.c.list_id, tombstones.c.version)
+        .cte("pruned_tombstones")
+    )
+    horizons = TombstoneHorizon.__table__
+    stmt = pg_insert(horizons).from_select(
+        ["list_id", "version"],
+        select(pruned.c.list_id, func.max(pruned.c.version)).group_by(pruned.c.list_id),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[horizons.c.list_id],
+        set_={"version": func.greatest(horizons.c.version, stmt.excluded.version)},
+    )
+
+
+# Monotonic time of this process's last tombstone prune
+_tombstones_pruned_at = None
+
+
+def claim_tombstone_prune() -> bool:
+    """True at most once per ``TOMBSTONE_PRUNE_INTERVAL_SECONDS`` in this process."""
+    global _tombstones_pruned_at
+    now = time.monotonic()
+    if _tombstones_pruned_at is not None and now - _tombstones_pruned_at < TOMBSTONE_PRUNE_INTERVAL_SECONDS:
+        return False
+    _tombstones_pruned_at = now
+    return True
+
+
 # 1️⃣ Create a new shopping list
 def create_list(db: Session, name: str = "My Grocery List"):
     new_list = ShoppingList(name=name)
@@ -49,50 +340,213 @@ def create_list(db: Session, name: str = "My Grocery List"):
     return new_list
 
 
+# 1️⃣🔎 Get a list (without its items) by id
+def get_list(db: Session, list_id):
+    return db.get(ShoppingList, list_id)
+
+
+# 1️⃣🔗 Resolve a list and its items in one query
+def get_list_with_items(db: Session, list_id=None, share_code=None):
+    """
+    Load a list by id or share code together with its items (newest first)
+    in a single LEFT JOIN. Returns ``(list, items)`` or ``None``.
+    """
+    stmt = (
+        select(ShoppingList, GroceryItem)
+        .outerjoin(GroceryItem, GroceryItem.list_id == ShoppingList.id)
+        .order_by(GroceryItem.created_at.desc(), GroceryItem.id.desc())
+    )
+    if list_id is not None:
+        stmt = stmt.where(ShoppingList.id == list_id)
+    else:
+        stmt = stmt.where(ShoppingList.share_code == share_code)
+
+    rows = db.execute(stmt).all()
+    if not rows:
+        return None
+    return rows[0][0], [item for _, item in rows if item is not None]
+
+
+# 1️⃣📚 Load several lists and their items in one query
+def get_lists_with_items(db: Session, list_ids: list) -> dict:
+    """``{list_id: (list_columns, [item_rows])}`` for the lists that exist (see ``group_lists_with_items``)."""
+    return group_lists_with_items(db.execute(lists_with_items_stmt(list_ids)))
+
+
 # 2️⃣ Add new grocery item
 def add_item(db: Session, item_data: GroceryCreate):
     category = auto_categorize(item_data.name)
+    version = _touch_list(db, item_data.list_id)
     new_item = GroceryItem(
         list_id=item_data.list_id,
         name=item_data.name,
         quantity=item_data.quantity,
         category=category,
+        version=version,
     )
     db.add(new_item)
+    events.emit(db, events.ITEM_ADDED, item_data.list_id, new_item)
+    list_cache.invalidate_on_commit(db, item_data.list_id)
     db.commit()
     db.refresh(new_item)
     return new_item
 
 
-# 3️⃣ Get all items in a list
-def get_items(db: Session, list_id: str):
-    return db.query(GroceryItem).filter(GroceryItem.list_id == list_id).order_by(GroceryItem.created_at.desc()).all()
+# 2️⃣➕ Add many grocery items in one transaction
+def add_items(db: Session, items_data: list[GroceryCreate]):
+    """
+    Insert all items whose list exists with one multi-row INSERT ... RETURNING.
 
+    Returns a list aligned with ``items_data``: the created item, or ``None``
+    when the entry's list does not exist.
+    """
+    if not items_data:
+        return []
 
-# 4️⃣ Update item (mark bought / update quantity)
-def update_item(db: Session, item_id: int, item_update: GroceryUpdate):
-    item = db.query(GroceryItem).filter(GroceryItem.id == item_id).first()
-    if not item:
+    # Touching the lists up front also tells which of them exist.
+    list_ids = {item.list_id for item in items_data}
+    existing = dict(db.execute(_touch_lists_stmt(ShoppingList.id.in_(list_ids))).all())
+    accepted = [item for item in items_data if item.list_id in existing]
+
+    created = []
+    if accepted:
+        categories = auto_categorize_many([item.name for item in accepted])
+        rows = [
+            {
+                "list_id": item.list_id,
+                "name": item.name,
+                "quantity": item.quantity,
+                "category": category,
+                "version": existing[item.list_id],
+            }
+            for item, category in zip(accepted, categories)
+        ]
+        # Plain rows rather than ORM objects: they are not expired by the
+        # commit, so serializing the response needs no refresh per item.
+        stmt = insert(GroceryItem.__table__).returning(*GroceryItem.__table__.c, sort_by_parameter_order=True)
+        created = db.execute(stmt, rows).all()
+        for item in created:
+            events.emit(db, events.ITEM_ADDED, item.list_id, item)
+    for list_id in existing:
+        list_cache.invalidate_on_commit(db, list_id)
+    db.commit()
+
+    created_iter = iter(created)
+    return [next(created_iter) if item.list_id in existing else None for item in items_data]
+
+
+# 3️⃣ Get all items in a list (or one keyset page of them)
+def get_items(db: Session, list_id: str, limit: int = None, after: tuple = None):
+    return db.execute(items_stmt(list_id, limit, after)).all()
+
+
+# 3️⃣🔁 Items changed since a delta sync cursor
+def get_changes(db: Session, list_id, since: int):
+    """
+    Items written and ids of items deleted after list version ``since``, as
+    ``(version, items, deleted_ids, reset)``, or ``None`` when the list does
+    not exist.
+
+    A first sync, or a cursor older than the list's tombstone horizon (deletes
+    after it may have been pruned), gets every item with ``reset`` set: the
+    client replaces what it has instead of merging.
+
+    The version is read first: changes committed while the rest runs come
+    along too and are sent again after the returned version, which is
+    harmless since clients apply them as upserts and deletes.
+    """
+    list_version = db.execute(changes_version_stmt(list_id)).first()
+    if list_version is None:
         return None
+    if since < list_version.horizon:
+        return list_version.version, db.execute(changed_items_stmt(list_id, -1)).all(), [], True
+    if list_version.version <= since:
+        return list_version.version, [], [], False
+    items = db.execute(changed_items_stmt(list_id, since)).all()
+    deleted = db.scalars(deleted_items_stmt(list_id, since)).all()
+    return list_version.version, items, deleted, False
 
-    if item_update.name is not None:
-        item.name = item_update.name
-        item.category = auto_categorize(item_update.name)
-    if item_update.quantity is not None:
-        item.quantity = item_update.quantity
-    if item_update.bought is not None:
-        item.bought = item_update.bought
 
+# 3️⃣🌊 Stream the items of a list in batches
+def iter_item_batches(db: Session, list_id: str, batch_size: int, limit: int = None, after: tuple = None):
+    """
+    Yield lists of at most ``batch_size`` item rows from a server-side cursor,
+    so memory stays flat however long the list is.
+    """
+    stmt = items_stmt(list_id, limit, after).execution_options(yield_per=batch_size)
+    yield from db.execute(stmt).partitions()
+
+
+# 4️⃣ Update item (mark bought / update quantity)
+def update_item(db: Session, item_id: int, item_update: GroceryUpdate):
+    """Returns the updated row, or ``None`` when no item has ``item_id``."""
+    item = db.execute(update_item_stmt(item_id, item_update)).first()
+    if item is None:
+        return None
+    events.emit(db, events.ITEM_UPDATED, item.list_id, item)
+    list_cache.invalidate_on_commit(db, item.list_id)
     db.commit()
-    db.refresh(item)
     return item
 
 
+# 4️⃣📦 Update many items in one transaction
+def update_items(db: Session, changes: list[GroceryBatchUpdate]):
+    """
+    Apply all ``changes`` with a single statement, whatever their number.
+
+    Several changes to the same item are merged, later fields winning.
+    Returns a list aligned with ``changes``: the updated row, or ``None`` when
+    no item has that id.
+
+    Changes without any field write nothing: those items are only read, so
+    their lists keep their version (and pollers their ETags and cache entries).
+    """
+    if not changes:
+        return []
+
+    merged = {}
+    for change in changes:
+        fields = merged.setdefault(change.id, {})
+        fields.update(change.model_dump(exclude={"id"}, exclude_none=True))
+
+    writes = {item_id: fields for item_id, fields in merged.items() if fields}
+    updated = {row.id: row for row in db.execute(update_items_stmt(writes))} if writes else {}
+    for row in updated.values():
+        events.emit(db, events.ITEM_UPDATED, row.list_id, row)
+        list_cache.invalidate_on_commit(db, row.list_id)
+    if updated:
+        db.commit()
+    unchanged = [item_id for item_id in merged if item_id not in writes]
+    if unchanged:
+        items = GroceryItem.__table__
+        updated.update((row.id, row) for row in db.execute(select(*items.c).where(items.c.id.in_(unchanged))))
+    return [updated.get(change.id) for change in changes]
+
+
 # 5️⃣ Delete item
 def delete_item(db: Session, item_id: int):
-    item = db.query(GroceryItem).filter(GroceryItem.id == item_id).first()
-    if not item:
+    deleted = db.execute(delete_item_stmt(item_id)).first()
+    if deleted is None:
         return False
-    db.delete(item)
+    events.emit(db, events.ITEM_DELETED, deleted.list_id, deleted.id)
+    list_cache.invalidate_on_commit(db, deleted.list_id)
     db.commit()
+    prune_tombstones(db)
     return True
+
+
+# 5️⃣🧹 Drop expired delete tombstones
+def prune_tombstones(db: Session):
+    """
+    Delete tombstones older than ``TOMBSTONE_RETENTION_SECONDS``, at most once
+    per ``TOMBSTONE_PRUNE_INTERVAL_SECONDS`` per process. Runs after a delete
+    has committed; a failed prune is logged and retried next interval.
+    """
+    if not claim_tombstone_prune():
+        return
+    try:
+        db.execute(prune_tombstones_stmt())
+        db.commit()
+    except DBAPIError:
+        db.rollback()
+        logger.warning("Pruning delete tombstones failed", exc_info=True)
@@ -0,0 +1,129 @@
+import logging
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.items import (
+    GroceryItem,
+    ShoppingList,
+    changed_items_stmt,
+    changes_version_stmt,
+    claim_tombstone_prune,
+    delete_item_stmt,
+    deleted_items_stmt,
+    group_lists_with_items,
+    items_stmt,
+    list_version_stmt,
+    lists_with_items_stmt,
+    prune_tombstones_stmt,
+    touch_list_stmt,
+    update_item_stmt,
+)
+from app.schemas.items import GroceryCreate, GroceryUpdate
+from app.shared import events, list_cache
+from app.utils.auto_categorize import auto_categorize
+
+logger = logging.getLogger(__name__)
+
+
+# ========== ASYNC CRUD FUNCTIONS ==========
+# Same behaviour as the functions in app/models/items.py, for AsyncSession.
+
+async def get_list_version(db: AsyncSession, list_id):
+    return (await db.execute(list_version_stmt(list_id))).first()
+
+
+# 1️⃣ Create a new shopping list
+async def create_list(db: AsyncSession, name: str = "My Grocery List"):
+    new_list = ShoppingList(name=name)
+    db.add(new_list)
+    await db.commit()
+    await db.refresh(new_list)
+    return new_list
+
+
+# 1️⃣📚 Load several lists and their items in one query
+async def get_lists_with_items(db: AsyncSession, list_ids: list) -> dict:
+    return group_lists_with_items(await db.execute(lists_with_items_stmt(list_ids)))
+
+
+# 2️⃣ Add new grocery item
+async def add_item(db: AsyncSession, item_data: GroceryCreate):
+    category = auto_categorize(item_data.name)
+    touched = (await db.execute(touch_list_stmt(item_data.list_id))).first()
+    new_item = GroceryItem(
+        list_id=item_data.list_id,
+        name=item_data.name,
+        quantity=item_data.quantity,
+        category=category,
+        version=touched.version if touched is not None else None,
+    )
+    db.add(new_item)
+    events.emit(db.sync_session, events.ITEM_ADDED, item_data.list_id, new_item)
+    list_cache.invalidate_on_commit(db.sync_session, item_data.list_id)
+    await db.commit()
+    await db.refresh(new_item)
+    return new_item
+
+
+# 3️⃣ Get all items in a list (or one keyset page of them)
+async def get_items(db: AsyncSession, list_id: str, limit: int = None, after: tuple = None):
+    result = await db.execute(items_stmt(list_id, limit, after))
+    return result.all()
+
+
+# 3️⃣🔁 Items changed since a delta sync cursor
+async def get_changes(db: AsyncSession, list_id, since: int):
+    list_version = (await db.execute(changes_version_stmt(list_id))).first()
+    if list_version is None:
+        return None
+    if since < list_version.horizon:
+        return list_version.version, (await db.execute(changed_items_stmt(list_id, -1))).all(), [], True
+    if list_version.version <= since:
+        return list_version.version, [], [], False
+    items = (await db.execute(changed_items_stmt(list_id, since))).all()
+    deleted = (await db.scalars(deleted_items_stmt(list_id, since))).all()
+    return list_version.version, items, deleted, False
+
+
+# 3️⃣🌊 Stream the items of a list in batches
+async def iter_item_batches(db: AsyncSession, list_id: str, batch_size: int, limit: int = None, after: tuple = None):
+    stmt = items_stmt(list_id, limit, after).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for batch in result.partitions():
+        yield batch
+
+
+# 4️⃣ Update item (mark bought / update quantity)
+async def update_item(db: AsyncSession, item_id: int, item_update: GroceryUpdate):
+    item = (await db.execute(update_item_stmt(item_id, item_update))).first()
+    if item is None:
+        return None
+    events.emit(db.sync_session, events.ITEM_UPDATED, item.list_id, item)
+    list_cache.invalidate_on_commit(db.sync_session, item.list_id)
+    await db.commit()
+    return item
+
+
+# 5️⃣ Delete item
+async def delete_item(db: AsyncSession, item_id: int):
+    deleted = (await db.execute(delete_item_stmt(item_id))).first()
+    if deleted is None:
+        return False
+    events.emit(db.sync_session, events.ITEM_DELETED, deleted.list_id, deleted.id)
+    list_cache.invalidate_on_commit(db.sync_session, deleted.list_id)
+    await db.commit()
+    await prune_tombstones(db)
+    return True
+
+
+# 5️⃣🧹 Drop expired delete tombstones
+async def prune_tombstones(db: AsyncSession):
+    if not claim_tombstone_prune():
+        return
+    try:
+        await db.execute(prune_tombstones_stmt())
+        await db.commit()
+    except DBAPIError:
+        await db.rollback()
+        logger.warning("Pruning delete tombstones failed", exc_info=True)
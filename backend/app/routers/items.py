@@ -1,12 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, Security
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
+from typing import Any, Optional
 from uuid import UUID
 
-from app.shared.dependencies import get_db
+from app.auth import get_api_key
+from app.config import Settings
+from app.db.database import SessionLocal
+from app.shared import events
+from app.shared.list_cache import get_list_cache
+from app.shared.dependencies import get_db, get_settings
+from app.shared.serialization import ItemListResponse, ListBatchResponse, render_item_lines
+from app.shared.timing import TimedRoute
 from app.schemas import items as schemas
 from app.models import items as models
+from app.shared.constants import (
+    ITEMS_STREAM_BATCH_SIZE,
+    MAX_BATCH_LISTS,
+    MAX_BATCH_UPDATE_ITEMS,
+    MAX_BULK_ITEMS,
+    MAX_ITEMS_PAGE_SIZE,
+    SHARE_CODE_CACHE_SIZE,
+    SHARE_CODE_CACHE_TTL_SECONDS,
+)
+from app.utils.pagination import decode_cursor, decode_sync_cursor, encode_cursor, encode_sync_cursor
+from app.utils.email import get_mail_queue, send_email
+from app.utils.email_template import render_email
+from app.utils.ttl_cache import TTLCache
 
-router = APIRouter( tags=["Grocery List"])
+router = APIRouter( tags=["Grocery List"], route_class=TimedRoute)
+
+share_code_cache = TTLCache(maxsize=SHARE_CODE_CACHE_SIZE, ttl=SHARE_CODE_CACHE_TTL_SECONDS)
+
+
+def _as_utc(value):
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _list_cache_headers(version: int, updated_at) -> dict:
+    # no-cache makes browsers revalidate every poll with If-None-Match
+    headers = {"ETag": f'"{version}"', "Cache-Control": "no-cache"}
+    if updated_at is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(updated_at), usegmt=True)
+    return headers
+
+
+def _is_not_modified(request: Request, version: int, updated_at) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since (RFC 9110 13.2.2)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return f'"{version}"' in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and updated_at is not None:
+        try:
+            # "-0000" parses offset-naive; HTTP dates are always UTC
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError, IndexError):
+            return False
+        return _as_utc(updated_at).replace(microsecond=0) <= since
+    return False
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _parse_cursor(cursor: Optional[str]):
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _parse_sync_cursor(since: Optional[str]) -> int:
+    # No cursor: a first sync, every item is a change.
+    if since is None:
+        return -1
+    try:
+        return decode_sync_cursor(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _changes_response(changes) -> dict:
+    if changes is None:
+        raise HTTPException(status_code=404, detail="List not found")
+    version, items, deleted, reset = changes
+    return {"items": items, "deleted": deleted, "cursor": encode_sync_cursor(version), "reset": reset}
+
+
+def _wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _next_cursor_headers(items: list, limit: Optional[int]) -> dict:
+    # A full page may be followed by more items; a short page is the last one.
+    if limit is None or len(items) < limit:
+        return {}
+    last = items[-1]
+    return {"X-Next-Cursor": encode_cursor(last.created_at, last.id)}
+
+
+def _list_cache_for(list_version, limit: Optional[int], after):
+    # Only whole lists of existing lists are cached; pages are keyed by their cursor.
+    if list_version is None or limit is not None or after is not None:
+        return None
+    return get_list_cache()
+
+
+def _parse_list_ids(ids: list[str]) -> list[UUID]:
+    """``?ids=a,b&ids=c`` as distinct UUIDs in request order."""
+    parsed = {}
+    for value in ids:
+        for part in value.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                parsed.setdefault(UUID(part), None)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid list id {part!r}")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="No list ids")
+    if len(parsed) > MAX_BATCH_LISTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_LISTS} lists per request")
+    return list(parsed)
+
+
+def _list_batch_response(list_ids: list[UUID], lists: dict) -> ListBatchResponse:
+    found = [lists[list_id] for list_id in list_ids if list_id in lists]
+    missing = [list_id for list_id in list_ids if list_id not in lists]
+    return ListBatchResponse((found, missing))
 
 
 # ========== SHOPPING LIST ROUTES ==========
@@ -16,6 +153,114 @@ def create_list(name: str = "My Grocery List", db: Session = Depends(get_db)):
     return models.create_list(db, name)
 
 
+@router.get("/list/{share_code}", response_model=schemas.SharedListOut)
+def get_list_by_share_code(share_code: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    """Resolve a share link to the list and its items in one query."""
+    list_id = share_code_cache.get(share_code)
+
+    # Conditional poll of a known list: answer from the version row alone.
+    if list_id is not None and ("if-none-match" in request.headers or "if-modified-since" in request.headers):
+        list_version = models.get_list_version(db, list_id)
+        if list_version is not None and _is_not_modified(request, *list_version):
+            return Response(status_code=304, headers=_list_cache_headers(*list_version))
+
+    if list_id is not None:
+        result = models.get_list_with_items(db, list_id=list_id)
+    else:
+        result = models.get_list_with_items(db, share_code=share_code)
+    if result is None:
+        share_code_cache.pop(share_code)
+        raise HTTPException(status_code=404, detail="List not found")
+
+    shopping_list, items = result
+    share_code_cache.set(share_code, shopping_list.id)
+    response.headers.update(_list_cache_headers(shopping_list.version, shopping_list.updated_at))
+    return {
+        "id": shopping_list.id,
+        "name": shopping_list.name,
+        "share_code": shopping_list.share_code,
+        "created_at": shopping_list.created_at,
+        "items": items,
+    }
+
+
+@router.get("/lists/batch", response_model=schemas.ListBatchOut)
+def get_lists_batch(ids: list[str] = Query(...), db: Session = Depends(get_db)):
+    """
+    Several lists with their items (newest first) in one query, e.g. for a
+    dashboard of all a household's lists. ``ids`` is repeated or comma
+    separated, at most ``MAX_BATCH_LISTS``. Lists come back in request order;
+    ids with no list are listed in ``missing``.
+    """
+    list_ids = _parse_list_ids(ids)
+    return _list_batch_response(list_ids, models.get_lists_with_items(db, list_ids))
+
+
+@router.post("/lists/{list_id}/invites", response_model=schemas.ListInviteOut, status_code=202,
+             dependencies=[Security(get_api_key)])
+def invite_to_list(
+    list_id: UUID,
+    invite: schemas.ListInviteIn,
+    db: Session = Depends(get_db),
+    settings: Settings = Depends(get_settings),
+):
+    """Email the share link of a list to each address. The emails are queued and sent in the background."""
+    shopping_list = models.get_list(db, list_id)
+    if shopping_list is None:
+        raise HTTPException(status_code=404, detail="List not found")
+    if get_mail_queue() is None:
+        raise HTTPException(status_code=503, detail="Email is not configured")
+
+    subject, html, text = render_email(
+        "list_invite" if invite.inviter else "list_shared",
+        list_name=shopping_list.name,
+        share_url=f"{settings.frontend_url.rstrip('/')}/share/{shopping_list.share_code}",
+        inviter=invite.inviter or "",
+    )
+    return {"queued": sum(send_email(email, subject, html, text) for email in invite.emails)}
+
+
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _list_exists(list_id: UUID) -> bool:
+    # Short-lived session: the event stream must not pin a pooled connection.
+    with SessionLocal() as db:
+        return models.get_list_version(db, list_id) is not None
+
+
+@router.get("/lists/{list_id}/events")
+async def list_events(list_id: UUID):
+    """
+    Server-Sent Events stream of item-added, item-updated and item-deleted
+    events for one list. A ``resync`` event means the client fell behind and
+    should refetch the list.
+    """
+    if not await run_in_threadpool(_list_exists, list_id):
+        raise HTTPException(status_code=404, detail="List not found")
+    await events.ensure_listener()
+
+    async def stream():
+        queue = events.broker.subscribe(list_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+        finally:
+            events.broker.unsubscribe(list_id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ========== GROCERY ITEM ROUTES ==========
 
 @router.post("/items", response_model=schemas.GroceryOut)
@@ -23,10 +268,130 @@ def add_item(item: schemas.GroceryCreate, db: Session = Depends(get_db)):
     return models.add_item(db, item)
 
 
+def _validate_entries(schema, items: list) -> tuple:
+    """Validate each entry on its own; returns ``[(index, model)]`` and ``[GroceryBulkError]``."""
+    valid, errors = [], []
+    for index, raw in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(raw)))
+        except ValidationError as exc:
+            errors.append(schemas.GroceryBulkError(
+                index=index,
+                message="Invalid item",
+                details=[
+                    {"field": ".".join(str(loc) for loc in error["loc"]), "issue": error["msg"]}
+                    for error in exc.errors()
+                ],
+            ))
+    return valid, errors
+
+
+@router.post("/items/bulk", response_model=schemas.GroceryBulkOut)
+def add_items_bulk(items: list[Any] = Body(..., max_length=MAX_BULK_ITEMS), db: Session = Depends(get_db)):
+    """
+    Create many items in one transaction.
+
+    Entries are validated one by one, so an invalid entry is reported in
+    ``errors`` (with its index in the request) without rejecting the rest.
+    """
+    valid, errors = _validate_entries(schemas.GroceryCreate, items)
+    results = models.add_items(db, [item for _, item in valid])
+    created = []
+    for (index, item), result in zip(valid, results):
+        if result is None:
+            errors.append(schemas.GroceryBulkError(index=index, message=f"List {item.list_id} not found"))
+        else:
+            created.append(result)
+
+    errors.sort(key=lambda error: error.index)
+    return {"created": created, "errors": errors}
+
+
+def _stream_items(list_id: UUID, limit: Optional[int], after):
+    # The request's session is closed before the body is sent, so the stream
+    # holds its own for as long as the server-side cursor is open.
+    with SessionLocal() as db:
+        for batch in models.iter_item_batches(db, list_id, ITEMS_STREAM_BATCH_SIZE, limit, after):
+            yield render_item_lines(batch)
+
+
+@router.patch("/items/batch", response_model=schemas.GroceryBatchUpdateOut)
+def update_items_batch(items: list[Any] = Body(..., max_length=MAX_BATCH_UPDATE_ITEMS), db: Session = Depends(get_db)):
+    """
+    Apply many ``{id, bought?, quantity?, name?}`` changes in one transaction,
+    e.g. "mark all bought". Invalid entries and unknown ids are reported in
+    ``errors`` (with their index in the request) without rejecting the rest.
+    """
+    valid, errors = _validate_entries(schemas.GroceryBatchUpdate, items)
+    results = models.update_items(db, [change for _, change in valid])
+    updated, seen = [], set()
+    for (index, change), result in zip(valid, results):
+        if result is None:
+            errors.append(schemas.GroceryBulkError(index=index, message=f"Item {change.id} not found"))
+        elif result.id not in seen:
+            # repeated ids were merged into one change; report the row once
+            seen.add(result.id)
+            updated.append(result)
+
+    errors.sort(key=lambda error: error.index)
+    return {"updated": updated, "errors": errors}
+
+
 @router.get("/items", response_model=list[schemas.GroceryOut])
-def get_all_items(list_id: UUID, db: Session = Depends(get_db)):
-    items = models.get_items(db, list_id)
-    return items
+def get_all_items(
+    list_id: UUID,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_ITEMS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Items of a list, newest first.
+
+    * ``limit`` / ``cursor``: keyset pagination. A full page carries an
+      ``X-Next-Cursor`` header to pass as ``cursor`` for the next one.
+    * ``Accept: application/x-ndjson``: stream one item per line instead of a
+      JSON array, read from a server-side cursor in batches.
+    """
+    after = _parse_cursor(cursor)
+
+    # Read the version before the items: if a write lands in between, the
+    # ETag is older than the body and the next poll simply refetches.
+    headers = {"Vary": "Accept"}
+    list_version = models.get_list_version(db, list_id)
+    if list_version is not None:
+        headers.update(_list_cache_headers(*list_version))
+        if _is_not_modified(request, *list_version):
+            return Response(status_code=304, headers=headers)
+
+    if _wants_ndjson(request):
+        return StreamingResponse(_stream_items(list_id, limit, after), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    cache = _list_cache_for(list_version, limit, after)
+    if cache is not None:
+        body = cache.get(list_id, list_version.version)
+        if body is not None:
+            return Response(body, media_type="application/json", headers=headers)
+
+    items = models.get_items(db, list_id, limit, after)
+    headers.update(_next_cursor_headers(items, limit))
+    # Pre-rendered with the GroceryOut wire format; skips response_model validation.
+    response = ItemListResponse(items, headers=headers)
+    if cache is not None:
+        cache.set(list_id, list_version.version, response.body)
+    return response
+
+
+@router.get("/items/changes", response_model=schemas.GroceryChangesOut)
+def get_item_changes(list_id: UUID, since: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Delta sync: items added or updated and ids of items deleted since the
+    ``since`` cursor, plus the cursor to send next time. Apply ``items`` as
+    upserts by id, then drop the ``deleted`` ids. Without ``since``, or with
+    one older than the tombstone retention window, every item is returned
+    with ``reset: true`` and replaces what the client has.
+    """
+    return _changes_response(models.get_changes(db, list_id, _parse_sync_cursor(since)))
 
 
 @router.put("/items/{item_id}", response_model=schemas.GroceryOut)
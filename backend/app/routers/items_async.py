@@ -0,0 +1,118 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+
+from app.db.database import AsyncSessionLocal
+from app.shared.dependencies import get_async_db
+from app.shared.serialization import ItemListResponse, render_item_lines
+from app.shared.timing import TimedRoute
+from app.schemas import items as schemas
+from app.models import items_async as models
+from app.shared.constants import ITEMS_STREAM_BATCH_SIZE, MAX_ITEMS_PAGE_SIZE
+from app.routers.items import (
+    NDJSON_MEDIA_TYPE,
+    _is_not_modified,
+    _list_batch_response,
+    _list_cache_for,
+    _changes_response,
+    _list_cache_headers,
+    _next_cursor_headers,
+    _parse_cursor,
+    _parse_list_ids,
+    _parse_sync_cursor,
+    _wants_ndjson,
+)
+
+# Async twins of the CRUD routes in app/routers/items.py. When DB_ASYNC is set
+# this router is mounted first, so its routes shadow the threadpool ones.
+router = APIRouter( tags=["Grocery List"], route_class=TimedRoute)
+
+
+# ========== SHOPPING LIST ROUTES ==========
+
+@router.post("/list", response_model=schemas.ListOut)
+async def create_list(name: str = "My Grocery List", db: AsyncSession = Depends(get_async_db)):
+    return await models.create_list(db, name)
+
+
+@router.get("/lists/batch", response_model=schemas.ListBatchOut)
+async def get_lists_batch(ids: list[str] = Query(...), db: AsyncSession = Depends(get_async_db)):
+    list_ids = _parse_list_ids(ids)
+    return _list_batch_response(list_ids, await models.get_lists_with_items(db, list_ids))
+
+
+# ========== GROCERY ITEM ROUTES ==========
+
+@router.post("/items", response_model=schemas.GroceryOut)
+async def add_item(item: schemas.GroceryCreate, db: AsyncSession = Depends(get_async_db)):
+    return await models.add_item(db, item)
+
+
+async def _call(fn, *args):
+    return fn(*args)
+
+
+async def _stream_items(list_id: UUID, limit: Optional[int], after):
+    async with AsyncSessionLocal() as db:
+        async for batch in models.iter_item_batches(db, list_id, ITEMS_STREAM_BATCH_SIZE, limit, after):
+            yield render_item_lines(batch)
+
+
+@router.get("/items", response_model=list[schemas.GroceryOut])
+async def get_all_items(
+    list_id: UUID,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_ITEMS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    after = _parse_cursor(cursor)
+
+    headers = {"Vary": "Accept"}
+    list_version = await models.get_list_version(db, list_id)
+    if list_version is not None:
+        headers.update(_list_cache_headers(*list_version))
+        if _is_not_modified(request, *list_version):
+            return Response(status_code=304, headers=headers)
+
+    if _wants_ndjson(request):
+        return StreamingResponse(_stream_items(list_id, limit, after), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    cache = _list_cache_for(list_version, limit, after)
+    if cache is not None:
+        # a shared store is reached with a blocking client, keep it off the event loop
+        lookup = run_in_threadpool if cache.backend.shared else _call
+        body = await lookup(cache.get, list_id, list_version.version)
+        if body is not None:
+            return Response(body, media_type="application/json", headers=headers)
+
+    items = await models.get_items(db, list_id, limit, after)
+    headers.update(_next_cursor_headers(items, limit))
+    response = ItemListResponse(items, headers=headers)
+    if cache is not None:
+        await lookup(cache.set, list_id, list_version.version, response.body)
+    return response
+
+
+@router.get("/items/changes", response_model=schemas.GroceryChangesOut)
+async def get_item_changes(list_id: UUID, since: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    return _changes_response(await models.get_changes(db, list_id, _parse_sync_cursor(since)))
+
+
+@router.put("/items/{item_id}", response_model=schemas.GroceryOut)
+async def update_item(item_id: int, item: schemas.GroceryUpdate, db: AsyncSession = Depends(get_async_db)):
+    updated = await models.update_item(db, item_id, item)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return updated
+
+
+@router.delete("/items/{item_id}")
+async def delete_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await models.delete_item(db, item_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return {"message": "Item deleted successfully"}
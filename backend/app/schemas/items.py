@@ -1,8 +1,10 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Any, Optional
 from uuid import UUID
 from datetime import datetime
 
+from app.shared.constants import MAX_INVITE_RECIPIENTS
+
 
 # ========== Grocery Schemas ==========
 
@@ -33,6 +35,34 @@ class GroceryOut(GroceryBase):
         orm_mode = True
 
 
+class GroceryBulkError(BaseModel):
+    index: int
+    message: str
+    details: Optional[Any] = None
+
+
+class GroceryBulkOut(BaseModel):
+    created: list[GroceryOut]
+    errors: list[GroceryBulkError]
+
+
+class GroceryBatchUpdate(GroceryUpdate):
+    id: int
+
+
+class GroceryBatchUpdateOut(BaseModel):
+    updated: list[GroceryOut]
+    errors: list[GroceryBulkError]
+
+
+class GroceryChangesOut(BaseModel):
+    items: list[GroceryOut]
+    deleted: list[int]
+    cursor: str
+    # items is the whole list: replace local state instead of merging
+    reset: bool = False
+
+
 # ========== Shopping List Schemas ==========
 
 class ListOut(BaseModel):
@@ -43,3 +73,23 @@ class ListOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class SharedListOut(ListOut):
+    items: list[GroceryOut]
+
+
+class ListBatchOut(BaseModel):
+    lists: list[SharedListOut]
+    # Requested ids with no list
+    missing: list[UUID]
+
+
+class ListInviteIn(BaseModel):
+    emails: list[EmailStr] = Field(..., min_length=1, max_length=MAX_INVITE_RECIPIENTS)
+    # Shown as "<inviter> invited you"; without it the email just carries the share link
+    inviter: Optional[str] = Field(None, max_length=100)
+
+
+class ListInviteOut(BaseModel):
+    queued: int
@@ -0,0 +1,130 @@
+"""
+Admission control for ``/api`` requests (see ``AdmissionMiddleware``).
+
+When Postgres slows down, requests would otherwise queue in the threadpool
+for a pooled connection until ``pool_timeout``, and latency grows for
+everyone. Instead each process answers new requests straight away with
+``503`` and ``Retry-After`` while:
+
+* it already serves ``ADMISSION_MAX_READS`` reads (GET / HEAD) or
+  ``ADMISSION_MAX_WRITES`` writes, counted separately so a write burst
+  cannot starve reads and the other way round,
+* or the recent connection pool wait (``PoolMetrics.recent_wait``) is over
+  ``ADMISSION_MAX_POOL_WAIT_MS``. The average decays while nothing checks
+  out, so admission resumes on its own.
+
+Clients are also rate limited with a token bucket each (``RATE_LIMIT_*``),
+answered ``429`` with ``Retry-After``. A client is the API key when
+``x-api-key`` matches ``API_KEY`` (any other value is ignored, so made-up
+keys cannot open fresh buckets), else the list: the share code of
+``/api/list/{share_code}`` or the ``list_id`` query parameter, else the item
+of ``PUT`` / ``DELETE /api/items/{item_id}``. Requests with none of them are
+not rate limited, since behind a proxy the peer address is the proxy's: that
+leaves ``POST /api/items/bulk`` and ``PATCH /api/items/batch``, whose lists
+are only in the body; they are bounded by ``ADMISSION_MAX_WRITES`` and their
+batch size limits instead.
+
+All limits are per process; a setting of 0 disables it.
+"""
+import hmac
+import math
+import re
+import time
+from urllib.parse import parse_qs
+
+from app.shared.constants import RATE_LIMIT_CLIENTS, SHED_RETRY_AFTER_SECONDS
+from app.utils.ttl_cache import TTLCache
+
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+_SHARE_CODE_PATH = re.compile(r"^/api/list/([^/]+)$")
+_ITEM_PATH = re.compile(r"^/api/items/(\d+)$")
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated_at = now
+
+
+class RateLimiter:
+    """Token bucket per client key: ``rate`` requests per second sustained, ``burst`` at once."""
+
+    def __init__(self, rate: float, burst: int, maxsize: int = RATE_LIMIT_CLIENTS, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._clock = clock
+        # Idle buckets refill completely within burst / rate seconds; past that they can be dropped.
+        self._buckets = TTLCache(maxsize=maxsize, ttl=self.burst / rate)
+
+    def acquire(self, key: str) -> float:
+        """Take a token for ``key``; 0 when allowed, otherwise the seconds until one is available."""
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+        bucket.updated_at = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - bucket.tokens) / self.rate
+        self._buckets.set(key, bucket)
+        return wait
+
+
+class AdmissionController:
+    """In-flight read / write counters and the admission decision. Used from the event loop only."""
+
+    def __init__(self, max_reads: int, max_writes: int, max_pool_wait: float, pool_wait=None):
+        self.max_reads = max_reads
+        self.max_writes = max_writes
+        self.max_pool_wait = max_pool_wait
+        self._pool_wait = pool_wait
+        self.reads = 0
+        self.writes = 0
+
+    def admit(self, method: str):
+        """``None`` when the request may proceed (and is now counted), otherwise the reason to shed it."""
+        is_read = method in READ_METHODS
+        if is_read and self.max_reads and self.reads >= self.max_reads:
+            return "reads"
+        if not is_read and self.max_writes and self.writes >= self.max_writes:
+            return "writes"
+        if self.max_pool_wait and self._pool_wait is not None and self._pool_wait() > self.max_pool_wait:
+            return "pool_wait"
+        if is_read:
+            self.reads += 1
+        else:
+            self.writes += 1
+        return None
+
+    def release(self, method: str):
+        if method in READ_METHODS:
+            self.reads -= 1
+        else:
+            self.writes -= 1
+
+
+def client_key(scope, api_key: bytes = None) -> str:
+    """The rate limit key of a request, or ``None`` (see the module docstring)."""
+    if api_key:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-api-key" and hmac.compare_digest(value, api_key):
+                return "key"
+    match = _SHARE_CODE_PATH.match(scope["path"])
+    if match:
+        return "share:" + match.group(1)
+    list_id = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("list_id")
+    if list_id:
+        return "list:" + list_id[0]
+    match = _ITEM_PATH.match(scope["path"])
+    if match and scope["method"] in ("PUT", "DELETE"):
+        return "item:" + match.group(1)
+    return None
+
+
+def retry_after(seconds: float) -> str:
+    return str(max(SHED_RETRY_AFTER_SECONDS, math.ceil(seconds)))
@@ -0,0 +1,64 @@
+# Maximum number of entries accepted by POST /api/items/bulk
+MAX_BULK_ITEMS = 500
+
+# Maximum number of changes accepted by PATCH /api/items/batch
+MAX_BATCH_UPDATE_ITEMS = 500
+
+# share_code -> list_id cache for GET /api/list/{share_code}; share codes never change
+SHARE_CODE_CACHE_SIZE = 10_000
+SHARE_CODE_CACHE_TTL_SECONDS = 3600
+
+# list_id -> rendered items cache for GET /api/items (see app/shared/list_cache.py)
+LIST_CACHE_SIZE = 1_000
+LIST_CACHE_TTL_SECONDS = 300
+# Larger bodies are not cached, so the in-process cache holds at most SIZE * MAX_ENTRY_BYTES
+LIST_CACHE_MAX_ENTRY_BYTES = 256 * 1024
+
+# Delete tombstones kept for GET /api/items/changes; older cursors get a full resync
+TOMBSTONE_RETENTION_SECONDS = 30 * 24 * 3600
+# Each process prunes expired tombstones after a delete at most this often
+TOMBSTONE_PRUNE_INTERVAL_SECONDS = 3600
+
+# Largest page GET /api/items returns when paginated with ?limit=
+MAX_ITEMS_PAGE_SIZE = 500
+
+# Maximum number of lists requested by one GET /api/lists/batch
+MAX_BATCH_LISTS = 100
+
+# Rows fetched per server-side cursor round trip when streaming items as NDJSON
+ITEMS_STREAM_BATCH_SIZE = 500
+
+# Normalized item names whose category is memoized per process (app/utils/auto_categorize.py)
+CATEGORY_CACHE_SIZE = 50_000
+
+# Rate limited clients whose token buckets are kept per process (app/shared/admission.py)
+RATE_LIMIT_CLIENTS = 10_000
+# Retry-After of requests shed by admission control; throttled ones wait for their next token
+SHED_RETRY_AFTER_SECONDS = 1
+
+# Outbound email queue (app/utils/email.py)
+MAIL_QUEUE_SIZE = 10_000
+# Messages sent over one SMTP connection per worker round trip
+MAIL_BATCH_SIZE = 50
+# Deliveries of a message before it goes to the dead-letter store
+MAIL_MAX_ATTEMPTS = 5
+# Retry delays double from BACKOFF up to BACKOFF_MAX
+MAIL_RETRY_BACKOFF_SECONDS = 2
+MAIL_RETRY_BACKOFF_MAX_SECONDS = 300
+# Pooled connections idle longer than this are checked with NOOP before reuse
+MAIL_CONNECTION_MAX_IDLE_SECONDS = 30
+MAIL_SMTP_TIMEOUT_SECONDS = 10
+
+# Recipients accepted by one POST /api/lists/{list_id}/invites
+MAX_INVITE_RECIPIENTS = 20
+
+# Idempotency-Key responses kept for replay (app/shared/idempotency.py)
+IDEMPOTENCY_CACHE_SIZE = 10_000
+IDEMPOTENCY_TTL_SECONDS = 24 * 3600
+# Longest Idempotency-Key accepted
+IDEMPOTENCY_MAX_KEY_LENGTH = 255
+# A retry waits this long for the first request with its key, then gets a 409
+IDEMPOTENCY_WAIT_SECONDS = 10
+# In-flight database entries older than this belong to a dead worker and can be taken over
+IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = 60
+IDEMPOTENCY_POLL_SECONDS = 0.05
@@ -1,11 +1,6 @@
 from fastapi import Header,HTTPException
-from functools import lru_cache
-from app.db.database import SessionLocal
-from app.config import Settings
-
-@lru_cache()
-def get_settings():
-    return Settings()
+from app.db.database import SessionLocal, AsyncSessionLocal
+from app.config import Settings, get_settings
 
 async def get_db():
     db = SessionLocal()
@@ -14,6 +9,10 @@ async def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # async def get_jwt(token: str = Header(...)):
 #     if token != 'fake-super-secret-token':
 #         raise HTTPException(status_code=400, detail='X-Token header invalid')
@@ -0,0 +1,230 @@
+"""
+List change feed.
+
+CRUD functions call ``emit`` inside their transaction. When the session
+commits, the pending events are published:
+
+* ``postgres`` backend: one ``pg_notify`` statement per transaction, delivered by
+  Postgres only if the transaction commits. Each process keeps a single
+  ``LISTEN`` connection that feeds the local broker; it is opened in a worker
+  thread and then read from the event loop.
+* ``memory`` backend: events go straight to the local broker after commit
+  (single node and test runs).
+
+Subscribers (the SSE endpoint) only ever talk to the local ``broker``.
+"""
+import asyncio
+import json
+from collections import defaultdict
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.logger import logger
+from app.schemas.items import GroceryOut
+
+CHANNEL = "list_events"
+SUBSCRIBER_QUEUE_SIZE = 100
+ITEM_ADDED = "item-added"
+ITEM_UPDATED = "item-updated"
+ITEM_DELETED = "item-deleted"
+RESYNC = "resync"
+
+_PENDING_KEY = "pending_list_events"
+_COMMITTED_KEY = "committed_list_events"
+
+
+class ListEventBroker:
+    """In-process fan-out of list events to subscriber queues."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._loop = None
+
+    def subscribe(self, list_id: str) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[str(list_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, list_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(str(list_id))
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[str(list_id)]
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def publish(self, message: dict):
+        """Deliver ``message`` to the subscribers of its list. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or str(message["list_id"]) not in self._subscribers:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(message)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: dict):
+        for queue in list(self._subscribers.get(str(message["list_id"]), ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow consumer missed events: drop its backlog and ask it to refetch.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": RESYNC, "list_id": message["list_id"]})
+
+
+class PostgresListener:
+    """One ``LISTEN`` connection per process, read from the event loop without a thread."""
+
+    def __init__(self, broker: ListEventBroker, channel: str = CHANNEL, reconnect_delay: float = 1.0):
+        self.broker = broker
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._conn = None
+        self._fileno = None
+        self._loop = None
+        self._lock = asyncio.Lock()
+        self._reconnecting = None
+
+    @property
+    def running(self) -> bool:
+        return self._conn is not None
+
+    async def start(self):
+        """Connect and ``LISTEN`` unless already listening; concurrent callers share one attempt."""
+        async with self._lock:
+            if self._conn is not None:
+                return
+            self._loop = asyncio.get_running_loop()
+            # Checking out a connection and LISTEN block on the network: keep them off the loop.
+            conn = await run_in_threadpool(self._connect)
+            self._conn, self._fileno = conn, conn.fileno()
+            self._loop.add_reader(self._fileno, self._on_readable)
+        logger.info("Listening for list events on channel %s", self.channel)
+
+    def _connect(self):
+        from app.db.database import engine
+
+        raw = engine.raw_connection()
+        conn = raw.driver_connection
+        # Keep this connection out of the pool for the life of the process.
+        raw.detach()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def stop(self):
+        if self._conn is None:
+            return
+        # A lost connection no longer knows its fileno(); remove the reader by the one it had.
+        try:
+            self._loop.remove_reader(self._fileno)
+        except Exception:
+            pass
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+    def _on_readable(self):
+        try:
+            self._conn.poll()
+        except Exception:
+            logger.exception("List event listener connection lost, reconnecting")
+            self.stop()
+            self._reconnecting = self._loop.create_task(self._reconnect())
+            return
+        while self._conn.notifies:
+            notify = self._conn.notifies.pop(0)
+            try:
+                self.broker.publish(json.loads(notify.payload))
+            except (ValueError, KeyError):
+                logger.warning("Ignoring malformed list event: %s", notify.payload)
+
+    async def _reconnect(self):
+        while self._conn is None:
+            await asyncio.sleep(self.reconnect_delay)
+            try:
+                await self.start()
+            except Exception:
+                logger.exception("List event listener reconnect failed")
+
+
+broker = ListEventBroker()
+_listener = None
+
+
+def _backend() -> str:
+    from app.shared.dependencies import get_settings
+
+    return get_settings().events_backend
+
+
+async def ensure_listener():
+    """Start the process-wide Postgres listener on first subscription (postgres backend only)."""
+    global _listener
+    if _backend() != "postgres" or (_listener is not None and _listener.running):
+        return
+    if _listener is None:
+        _listener = PostgresListener(broker)
+    await _listener.start()
+
+
+def emit(db: Session, event_type: str, list_id, item):
+    """Queue an event for ``item`` on ``db``; it is published when ``db`` commits."""
+    db.info.setdefault(_PENDING_KEY, []).append((event_type, list_id, item))
+
+
+def _serialize(event_type: str, list_id, item) -> dict:
+    if event_type == ITEM_DELETED:
+        data = {"id": item}
+    else:
+        data = GroceryOut.model_validate(item, from_attributes=True).model_dump(mode="json")
+    return {"type": event_type, "list_id": str(list_id), "item": data}
+
+
+@event.listens_for(Session, "before_commit")
+def _publish_pending_events(session: Session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    # Make sure generated ids and timestamps are loaded before serializing.
+    session.flush()
+    messages = [_serialize(*pending_event) for pending_event in pending]
+    if _backend() == "postgres":
+        session.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": CHANNEL, "payloads": [json.dumps(message) for message in messages]},
+        )
+    else:
+        session.info.setdefault(_COMMITTED_KEY, []).extend(messages)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_local_events(session: Session):
+    for message in session.info.pop(_COMMITTED_KEY, ()):
+        broker.publish(message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_COMMITTED_KEY, None)
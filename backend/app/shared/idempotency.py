@@ -0,0 +1,275 @@
+"""
+Idempotency keys for the create endpoints (see ``IdempotencyMiddleware``).
+
+A client sends ``Idempotency-Key: <unique value>`` and repeats it on every
+retry of the same request. The first request with a key runs normally and its
+response (status, headers, body) is stored; retries get the stored response
+back, with ``Idempotent-Replayed: true``, and never reach the database.
+A retry that arrives while the first request is still running waits for it.
+
+Keys are scoped to the method, the path and the client (``client_scope``),
+so two clients that happen to pick the same key never see each other's
+responses. They remember a hash of the query string and body: reusing a key
+for a different request is a ``422``.
+``5xx`` responses are not stored, so the next retry runs the request again.
+
+Backends (``IDEMPOTENCY_BACKEND``):
+
+* ``memory``: in-process LRU with a TTL (default). Retries that land on
+  another worker process are not deduplicated,
+* ``database``: the ``idempotency_keys`` table, shared by all workers; waiting
+  retries poll the row,
+* ``off``: the header is ignored.
+"""
+import asyncio
+import hashlib
+import hmac
+import time
+from functools import lru_cache
+
+import orjson
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import func
+
+from app.shared.constants import (
+    IDEMPOTENCY_CACHE_SIZE,
+    IDEMPOTENCY_PENDING_TIMEOUT_SECONDS,
+    IDEMPOTENCY_POLL_SECONDS,
+    IDEMPOTENCY_TTL_SECONDS,
+)
+from app.utils.ttl_cache import TTLCache
+
+CLAIMED = "claimed"
+PENDING = "pending"
+DONE = "done"
+MISMATCH = "mismatch"
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "headers", "body")
+
+    def __init__(self, fingerprint: str, status: int, headers: list, body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        # [(name, value)] as latin-1 strings
+        self.headers = headers
+        self.body = body
+
+
+def fingerprint(query_string: bytes, body: bytes) -> str:
+    return hashlib.sha256(query_string + b"\0" + body).hexdigest()
+
+
+def client_scope(scope, body: bytes, api_key: bytes = None) -> str:
+    """
+    Who a key belongs to: the API key when ``x-api-key`` matches ``api_key``
+    (any other value is ignored, or a caller could pick its way into another
+    client's scope), else the lists the body writes to (``list_id`` of one
+    item or of each bulk entry), else the peer address, e.g. for
+    ``POST /api/list``. Hashed, to keep stored keys short.
+    """
+    client = None
+    if api_key:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-api-key" and hmac.compare_digest(value, api_key):
+                client = b"key"
+                break
+    if client is None:
+        list_ids = _body_list_ids(body)
+        if list_ids:
+            client = ("lists:" + ",".join(list_ids)).encode()
+    if client is None:
+        host, _ = scope.get("client") or (None, None)
+        client = f"peer:{host}".encode()
+    return hashlib.sha256(client).hexdigest()
+
+
+def _body_list_ids(body: bytes) -> list:
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return []
+    entries = payload if isinstance(payload, list) else [payload]
+    return sorted({str(entry["list_id"]) for entry in entries if isinstance(entry, dict) and "list_id" in entry})
+
+
+class MemoryIdempotencyStore:
+    """
+    Stored responses in a per-process LRU; requests in flight in a dict of
+    events. Used from the event loop only.
+    """
+
+    def __init__(self, maxsize: int = IDEMPOTENCY_CACHE_SIZE, ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self._responses = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._pending = {}
+
+    async def claim(self, key: str, request_fingerprint: str) -> tuple:
+        """``(CLAIMED | PENDING | DONE | MISMATCH, StoredResponse or None)``."""
+        stored = self._responses.get(key)
+        if stored is not None:
+            return (DONE, stored) if stored.fingerprint == request_fingerprint else (MISMATCH, None)
+        pending = self._pending.get(key)
+        if pending is not None:
+            return (PENDING, None) if pending[0] == request_fingerprint else (MISMATCH, None)
+        self._pending[key] = (request_fingerprint, asyncio.Event())
+        return CLAIMED, None
+
+    async def wait(self, key: str, timeout: float):
+        """The response of the request in flight under ``key``, or ``None`` if it failed or took too long."""
+        pending = self._pending.get(key)
+        if pending is not None:
+            try:
+                await asyncio.wait_for(pending[1].wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._responses.get(key)
+
+    async def complete(self, key: str, response: StoredResponse):
+        self._responses.set(key, response)
+        self._finish(key)
+
+    async def release(self, key: str):
+        self._finish(key)
+
+    def _finish(self, key: str):
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            pending[1].set()
+
+
+class DatabaseIdempotencyStore:
+    """
+    Rows of ``idempotency_keys`` (``app.models.idempotency``): a row with no
+    status is a request in flight. Rows older than ``ttl`` are replaced on the
+    next claim of their key and purged now and then; in-flight rows older than
+    ``pending_timeout`` (their worker died) can be taken over.
+    """
+
+    def __init__(self, session_factory, ttl: float = IDEMPOTENCY_TTL_SECONDS,
+                 pending_timeout: float = IDEMPOTENCY_PENDING_TIMEOUT_SECONDS,
+                 poll_interval: float = IDEMPOTENCY_POLL_SECONDS):
+        self._session_factory = session_factory
+        self.ttl = ttl
+        self.pending_timeout = pending_timeout
+        self.poll_interval = poll_interval
+        self._purged_at = 0.0
+
+    async def claim(self, key: str, request_fingerprint: str) -> tuple:
+        return await run_in_threadpool(self._claim, key, request_fingerprint)
+
+    async def wait(self, key: str, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            row = await run_in_threadpool(self._load, key)
+            if row is None:
+                return None
+            if row.status is not None:
+                return StoredResponse(row.fingerprint, row.status, row.headers, row.body)
+        return None
+
+    async def complete(self, key: str, response: StoredResponse):
+        await run_in_threadpool(self._complete, key, response)
+
+    async def release(self, key: str):
+        await run_in_threadpool(self._release, key)
+
+    def _claim(self, key: str, request_fingerprint: str) -> tuple:
+        from app.models.idempotency import IdempotencyKey
+
+        with self._session_factory() as db:
+            self._purge_expired(db, IdempotencyKey)
+            claimed = db.execute(
+                pg_insert(IdempotencyKey)
+                .values(key=key, fingerprint=request_fingerprint)
+                .on_conflict_do_nothing(index_elements=["key"])
+                .returning(IdempotencyKey.key)
+            ).first()
+            if claimed is None:
+                # Take over an expired entry, or an in-flight one whose worker is gone.
+                claimed = db.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.key == key, or_(
+                        IdempotencyKey.created_at < func.now() - _seconds(self.ttl),
+                        (IdempotencyKey.status.is_(None))
+                        & (IdempotencyKey.created_at < func.now() - _seconds(self.pending_timeout)),
+                    ))
+                    .values(fingerprint=request_fingerprint, status=None, headers=None, body=None,
+                            created_at=func.now())
+                    .returning(IdempotencyKey.key)
+                ).first()
+            if claimed is not None:
+                db.commit()
+                return CLAIMED, None
+            row = db.execute(_stored_columns(IdempotencyKey).where(IdempotencyKey.key == key)).first()
+            db.commit()
+        if row is None:
+            # completed and purged in between; a retry claims it again
+            return self._claim(key, request_fingerprint)
+        if row.fingerprint != request_fingerprint:
+            return MISMATCH, None
+        if row.status is None:
+            return PENDING, None
+        return DONE, StoredResponse(row.fingerprint, row.status, row.headers, row.body)
+
+    def _purge_expired(self, db, model):
+        now = time.monotonic()
+        if now - self._purged_at < self.ttl / 10:
+            return
+        self._purged_at = now
+        db.execute(delete(model).where(model.created_at < func.now() - _seconds(self.ttl)))
+
+    def _load(self, key: str):
+        from app.models.idempotency import IdempotencyKey
+
+        with self._session_factory() as db:
+            return db.execute(_stored_columns(IdempotencyKey).where(IdempotencyKey.key == key)).first()
+
+    def _complete(self, key: str, response: StoredResponse):
+        from app.models.idempotency import IdempotencyKey
+
+        with self._session_factory() as db:
+            db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(status=response.status, headers=response.headers, body=response.body)
+            )
+            db.commit()
+
+    def _release(self, key: str):
+        from app.models.idempotency import IdempotencyKey
+
+        with self._session_factory() as db:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.status.is_(None)))
+            db.commit()
+
+
+def _stored_columns(model):
+    return select(model.fingerprint, model.status, model.headers, model.body)
+
+
+def _seconds(seconds: float):
+    return func.make_interval(0, 0, 0, 0, 0, 0, seconds)
+
+
+def build_idempotency_store(settings):
+    """The store configured by ``IDEMPOTENCY_BACKEND``, or ``None`` when it is ``off``."""
+    if settings.idempotency_backend == "off":
+        return None
+    if settings.idempotency_backend == "database":
+        from app.db.database import SessionLocal
+
+        return DatabaseIdempotencyStore(SessionLocal)
+    if settings.idempotency_backend == "memory":
+        return MemoryIdempotencyStore()
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND {settings.idempotency_backend!r}")
+
+
+@lru_cache()
+def get_idempotency_store():
+    from app.shared.dependencies import get_settings
+
+    return build_idempotency_store(get_settings())
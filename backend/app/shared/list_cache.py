@@ -0,0 +1,225 @@
+"""
+Read-through cache of rendered item lists.
+
+``GET /api/items`` (the full list, as JSON) stores the response body under
+the list id together with the list ``version`` it was read at. The route
+reads the version on every request anyway (for the ETag), so an entry is only
+served when its version is the current one: a write committed before the
+lookup, in this process or any other, bumps the version and turns the entry
+into a miss. Writes also drop the entry when their transaction commits
+(``invalidate_on_commit``), which frees the memory early.
+
+Backends (``LIST_CACHE_BACKEND``):
+
+* ``memory``: in-process LRU with a TTL (default),
+* ``redis``: a key-value store shared by all workers (``LIST_CACHE_URL``);
+  its own eviction policy bounds memory, so only hits and misses are counted
+  here,
+* ``off``: no caching.
+
+Invalidation only frees memory early; a stale entry is never served, because
+its version is behind. So when a shared store is invalidated from the event
+loop (``DB_ASYNC`` commits run there), the round trip is handed to a thread
+and not waited for.
+
+``FakeKeyValueStore`` stands in for Redis in tests and benchmarks.
+"""
+import asyncio
+import math
+import threading
+import time
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.logger import logger
+from app.shared.constants import LIST_CACHE_MAX_ENTRY_BYTES, LIST_CACHE_SIZE, LIST_CACHE_TTL_SECONDS
+from app.utils.ttl_cache import TTLCache
+
+_INVALIDATE_KEY = "list_cache_invalidations"
+
+
+class MemoryBackend:
+    """Per-process LRU of ``(version, body)`` entries."""
+
+    shared = False
+
+    def __init__(self, maxsize: int, ttl: float, clock=time.monotonic):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+
+    def get(self, key: str):
+        return self._cache.get(key)
+
+    def set(self, key: str, version: int, body: bytes):
+        self._cache.set(key, (version, body))
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._cache.pop(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    @property
+    def evictions(self) -> int:
+        return self._cache.evictions
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class KeyValueBackend:
+    """
+    Entries in a shared store with the Redis ``get`` / ``set(ex=)`` /
+    ``delete`` API, encoded as ``b"<version>\\n" + body``. Size and
+    evictions belong to the store and are not tracked here.
+    """
+
+    shared = True
+
+    def __init__(self, client, ttl: float, prefix: str = "list-items:"):
+        self.client = client
+        self.ttl = max(1, math.ceil(ttl))
+        self.prefix = prefix
+
+    def get(self, key: str):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        version, _, body = value.partition(b"\n")
+        return int(version), body
+
+    def set(self, key: str, version: int, body: bytes):
+        self.client.set(self.prefix + key, b"%d\n" % version + body, ex=self.ttl)
+
+    def delete(self, *keys: str):
+        self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        pass
+
+
+class FakeKeyValueStore:
+    """In-memory stand-in for a Redis client (``get``, ``set(ex=)``, ``delete``)."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value, expires_at = self._data.get(key, (None, None))
+            if expires_at is not None and expires_at <= self._clock():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ex: float = None):
+        with self._lock:
+            self._data[key] = (value, self._clock() + ex if ex else None)
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+
+class ListCache:
+    """Version-checked item list bodies keyed by list id, with hit / miss counters."""
+
+    def __init__(self, backend, max_entry_bytes: int = LIST_CACHE_MAX_ENTRY_BYTES):
+        self.backend = backend
+        self.max_entry_bytes = max_entry_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, list_id, version: int):
+        """The body cached for ``list_id`` at ``version``, or ``None``."""
+        entry = self.backend.get(str(list_id))
+        hit = entry is not None and entry[0] == version
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry[1] if hit else None
+
+    def set(self, list_id, version: int, body: bytes):
+        # Lists too large to be worth the memory are not cached at all.
+        if len(body) <= self.max_entry_bytes:
+            self.backend.set(str(list_id), version, body)
+
+    def invalidate(self, *list_ids):
+        self.backend.delete(*(str(list_id) for list_id in list_ids))
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if not self.backend.shared:
+            stats.update(size=len(self.backend), evictions=self.backend.evictions)
+        return stats
+
+
+def build_list_cache(settings):
+    """The cache configured by ``LIST_CACHE_BACKEND``, or ``None`` when it is ``off``."""
+    if settings.list_cache_backend == "off":
+        return None
+    if settings.list_cache_backend == "redis":
+        import redis
+
+        client = redis.Redis.from_url(settings.list_cache_url)
+        return ListCache(KeyValueBackend(client, ttl=LIST_CACHE_TTL_SECONDS))
+    if settings.list_cache_backend == "memory":
+        return ListCache(MemoryBackend(maxsize=LIST_CACHE_SIZE, ttl=LIST_CACHE_TTL_SECONDS))
+    raise ValueError(f"Unknown LIST_CACHE_BACKEND {settings.list_cache_backend!r}")
+
+
+@lru_cache()
+def get_list_cache():
+    from app.shared.dependencies import get_settings
+
+    return build_list_cache(get_settings())
+
+
+def invalidate_on_commit(db: Session, list_id):
+    """Drop the cached items of ``list_id`` once ``db`` commits."""
+    db.info.setdefault(_INVALIDATE_KEY, set()).add(str(list_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    list_ids = session.info.pop(_INVALIDATE_KEY, None)
+    cache = get_list_cache() if list_ids else None
+    if cache is None:
+        return
+    if cache.backend.shared:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            loop.run_in_executor(None, _invalidate, cache, list_ids)
+            return
+    _invalidate(cache, list_ids)
+
+
+def _invalidate(cache: ListCache, list_ids):
+    # The write is committed already; a store that is down must not fail it.
+    try:
+        cache.invalidate(*list_ids)
+    except Exception:
+        logger.warning("Could not invalidate cached lists %s", sorted(list_ids), exc_info=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session: Session):
+    session.info.pop(_INVALIDATE_KEY, None)
@@ -0,0 +1,201 @@
+"""
+In-process request metrics in the Prometheus text format.
+
+Counters live in this process: one uvicorn worker, or one Lambda container
+behind the Mangum ``handler``. Prometheus scrapes (or a log shipper collects)
+each of them and aggregates across processes.
+"""
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds, as in the Prometheus client libraries' defaults.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# Route label for requests that matched no route, so random paths cannot blow up cardinality.
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self):
+        # one slot per bound plus +Inf, non-cumulative until rendered
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """
+    Latency histograms per route, request counts per route and status, an
+    in-flight gauge, and the requests admission control shed or throttled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = defaultdict(_Histogram)
+        self._requests = defaultdict(int)
+        self._over_query_budget = defaultdict(int)
+        self._shed = defaultdict(int)
+        self._throttled = 0
+        self.in_flight = 0
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float):
+        with self._lock:
+            self.in_flight -= 1
+            self._latency[(method, route)].observe(seconds)
+            self._requests[(method, route, status)] += 1
+
+    def over_query_budget(self, method: str, route: str):
+        with self._lock:
+            self._over_query_budget[(method, route)] += 1
+
+    def shed(self, reason: str):
+        with self._lock:
+            self._shed[reason] += 1
+
+    def throttled(self):
+        with self._lock:
+            self._throttled += 1
+
+    def render(self) -> list:
+        with self._lock:
+            latency = {key: (list(h.buckets), h.sum, h.count) for key, h in self._latency.items()}
+            requests = dict(self._requests)
+            over_query_budget = dict(self._over_query_budget)
+            shed = dict(self._shed)
+            throttled = self._throttled
+            in_flight = self.in_flight
+
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+            "# HELP http_requests_total Requests served, by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        lines += [
+            "# HELP http_requests_over_query_budget_total Requests that issued more SQL statements than QUERY_BUDGET.",
+            "# TYPE http_requests_over_query_budget_total counter",
+        ]
+        for (method, route), count in sorted(over_query_budget.items()):
+            lines.append(f"http_requests_over_query_budget_total{_labels(method=method, route=route)} {count}")
+
+        lines += [
+            "# HELP http_requests_shed_total Requests answered 503 by admission control, by reason.",
+            "# TYPE http_requests_shed_total counter",
+        ]
+        for reason, count in sorted(shed.items()):
+            lines.append(f"http_requests_shed_total{_labels(reason=reason)} {count}")
+
+        lines += [
+            "# HELP http_requests_throttled_total Requests answered 429 by the per-client rate limit.",
+            "# TYPE http_requests_throttled_total counter",
+            f"http_requests_throttled_total {throttled}",
+            "# HELP http_request_duration_seconds Time from receiving a request to sending its last byte.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), (buckets, total, count) in sorted(latency.items()):
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                cumulative += bucket
+                lines.append(
+                    f"http_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {cumulative}"
+                )
+            lines.append(f"http_request_duration_seconds_sum{_labels(method=method, route=route)} {total}")
+            lines.append(f"http_request_duration_seconds_count{_labels(method=method, route=route)} {count}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+# (metric, type, help, key in app.db.pool.pool_stats)
+_POOL_METRICS = (
+    ("db_pool_checkouts_total", "counter", "Connections checked out of the pool.", "checkouts"),
+    ("db_pool_timeouts_total", "counter", "Checkouts that gave up after pool_timeout.", "timeouts"),
+    ("db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection.", "wait_seconds_total"),
+    ("db_pool_wait_seconds_max", "gauge", "Longest wait for a connection.", "wait_seconds_max"),
+    ("db_pool_wait_seconds_recent", "gauge", "Connection wait averaged over the last second or so.", "wait_seconds_recent"),
+    ("db_pool_checked_out", "gauge", "Connections currently checked out.", "checked_out"),
+    ("db_pool_capacity", "gauge", "pool_size plus max_overflow.", "capacity"),
+)
+
+
+def render_pool_metrics(pools: dict) -> list:
+    """Prometheus lines for ``app.db.database.get_pool_metrics()``; engines not built yet are skipped."""
+    lines = []
+    for metric, kind, help_text, key in _POOL_METRICS:
+        samples = [(name, stats[key]) for name, stats in pools.items() if stats and key in stats]
+        if not samples:
+            continue
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [f"{metric}{_labels(engine=name)} {value}" for name, value in samples]
+    return lines
+
+
+# (metric, type, help, key in TTLCache.stats() / ListCache.stats())
+_CACHE_METRICS = (
+    ("cache_hits_total", "counter", "Cache lookups answered from the cache.", "hits"),
+    ("cache_misses_total", "counter", "Cache lookups that went to the database.", "misses"),
+    ("cache_evictions_total", "counter", "Entries evicted to stay within the size bound.", "evictions"),
+    ("cache_entries", "gauge", "Entries currently cached in this process.", "size"),
+)
+
+
+def render_cache_metrics(caches: dict) -> list:
+    """Prometheus lines for ``{name: cache.stats()}``; disabled caches (``None``) are skipped."""
+    lines = []
+    for metric, kind, help_text, key in _CACHE_METRICS:
+        # shared stores track no size or evictions of their own
+        samples = [(name, stats[key]) for name, stats in caches.items() if stats is not None and key in stats]
+        if samples:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            lines += [f"{metric}{_labels(cache=name)} {value}" for name, value in samples]
+    return lines
+
+
+request_metrics = RequestMetrics()
+
+
+# (metric, type, help, key in MailQueue.stats())
+_MAIL_METRICS = (
+    ("mail_queued", "gauge", "Emails waiting in the outbound queue, including retries.", "queued"),
+    ("mail_sent_total", "counter", "Emails accepted by the SMTP server.", "sent"),
+    ("mail_retries_total", "counter", "Failed deliveries scheduled for another attempt.", "retried"),
+    ("mail_dead_letters_total", "counter", "Emails given up on and stored as dead letters.", "dead"),
+    ("mail_smtp_connections_total", "counter", "SMTP connections opened.", "connections"),
+)
+
+
+def render_mail_metrics(stats: dict) -> list:
+    """Prometheus lines for ``MailQueue.stats()``; nothing when email is not configured."""
+    lines = []
+    for metric, kind, help_text, key in _MAIL_METRICS if stats else ():
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}", f"{metric} {stats[key]}"]
+    return lines
+
+
+def render(pools: dict, caches: dict = None, mail: dict = None) -> str:
+    lines = request_metrics.render() + render_pool_metrics(pools) + render_cache_metrics(caches or {})
+    return "\n".join(lines + render_mail_metrics(mail)) + "\n"
@@ -0,0 +1,74 @@
+"""
+Pre-rendered JSON for item lists (and the lists of ``GET /api/lists/batch``).
+
+Returning ORM objects through ``response_model=list[GroceryOut]`` validates
+and re-serializes every row with pydantic. Item list endpoints instead select
+the ``GroceryOut`` columns as plain rows and encode them with orjson, which
+writes UUIDs and datetimes natively. The wire format is the same: same keys in
+the same order, UTC datetimes with a ``Z`` suffix.
+"""
+import uuid
+
+import orjson
+from fastapi.responses import Response
+
+from app.schemas.items import GroceryOut, ListOut
+from app.shared import timing
+
+# Field order of GroceryOut, which is also the column order of item rows.
+ITEM_FIELDS = tuple(GroceryOut.model_fields)
+# Same for ListOut and list rows.
+LIST_FIELDS = tuple(ListOut.model_fields)
+
+_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _default(value):
+    # orjson only encodes uuid.UUID itself; asyncpg returns a subclass.
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError
+
+
+def render_items(rows) -> bytes:
+    """JSON array of ``rows`` (sequences in ``ITEM_FIELDS`` order)."""
+    return orjson.dumps([dict(zip(ITEM_FIELDS, row)) for row in rows], option=_OPTIONS, default=_default)
+
+
+def render_item_lines(rows) -> bytes:
+    """NDJSON, one item per line."""
+    return b"".join(
+        orjson.dumps(dict(zip(ITEM_FIELDS, row)), default=_default, option=_OPTIONS | orjson.OPT_APPEND_NEWLINE) for row in rows
+    )
+
+
+def render_lists(lists, missing) -> bytes:
+    """``ListBatchOut`` JSON of ``[(list_row, item_rows)]`` and the ids of lists not found."""
+    return orjson.dumps(
+        {
+            "lists": [
+                {**dict(zip(LIST_FIELDS, list_row)), "items": [dict(zip(ITEM_FIELDS, row)) for row in rows]}
+                for list_row, rows in lists
+            ],
+            "missing": missing,
+        },
+        option=_OPTIONS,
+        default=_default,
+    )
+
+
+class ItemListResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        with timing.rendering():
+            return render_items(content)
+
+
+class ListBatchResponse(Response):
+    """Renders ``(lists, missing)`` with ``render_lists``."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        with timing.rendering():
+            return render_lists(*content)
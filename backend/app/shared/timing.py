@@ -0,0 +1,155 @@
+"""
+Per-request timing breakdown.
+
+``RequestTimingMiddleware`` opens a ``RequestTiming`` for every request and
+keeps it in a context variable, which the threadpool and SQLAlchemy's async
+greenlets inherit. Engine hooks add each statement's count and duration to
+it, ``TimedRoute`` times the endpoint function, and pre-rendered responses
+time their own encoding. The middleware reports the result in a
+``Server-Timing`` header and in the access log.
+
+Phases:
+
+* ``db``: time inside ``cursor.execute``, with the number of statements,
+* ``handler``: the endpoint itself, minus its ``db`` time,
+* ``serialize``: from the endpoint's return to the response start
+  (``response_model`` validation and JSON encoding), minus any ``db`` time
+  spent there, e.g. lazy loads,
+* ``app``: from the request to the response start.
+"""
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+_current = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    __slots__ = (
+        "start", "db_count", "db_seconds", "endpoint_seconds", "endpoint_end",
+        "db_seconds_in_endpoint", "render_seconds", "response_start",
+    )
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_count = 0
+        self.db_seconds = 0.0
+        self.endpoint_seconds = 0.0
+        self.endpoint_end = None
+        self.db_seconds_in_endpoint = 0.0
+        self.render_seconds = 0.0
+        self.response_start = None
+
+    def mark_response_start(self):
+        if self.response_start is None:
+            self.response_start = time.perf_counter()
+
+    def phases(self) -> dict:
+        """Milliseconds per phase; ``handler`` and ``serialize`` only for routed requests."""
+        end = self.response_start or time.perf_counter()
+        phases = {"db": self.db_seconds, "app": end - self.start}
+        if self.endpoint_end is not None:
+            db_after_endpoint = self.db_seconds - self.db_seconds_in_endpoint
+            phases["handler"] = max(self.endpoint_seconds - self.db_seconds_in_endpoint - self.render_seconds, 0.0)
+            phases["serialize"] = max(end - self.endpoint_end - db_after_endpoint, 0.0) + self.render_seconds
+        return {name: round(seconds * 1000, 3) for name, seconds in phases.items()}
+
+    def server_timing(self, phases: dict) -> str:
+        parts = [f'db;dur={phases["db"]};desc="{self.db_count} queries"']
+        parts += [f"{name};dur={phases[name]}" for name in ("handler", "serialize", "app") if name in phases]
+        return ", ".join(parts)
+
+
+def start_request():
+    """Open a ``RequestTiming`` for the current context; returns it and the token to ``end_request`` with."""
+    timing = RequestTiming()
+    return timing, _current.set(timing)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def rendering():
+    """Count the enclosed block as serialization of the current request."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.render_seconds += time.perf_counter() - start
+
+
+# ========== SQLALCHEMY HOOKS ==========
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._timing_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = _current.get()
+    if timing is not None:
+        timing.db_count += 1
+        timing.db_seconds += time.perf_counter() - context._timing_start
+
+
+def instrument_engine(engine):
+    """Attribute the statements of ``engine`` (a sync ``Engine``) to the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ========== ROUTE CLASS ==========
+
+def _record_endpoint(start: float):
+    timing = _current.get()
+    if timing is not None:
+        timing.endpoint_end = time.perf_counter()
+        timing.endpoint_seconds += timing.endpoint_end - start
+        timing.db_seconds_in_endpoint = timing.db_seconds
+
+
+def _timed(endpoint):
+    if getattr(endpoint, "_request_timed", False):
+        # include_router re-creates routes from the already wrapped endpoint
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _record_endpoint(start)
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _record_endpoint(start)
+
+    timed._request_timed = True
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """``APIRoute`` whose endpoint reports its own duration, splitting handler from serialization time."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed(endpoint), **kwargs)
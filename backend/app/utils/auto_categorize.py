@@ -1,20 +1,320 @@
-CATEGORY_MAP = {
-    "milk": "Dairy",
-    "cheese": "Dairy",
-    "apple": "Fruits",
-    "banana": "Fruits",
-    "rice": "Grains",
-    "bread": "Bakery",
-    "chicken": "Meat",
-    "tomato": "Vegetables",
-    "onion": "Vegetables",
-    "oil": "Grocery",
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import deque
+
+from app.logger import logger
+from app.shared.constants import CATEGORY_CACHE_SIZE
+from app.utils.ttl_cache import TTLCache
+
+DEFAULT_CATEGORY = "Others"
+TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "taxonomy.json")
+# Fallback classifier artifact (``.npy`` + ``.json``), see app/utils/category_model.py
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "category_model")
+# Precomputed categories of common names, see scripts/precompute_categories.py
+COMMON_CATEGORIES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "common_categories.json")
+
+_WHITESPACE = re.compile(r"\s+")
+# Words whose trailing "s" is not a plural, and plurals the suffix rules get wrong.
+_NOT_PLURAL = frozenset({"asparagus", "couscous", "hummus", "molasses", "swiss", "bass", "species", "series", "news"})
+_IRREGULAR_PLURALS = {
+    "cookies": "cookie", "brownies": "brownie", "smoothies": "smoothie", "pies": "pie",
+    "veggies": "veggie", "leaves": "leaf", "loaves": "loaf", "knives": "knife", "halves": "half",
+    # "-oes" is only "-o" plural for these; "shoes" and "toes" just drop the "s"
+    "potatoes": "potato", "tomatoes": "tomato", "mangoes": "mango",
 }
 
 
+def _singular(word: str) -> str:
+    if len(word) <= 3 or word in _NOT_PLURAL:
+        return word
+    if word in _IRREGULAR_PLURALS:
+        return _IRREGULAR_PLURALS[word]
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize_name(name: str) -> str:
+    """Case-fold, collapse whitespace and singularize each word: " Tomatoes  " -> "tomato"."""
+    return " ".join(_singular(word) for word in _WHITESPACE.sub(" ", name.casefold()).strip().split(" ") if word)
+
+
+def load_taxonomy(path: str = TAXONOMY_PATH) -> dict:
+    """
+    Load a ``{category: [keyword, ...]}`` taxonomy file into a keyword -> category map.
+
+    Keywords are normalized like item names (``normalize_name``). When a
+    keyword is listed under several categories the first one in file order wins.
+    """
+    with open(path, encoding="utf-8") as f:
+        taxonomy = json.load(f)
+
+    category_map = {}
+    for category, keywords in taxonomy.items():
+        for keyword in keywords:
+            keyword = normalize_name(keyword)
+            if keyword and keyword not in category_map:
+                category_map[keyword] = category
+    return category_map
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over the taxonomy keywords.
+
+    ``match`` scans a name once, so the cost depends on the length of the name
+    and not on the number of keywords. When several keywords occur in the name
+    the winner is picked by:
+
+    1. the longest keyword ("olive oil" beats "oil", "chicken oil" -> "chicken"),
+    2. then the leftmost one ("rice milk" -> "rice").
+
+    Keywords are deduplicated by ``load_taxonomy``, so these two rules never tie.
+    """
+
+    def __init__(self, category_map: dict):
+        self.keywords = list(category_map)
+        self.categories = [category_map[k] for k in self.keywords]
+
+        # goto[state] maps a character to the next state
+        self._goto = [{}]
+        # keyword index that is the best (longest) match ending in this state, or -1
+        self._best = [-1]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._best.append(-1)
+                state = nxt
+            self._best[state] = index
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # A keyword ending here is always longer than any suffix reached
+            # via the failure link, so only inherit when nothing ends here.
+            if self._best[state] == -1:
+                self._best[state] = self._best[self._fail[state]]
+            for char, nxt in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                queue.append(nxt)
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def match(self, text: str):
+        """Return the winning keyword index for ``text`` or ``None``."""
+        goto, fail, best, keywords = self._goto, self._fail, self._best, self.keywords
+        state = 0
+        winner = -1
+        winner_len = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            index = best[state]
+            if index != -1:
+                length = len(keywords[index])
+                # strictly longer only, so on equal length the leftmost match stays
+                if length > winner_len:
+                    winner, winner_len = index, length
+        return winner if winner != -1 else None
+
+    def categorize(self, text: str, default: str = DEFAULT_CATEGORY) -> str:
+        index = self.match(text)
+        return self.categories[index] if index is not None else default
+
+
+class CategoryMemo:
+    """
+    Normalized name -> category: precomputed ``pinned`` entries that are never
+    evicted, in front of a bounded thread-safe LRU of everything else.
+    """
+
+    def __init__(self, maxsize: int, pinned: dict = None):
+        self.pinned = pinned or {}
+        self._cache = TTLCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str):
+        category = self.pinned.get(name)
+        if category is None:
+            category = self._cache.get(name)
+        with self._lock:
+            if category is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return category
+
+    def set(self, name: str, category: str):
+        self._cache.set(name, category)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.pinned) + len(self._cache),
+            "pinned": len(self.pinned),
+            "maxsize": self._cache.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._cache.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+_UNLOADED = object()
+_model = _UNLOADED
+_memo = None
+
+
+def get_matcher() -> KeywordMatcher:
+    """Build the matcher from the taxonomy file on first use."""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = KeywordMatcher(load_taxonomy())
+    return _matcher
+
+
+def _load_model(path: str):
+    if not os.path.exists(f"{path}.npy"):
+        logger.warning(
+            "No category model at %s.npy (python -m scripts.train_category_model); "
+            "names the taxonomy does not know stay %s", path, DEFAULT_CATEGORY,
+        )
+        return None
+    # Imports NumPy, so only on the first keyword miss and never at app start-up.
+    from app.utils.category_model import HashedNgramModel
+
+    return HashedNgramModel.load(path)
+
+
+def get_model():
+    """The fallback classifier, or ``None`` when no model has been trained."""
+    global _model
+    if _model is _UNLOADED:
+        with _matcher_lock:
+            if _model is _UNLOADED:
+                _model = _load_model(MODEL_PATH)
+    return _model
+
+
+def fingerprint(taxonomy_path: str = TAXONOMY_PATH, model_path: str = MODEL_PATH) -> str:
+    """Identifies the taxonomy and model files; precomputed categories are only valid for the same one."""
+    digest = hashlib.sha256()
+    for path in (taxonomy_path, f"{model_path}.json"):
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _load_pinned(matcher: KeywordMatcher, model, path: str = COMMON_CATEGORIES_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        common = json.load(f)
+    if common.get("fingerprint") == fingerprint():
+        return common["categories"]
+    # Written for another taxonomy or model: keep the names, recompute the categories.
+    names = list(common["categories"])
+    return dict(zip(names, categorize_normalized(matcher, model, names)))
+
+
+def _get_memo() -> CategoryMemo:
+    global _memo
+    if _memo is None:
+        matcher, model = get_matcher(), get_model()
+        with _matcher_lock:
+            if _memo is None:
+                _memo = CategoryMemo(CATEGORY_CACHE_SIZE, _load_pinned(matcher, model))
+    return _memo
+
+
+def reload_taxonomy(path: str = TAXONOMY_PATH) -> KeywordMatcher:
+    """Rebuild the matcher from ``path`` and swap it in atomically, with an empty memo."""
+    global _matcher, _memo
+    matcher = KeywordMatcher(load_taxonomy(path))
+    memo = CategoryMemo(CATEGORY_CACHE_SIZE, _load_pinned(matcher, get_model()))
+    with _matcher_lock:
+        # matcher first: a caller that sees the new memo also sees the new matcher
+        _matcher = matcher
+        _memo = memo
+    return matcher
+
+
+def reload_model(path: str = MODEL_PATH):
+    """Load the classifier from ``path`` and swap it in atomically, with an empty memo."""
+    global _model, _memo
+    model = _load_model(path)
+    memo = CategoryMemo(CATEGORY_CACHE_SIZE, _load_pinned(get_matcher(), model))
+    with _matcher_lock:
+        _model = model
+        _memo = memo
+    return model
+
+
+def cache_stats() -> dict:
+    """Memo size and hit rate; does not load the taxonomy or model when nothing was categorized yet."""
+    memo = _memo
+    return (memo or CategoryMemo(CATEGORY_CACHE_SIZE)).stats()
+
+
+def categorize_normalized(matcher: KeywordMatcher, model, names: list) -> list:
+    """Keyword match for each normalized name; misses go to the classifier in one batch."""
+    categories, misses = [], []
+    for position, name in enumerate(names):
+        index = matcher.match(name)
+        categories.append(matcher.categories[index] if index is not None else DEFAULT_CATEGORY)
+        if index is None:
+            misses.append(position)
+    if misses and model is not None:
+        for position, category in zip(misses, model.predict([names[p] for p in misses], default=DEFAULT_CATEGORY)):
+            categories[position] = category
+    return categories
+
+
 def auto_categorize(item_name: str) -> str:
-    name = item_name.lower()
-    for keyword, category in CATEGORY_MAP.items():
-        if keyword in name:
-            return category
-    return "Others"
+    return auto_categorize_many([item_name])[0]
+
+
+def auto_categorize_many(item_names: list) -> list:
+    """
+    Categorize a batch of names. Names are normalized and looked up in the
+    memo first; the rest are categorized together against one snapshot of
+    the matcher and model.
+    """
+    # memo before matcher / model: reloads swap them in the opposite order
+    memo = _get_memo()
+    matcher, model = get_matcher(), get_model()
+    names = [normalize_name(name) for name in item_names]
+    categories = [memo.get(name) for name in names]
+    missing = list(dict.fromkeys(name for name, category in zip(names, categories) if category is None))
+    if missing:
+        computed = dict(zip(missing, categorize_normalized(matcher, model, missing)))
+        for name, category in computed.items():
+            memo.set(name, category)
+        categories = [category or computed[name] for name, category in zip(names, categories)]
+    return categories
@@ -0,0 +1,162 @@
+"""
+Fallback category classifier for names the keyword taxonomy does not know.
+
+A linear (softmax) model over hashed character n-grams: each name is padded
+with spaces and cut into 3- to 5-character n-grams (so short words also
+appear whole), and every n-gram is hashed into one of ``n_features`` weight
+rows. Featurizing and scoring a batch are a handful of NumPy operations
+whatever its size, so bulk imports classify names in one vectorized call.
+
+The artifact is two files next to each other:
+
+* ``<path>.npy``: float32 weights, ``n_features`` rows plus a bias row, one
+  column per category, loaded memory-mapped so start-up does not read it,
+* ``<path>.json``: categories and featurization parameters.
+
+Train one with ``python -m scripts.train_category_model``.
+"""
+import hashlib
+import json
+import re
+
+import numpy as np
+
+FORMAT_VERSION = 1
+DEFAULT_N_FEATURES = 1 << 15
+DEFAULT_NGRAM_RANGE = (3, 5)
+# Below this probability the model abstains and the caller keeps its default category.
+DEFAULT_MIN_CONFIDENCE = 0.5
+
+_WHITESPACE = re.compile(r"\s+")
+_HASH_PRIME = np.uint32(16777619)
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    # spread the low bits of the rolling hash before taking it modulo n_features
+    hashes ^= hashes >> np.uint32(15)
+    hashes *= np.uint32(0x2C1B3C6D)
+    hashes ^= hashes >> np.uint32(12)
+    return hashes
+
+
+def featurize(names: list, n_features: int, ngram_range: tuple = DEFAULT_NGRAM_RANGE) -> tuple:
+    """
+    Sparse rows for ``names`` as ``(columns, row_starts, values)``: row ``i``
+    owns ``columns[row_starts[i]:row_starts[i + 1]]``. Values are
+    ``1 / sqrt(number of features)`` so long and short names score alike.
+
+    The whole batch is hashed at once: names become a matrix of code points
+    and each n-gram length is one rolling hash over its columns.
+    """
+    low, high = ngram_range
+    padded = [f" {_WHITESPACE.sub(' ', name.lower()).strip()} ".ljust(low) for name in names]
+    lengths = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+    width = int(lengths.max())
+    codes = np.array(padded, dtype=f"U{width}").view(np.uint32).reshape(len(padded), width)
+
+    positions = width - low + 1
+    hashes = np.zeros((len(padded), high - low + 1, positions), dtype=np.uint32)
+    valid = np.zeros(hashes.shape, dtype=bool)
+    for slot, n in enumerate(range(low, high + 1)):
+        count = width - n + 1
+        if count <= 0:
+            continue
+        rolling = np.zeros((len(padded), count), dtype=np.uint32)
+        for offset in range(n):
+            rolling = rolling * _HASH_PRIME + codes[:, offset:offset + count]
+        # the n-gram length is part of the hash, so "ab" and "ab\0" differ
+        hashes[:, slot, :count] = _mix(rolling + np.uint32(n))
+        valid[:, slot, :count] = np.arange(count) < (lengths - n + 1)[:, None]
+
+    # row-major order keeps each name's features contiguous
+    columns = (hashes[valid] % np.uint32(n_features)).astype(np.int64)
+    counts = valid.sum(axis=(1, 2))
+    starts = np.zeros(len(padded), dtype=np.int64)
+    np.cumsum(counts[:-1], out=starts[1:])
+    values = np.repeat((counts ** -0.5).astype(np.float32), counts)
+    return columns, starts, values
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+class HashedNgramModel:
+    def __init__(self, weights: np.ndarray, categories: list, ngram_range: tuple = DEFAULT_NGRAM_RANGE,
+                 min_confidence: float = DEFAULT_MIN_CONFIDENCE):
+        # the last row holds the biases
+        self.weights = weights
+        self.categories = list(categories)
+        self.n_features = weights.shape[0] - 1
+        self.ngram_range = tuple(ngram_range)
+        self.min_confidence = min_confidence
+
+    def predict_proba(self, names: list) -> np.ndarray:
+        """``(len(names), len(categories))`` class probabilities."""
+        if not names:
+            return np.empty((0, len(self.categories)), dtype=np.float32)
+        columns, starts, values = featurize(names, self.n_features, self.ngram_range)
+        scores = np.add.reduceat(self.weights[columns] * values[:, None], starts, axis=0)
+        scores += self.weights[-1]
+        return _softmax(scores)
+
+    def predict(self, names: list, default: str = None) -> list:
+        """The most likely category of each name, or ``default`` below ``min_confidence``."""
+        proba = self.predict_proba(names)
+        best = proba.argmax(axis=1)
+        confident = proba[np.arange(len(best)), best] >= self.min_confidence
+        return [self.categories[b] if ok else default for b, ok in zip(best.tolist(), confident.tolist())]
+
+    def save(self, path: str):
+        weights = np.ascontiguousarray(self.weights, dtype=np.float32)
+        np.save(f"{path}.npy", weights)
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "format_version": FORMAT_VERSION,
+                # identifies the weights, so caches of predictions can tell models apart
+                "weights_sha256": hashlib.sha256(weights.tobytes()).hexdigest(),
+                "categories": self.categories,
+                "n_features": self.n_features,
+                "ngram_range": list(self.ngram_range),
+                "min_confidence": self.min_confidence,
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramModel":
+        with open(f"{path}.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported category model format {meta['format_version']}")
+        weights = np.load(f"{path}.npy", mmap_mode="r")
+        if weights.shape != (meta["n_features"] + 1, len(meta["categories"])):
+            raise ValueError(f"Category model weights {weights.shape} do not match {path}.json")
+        return cls(weights, meta["categories"], meta["ngram_range"], meta["min_confidence"])
+
+
+def train(names: list, labels: list, n_features: int = DEFAULT_N_FEATURES, ngram_range: tuple = DEFAULT_NGRAM_RANGE,
+          epochs: int = 200, learning_rate: float = 0.5, l2: float = 1e-4,
+          min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> HashedNgramModel:
+    """Fit softmax regression on ``names`` / ``labels`` with full-batch AdaGrad."""
+    categories = sorted(set(labels))
+    target = np.zeros((len(names), len(categories)), dtype=np.float32)
+    target[np.arange(len(names)), [categories.index(label) for label in labels]] = 1
+
+    columns, starts, values = featurize(names, n_features, ngram_range)
+    rows = np.repeat(np.arange(len(names)), np.diff(np.append(starts, len(columns))))
+    weights = np.zeros((n_features + 1, len(categories)), dtype=np.float32)
+    squared = np.full_like(weights, 1e-8)
+
+    for _ in range(epochs):
+        scores = np.add.reduceat(weights[columns] * values[:, None], starts, axis=0) + weights[-1]
+        error = (_softmax(scores) - target) / len(names)
+        gradient = np.zeros_like(weights)
+        np.add.at(gradient, columns, error[rows] * values[:, None])
+        gradient[-1] = error.sum(axis=0)
+        gradient[:-1] += l2 * weights[:-1]
+        squared += gradient ** 2
+        weights -= learning_rate * gradient / np.sqrt(squared)
+
+    return HashedNgramModel(weights, categories, ngram_range, min_confidence)
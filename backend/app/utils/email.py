@@ -1,62 +1,406 @@
-import logging
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from fastapi import HTTPException, status
+"""
+Outbound email queue.
+
+``send_email`` only queues the message and returns; it never raises because
+of SMTP. Worker threads take messages off the queue in batches of up to
+``MAIL_BATCH_SIZE`` and deliver each batch over one connection from a shared
+``SMTPConnectionPool``. Connections stay open between batches and are
+checked with ``NOOP`` after ``MAIL_CONNECTION_MAX_IDLE_SECONDS`` idle.
+
+Failures:
+
+* transient (connection errors, timeouts, ``4xx`` replies): retried with
+  exponential backoff and jitter, up to ``MAIL_MAX_ATTEMPTS`` deliveries,
+* permanent (``5xx`` replies, refused recipients) or out of attempts: handed
+  to the dead-letter store, by default the ``email_dead_letters`` table
+  (``app.models.email``), so they can be inspected and resent.
+
+Sending is off unless ``MAIL_SERVER`` is set. On AWS Lambda the ``handler``
+in app/main.py calls ``flush_mail`` once at the end of each invocation, since
+a frozen container would hold queued messages until its next one; the
+messages of one request still go out as one batch.
+"""
+import atexit
+import heapq
+import itertools
+import os
+import random
 import smtplib
-from app.shared.dependencies import get_settings
-
-logger = logging.getLogger(__name__)
-settings = get_settings()
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.mail_username,
-    MAIL_PASSWORD=settings.mail_password,
-    MAIL_FROM=settings.mail_from,
-    MAIL_PORT=settings.mail_port,
-    MAIL_SERVER=settings.mail_server,
-    MAIL_FROM_NAME=settings.mail_from_name,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+
+from app.logger import logger
+from app.shared.constants import (
+    MAIL_BATCH_SIZE,
+    MAIL_CONNECTION_MAX_IDLE_SECONDS,
+    MAIL_MAX_ATTEMPTS,
+    MAIL_QUEUE_SIZE,
+    MAIL_RETRY_BACKOFF_MAX_SECONDS,
+    MAIL_RETRY_BACKOFF_SECONDS,
+    MAIL_SMTP_TIMEOUT_SECONDS,
 )
 
-async def send_booking_email(to_email: str, subject: str, body: str):
-    message = MessageSchema(
-        subject=subject,
-        recipients=[to_email],
-        body=body,
-        subtype="html"   # can also be "plain"
+
+def _is_connection_error(exc: Exception) -> bool:
+    # Socket errors and disconnects leave the connection unusable; SMTP error replies
+    # (also OSErrors) do not.
+    return isinstance(exc, smtplib.SMTPServerDisconnected) or (
+        isinstance(exc, OSError) and not isinstance(exc, smtplib.SMTPException)
     )
-    fm = FastMail(conf)
 
+
+class OutboundEmail:
+    __slots__ = ("to", "subject", "html", "text", "attempts", "error")
+
+    def __init__(self, to: str, subject: str, html: str, text: str):
+        self.to = to
+        self.subject = subject
+        self.html = html
+        self.text = text
+        self.attempts = 0
+        self.error = None
+
+
+class SMTPConnectionPool:
+    """Open SMTP connections shared by the sender threads; ``connect()`` makes a new one."""
+
+    def __init__(self, connect, max_idle: float = MAIL_CONNECTION_MAX_IDLE_SECONDS, clock=time.monotonic):
+        self._connect = connect
+        self._max_idle = max_idle
+        self._clock = clock
+        self._idle = []
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def acquire(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                smtp, released_at = self._idle.pop()
+            if self._clock() - released_at < self._max_idle or _is_alive(smtp):
+                return smtp
+            _quit(smtp)
+        smtp = self._connect()
+        with self._lock:
+            self.opened += 1
+        return smtp
+
+    def release(self, smtp: smtplib.SMTP, broken: bool = False):
+        if broken:
+            _quit(smtp)
+            return
+        with self._lock:
+            self._idle.append((smtp, self._clock()))
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for smtp, _ in idle:
+            _quit(smtp)
+
+
+def _is_alive(smtp: smtplib.SMTP) -> bool:
+    try:
+        return smtp.noop()[0] == 250
+    except OSError:
+        return False
+
+
+def _quit(smtp: smtplib.SMTP):
     try:
-        await fm.send_message(message)
-        logger.info(f"📧 Email sent successfully to {to_email} with subject: {subject}")
-        return {"status": "success", "message": f"Email sent to {to_email}"}
-
-    except smtplib.SMTPAuthenticationError as e:
-        logger.error("❌ SMTP authentication failed: %s", str(e))
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Email authentication failed. Please check credentials."
-        )
-
-    except smtplib.SMTPConnectError as e:
-        logger.error("❌ SMTP connection error: %s", str(e))
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Could not connect to the mail server."
-        )
-
-    except smtplib.SMTPRecipientsRefused:
-        logger.warning(f"⚠️ Invalid recipient email: {to_email}")
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid recipient address: {to_email}"
-        )
-
-    except Exception as e:
-        logger.exception("❌ Unexpected error while sending email")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to send email: {str(e)}"
-        )
+        smtp.quit()
+    except OSError:
+        smtp.close()
+
+
+def _is_transient(exc: Exception) -> bool:
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    # other SMTP errors (e.g. SMTPServerDisconnected) and socket errors
+    return isinstance(exc, OSError)
+
+
+class MailQueue:
+    """
+    Bounded queue of ``OutboundEmail`` drained by ``workers`` sender threads,
+    started on the first ``send``. ``dead_letter(messages)`` receives the
+    messages given up on, each with its ``error``.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool, sender: str, dead_letter, workers: int = 2,
+                 batch_size: int = MAIL_BATCH_SIZE, max_attempts: int = MAIL_MAX_ATTEMPTS,
+                 retry_backoff: float = MAIL_RETRY_BACKOFF_SECONDS,
+                 retry_backoff_max: float = MAIL_RETRY_BACKOFF_MAX_SECONDS, maxsize: int = MAIL_QUEUE_SIZE,
+                 clock=time.monotonic):
+        self.pool = pool
+        self.sender = sender
+        self.dead_letter = dead_letter
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.maxsize = maxsize
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._ready = []
+        # (due, sequence, message) of messages waiting for their next attempt
+        self._delayed = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._threads = []
+        self._closing = False
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self.rejected = 0
+        self.batches = 0
+
+    def send(self, message: OutboundEmail) -> bool:
+        """Queue ``message``; ``False`` (and a dead letter) when the queue is full."""
+        with self._cond:
+            if len(self._ready) + len(self._delayed) + self._in_flight >= self.maxsize or self._closing:
+                self.rejected += 1
+                full = True
+            else:
+                full = False
+                self._ready.append(message)
+                if not self._threads:
+                    self._start()
+                self._cond.notify()
+        if full:
+            message.error = "mail queue full"
+            self._give_up([message])
+        return not full
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every queued message was delivered or given up on; ``False`` on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not (self._ready or self._delayed or self._in_flight), timeout)
+
+    def close(self, timeout: float = 10):
+        """
+        Deliver what is queued (within ``timeout``), then stop the threads and
+        close connections. Messages still waiting go to the dead-letter store.
+        """
+        self.flush(timeout)
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self.pool.close()
+        with self._cond:
+            left = self._ready + [message for _, _, message in self._delayed]
+            self._ready, self._delayed = [], []
+        for message in left:
+            message.error = message.error or "not delivered before shutdown"
+        if left:
+            self._give_up(left)
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._ready) + len(self._delayed) + self._in_flight
+        return {
+            "queued": queued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead": self.dead,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "connections": self.pool.opened,
+        }
+
+    def _start(self):
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"mail-sender-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _next_batch(self) -> list:
+        with self._cond:
+            while True:
+                now = self._clock()
+                while self._delayed and self._delayed[0][0] <= now:
+                    self._ready.append(heapq.heappop(self._delayed)[2])
+                if self._ready:
+                    batch, self._ready = self._ready[:self.batch_size], self._ready[self.batch_size:]
+                    self._in_flight += len(batch)
+                    return batch
+                if self._closing:
+                    return []
+                self._cond.wait(self._delayed[0][0] - now if self._delayed else None)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                self._deliver(batch)
+            except Exception:
+                logger.exception("Mail sender failed on a batch of %d", len(batch))
+            finally:
+                with self._cond:
+                    self._in_flight -= len(batch)
+                    self._cond.notify_all()
+
+    def _deliver(self, batch: list):
+        try:
+            smtp = self.pool.acquire()
+        except Exception as exc:
+            self._failed(batch, exc)
+            return
+        failed, broken = [], False
+        for position, message in enumerate(batch):
+            try:
+                smtp.send_message(self._build(message))
+            except Exception as exc:
+                failed.append((message, exc))
+                if _is_connection_error(exc):
+                    # the rest of the batch goes back to the queue without spending an attempt
+                    broken = True
+                    with self._cond:
+                        self._ready[:0] = batch[position + 1:]
+                        self._cond.notify_all()
+                    break
+            else:
+                with self._cond:
+                    self.sent += 1
+        with self._cond:
+            self.batches += 1
+        self.pool.release(smtp, broken=broken)
+        for message, exc in failed:
+            self._failed([message], exc)
+
+    def _failed(self, messages: list, exc: Exception):
+        retry, give_up = [], []
+        for message in messages:
+            message.attempts += 1
+            message.error = f"{type(exc).__name__}: {exc}"
+            (retry if _is_transient(exc) and message.attempts < self.max_attempts else give_up).append(message)
+        if retry:
+            with self._cond:
+                for message in retry:
+                    delay = min(self.retry_backoff * 2 ** (message.attempts - 1), self.retry_backoff_max)
+                    # jitter, so messages that failed together do not retry together
+                    due = self._clock() + random.uniform(delay / 2, delay)
+                    heapq.heappush(self._delayed, (due, next(self._sequence), message))
+                self.retried += len(retry)
+                self._cond.notify_all()
+        if give_up:
+            self._give_up(give_up)
+
+    def _give_up(self, messages: list):
+        with self._cond:
+            self.dead += len(messages)
+        for message in messages:
+            logger.warning("Giving up on email %r to %s after %d attempts: %s",
+                           message.subject, message.to, message.attempts, message.error)
+        try:
+            self.dead_letter(messages)
+        except Exception:
+            logger.exception("Could not store %d dead letters", len(messages))
+
+    def _build(self, message: OutboundEmail) -> EmailMessage:
+        mime = EmailMessage()
+        mime["From"] = self.sender
+        mime["To"] = message.to
+        mime["Subject"] = message.subject
+        mime["Message-ID"] = make_msgid()
+        mime.set_content(message.text)
+        mime.add_alternative(message.html, subtype="html")
+        return mime
+
+
+def smtp_connector(settings):
+    """``connect()`` for the SMTP server in ``settings`` (STARTTLS and login when configured)."""
+    def connect() -> smtplib.SMTP:
+        smtp = smtplib.SMTP(settings.mail_server, settings.mail_port, timeout=MAIL_SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings.mail_starttls:
+                smtp.starttls(context=ssl.create_default_context())
+            if settings.mail_username:
+                smtp.login(settings.mail_username, settings.mail_password)
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+
+    return connect
+
+
+def store_dead_letters(messages: list):
+    from app.db.database import SessionLocal
+    from app.models.email import add_dead_letters
+
+    with SessionLocal() as db:
+        add_dead_letters(db, messages)
+
+
+def build_mail_queue(settings):
+    """The queue configured by ``MAIL_*``, or ``None`` when ``MAIL_SERVER`` is empty."""
+    if not settings.mail_server:
+        return None
+    return MailQueue(
+        SMTPConnectionPool(smtp_connector(settings)),
+        formataddr((settings.mail_from_name, settings.mail_from)),
+        store_dead_letters,
+        workers=settings.mail_workers,
+    )
+
+
+_mail_queue = None
+_mail_queue_lock = threading.Lock()
+_UNSET = object()
+
+
+def get_mail_queue():
+    global _mail_queue
+    if _mail_queue is None:
+        from app.shared.dependencies import get_settings
+
+        with _mail_queue_lock:
+            if _mail_queue is None:
+                _mail_queue = build_mail_queue(get_settings()) or _UNSET
+    return _mail_queue if _mail_queue is not _UNSET else None
+
+
+def send_email(to: str, subject: str, html: str, text: str) -> bool:
+    """Queue a message; ``False`` when sending is not configured or the queue is full."""
+    queue = get_mail_queue()
+    if queue is None:
+        logger.info("Email to %s not sent, MAIL_SERVER is not set: %s", to, subject)
+        return False
+    return queue.send(OutboundEmail(to, subject, html, text))
+
+
+def flush_mail(timeout: float = MAIL_SMTP_TIMEOUT_SECONDS) -> bool:
+    """Wait (up to ``timeout``) for queued messages to be delivered; ``True`` when nothing is left."""
+    queue = _mail_queue
+    if queue is None or queue is _UNSET:
+        return True
+    return queue.flush(timeout)
+
+
+def _reset_after_fork():
+    # The sender threads do not survive fork(); the child builds its own queue.
+    global _mail_queue
+    _mail_queue = None
+
+
+def _close_mail_queue():
+    queue = _mail_queue
+    if queue is not None and queue is not _UNSET:
+        queue.close()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(_close_mail_queue)
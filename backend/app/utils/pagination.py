@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+
+# Range of the item id (SERIAL) and list version (INTEGER) columns cursors point into
+_INTEGER_MAX = 2 ** 31 - 1
+
+
+def _checked_int(value, maximum: int) -> int:
+    # json.loads also yields floats, Infinity / NaN and booleans
+    if type(value) is not int or not -maximum - 1 <= value <= maximum:
+        raise ValueError(value)
+    return value
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Opaque keyset cursor pointing just past the item ``(created_at, item_id)``."""
+    raw = json.dumps([created_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of ``encode_cursor``. Raises ``ValueError`` for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, item_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), _checked_int(item_id, _INTEGER_MAX)
+    except (TypeError, ValueError, OverflowError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_sync_cursor(version: int) -> str:
+    """Opaque delta sync cursor for list version ``version``."""
+    return base64.urlsafe_b64encode(json.dumps(["v", version], separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor: str) -> int:
+    """Inverse of ``encode_sync_cursor``. Raises ``ValueError`` for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        tag, version = json.loads(raw)
+        if tag != "v":
+            raise ValueError(tag)
+        return _checked_int(version, _INTEGER_MAX)
+    except (TypeError, ValueError, OverflowError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
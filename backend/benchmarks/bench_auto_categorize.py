@@ -0,0 +1,69 @@
+"""Compare the old linear keyword scan with the compiled ``KeywordMatcher``.
+
+    python -m benchmarks.bench_auto_categorize
+"""
+import random
+import string
+
+from benchmarks.common import print_table, summarize, timeit
+
+from app.utils.auto_categorize import KeywordMatcher, load_taxonomy
+
+SIZES = (10, 1_000, 50_000)
+NAMES = 2_000
+
+
+def linear_categorize(category_map: dict, name: str) -> str:
+    # The pre-automaton implementation of ``auto_categorize``.
+    name = name.lower()
+    for keyword, category in category_map.items():
+        if keyword in name:
+            return category
+    return "Others"
+
+
+def synthetic_map(size: int, rng: random.Random) -> dict:
+    category_map = dict(load_taxonomy())
+    categories = sorted(set(category_map.values()))
+    while len(category_map) < size:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 12)))
+        category_map.setdefault(word, rng.choice(categories))
+    return dict(list(category_map.items())[:size])
+
+
+def synthetic_names(category_map: dict, rng: random.Random) -> list:
+    keywords = list(category_map)
+    names = []
+    for i in range(NAMES):
+        if i % 2:
+            # half of the names miss, which is the worst case for the linear scan
+            names.append("".join(rng.choices(string.ascii_lowercase + " ", k=rng.randint(5, 25))))
+        else:
+            names.append(f"organic {rng.choice(keywords)} 1kg")
+    return names
+
+
+def main():
+    rng = random.Random(42)
+    rows = []
+    for size in SIZES:
+        category_map = synthetic_map(size, rng)
+        names = synthetic_names(category_map, rng)
+        matcher = KeywordMatcher(category_map)
+
+        linear = timeit(lambda: [linear_categorize(category_map, n) for n in names], repeat=3)
+        compiled = timeit(lambda: [matcher.categorize(n.lower()) for n in names], repeat=3)
+        linear_best, _ = summarize(linear)
+        compiled_best, _ = summarize(compiled)
+        rows.append((
+            size,
+            f"{linear_best / NAMES * 1e6:.2f}",
+            f"{compiled_best / NAMES * 1e6:.2f}",
+            f"{linear_best / compiled_best:.1f}x",
+        ))
+
+    print_table(("keywords", "linear us/name", "automaton us/name", "speedup"), rows)
+
+
+if __name__ == "__main__":
+    main()
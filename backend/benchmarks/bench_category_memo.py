@@ -0,0 +1,49 @@
+"""Memoized ``auto_categorize`` against categorizing every name from scratch.
+
+Names follow a skewed distribution like real lists: a few hundred staples
+("Milk", "milk ", "MILK", "Eggs") make up most adds. Each mode categorizes
+the same stream one name at a time, as ``add_item`` does.
+
+    python -m benchmarks.bench_category_memo
+"""
+import random
+
+from benchmarks.common import print_table, summarize, timeit
+
+from app.utils import auto_categorize as ac
+from scripts.train_category_model import DEFAULT_CSV, read_labels
+
+STREAM = 20_000
+
+
+def name_stream(count: int, rng: random.Random) -> list:
+    names, _ = read_labels(DEFAULT_CSV)
+    variants = (str, str.lower, str.upper, lambda n: f" {n}  ", lambda n: f"{n}s")
+    weights = [1 / (rank + 1) for rank in range(len(names))]
+    return [rng.choice(variants)(rng.choices(names, weights)[0]) for _ in range(count)]
+
+
+def uncached(names: list) -> list:
+    matcher, model = ac.get_matcher(), ac.get_model()
+    return [ac.categorize_normalized(matcher, model, [ac.normalize_name(name)])[0] for name in names]
+
+
+def memoized(names: list) -> list:
+    ac.reload_taxonomy()  # start from an empty memo
+    return [ac.auto_categorize(name) for name in names]
+
+
+def main():
+    names = name_stream(STREAM, random.Random(42))
+    uncached(names[:100])  # load the matcher and model
+    rows = []
+    for label, fn in (("uncached", uncached), ("memoized", memoized)):
+        best, _ = summarize(timeit(fn, names, repeat=3))
+        rows.append((label, STREAM, f"{best / STREAM * 1e6:.2f}", f"{STREAM / best:,.0f}"))
+    print_table(("mode", "names", "us / name", "names / s"), rows)
+    stats = ac.cache_stats()
+    print(f"\nmemo: {stats['size']} entries, hit rate {stats['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Throughput of the fallback category classifier, one name at a time vs batched.
+
+Uses the trained artifact when there is one, otherwise trains a model from
+the bundled CSV into a temporary directory first. Reports the artifact load
+time (memory-mapped) and names per second for single-name calls and for
+batches of increasing size; names are variants of the training names that
+the keyword taxonomy does not match.
+
+    python -m benchmarks.bench_category_model
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import print_table, summarize, timeit
+
+from app.utils.auto_categorize import MODEL_PATH
+from app.utils.category_model import HashedNgramModel, train
+from scripts.train_category_model import DEFAULT_CSV, read_labels
+
+BATCH_SIZES = (1, 100, 1_000, 10_000)
+SINGLE_CALLS = 2_000
+
+
+def model_path(tmpdir: str) -> str:
+    if os.path.exists(f"{MODEL_PATH}.npy"):
+        return MODEL_PATH
+    path = os.path.join(tmpdir, "category_model")
+    train(*read_labels(DEFAULT_CSV)).save(path)
+    return path
+
+
+def synthetic_names(count: int, rng: random.Random) -> list:
+    names, _ = read_labels(DEFAULT_CSV)
+    prefixes = ("", "organic ", "fresh ", "frozen ", "large ", "value ")
+    suffixes = ("", " 500g", " x2", " pack", " 1kg")
+    return [f"{rng.choice(prefixes)}{rng.choice(names)}{rng.choice(suffixes)}" for _ in range(count)]
+
+
+def main():
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = model_path(tmpdir)
+        loads = []
+        for _ in range(20):
+            start = time.perf_counter()
+            model = HashedNgramModel.load(path)
+            loads.append(time.perf_counter() - start)
+        print(f"load {path}: median {statistics.median(loads) * 1000:.2f}ms "
+              f"({model.weights.shape[0] - 1} features x {len(model.categories)} categories, memory-mapped)\n")
+
+        names = synthetic_names(max(BATCH_SIZES), rng)
+        single_best, _ = summarize(timeit(lambda: [model.predict([n]) for n in names[:SINGLE_CALLS]], repeat=3))
+        single_rate = SINGLE_CALLS / single_best
+        rows = [("single", SINGLE_CALLS, f"{single_best / SINGLE_CALLS * 1e6:.1f}", f"{single_rate:,.0f}", "1.0x")]
+        for size in BATCH_SIZES:
+            batch = names[:size]
+            best, _ = summarize(timeit(model.predict, batch, repeat=5))
+            rows.append((f"batch {size}", size, f"{best / size * 1e6:.1f}", f"{size / best:,.0f}",
+                         f"{size / best / single_rate:.1f}x"))
+
+    print_table(("mode", "names", "us / name", "names / s", "vs single"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""How many list-event subscribers one worker can hold.
+
+Each subscriber is an asyncio task waiting on its broker queue, the same
+shape as one open ``GET /api/lists/{list_id}/events`` stream minus the socket.
+For each size we report the memory held per subscriber and how long one
+event takes to reach every subscriber of a list.
+
+    python -m benchmarks.bench_events
+"""
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from benchmarks.common import print_table
+
+from app.shared.events import ListEventBroker
+
+SIZES = (1_000, 10_000, 50_000)
+LISTS = 100
+EVENTS = 20
+
+
+async def run(size: int):
+    broker = ListEventBroker()
+    delivered = 0
+    done = asyncio.Event()
+    expected = size * EVENTS
+
+    async def subscriber(list_id):
+        nonlocal delivered
+        queue = broker.subscribe(list_id)
+        try:
+            while True:
+                await queue.get()
+                delivered += 1
+                if delivered == expected:
+                    done.set()
+        finally:
+            broker.unsubscribe(list_id, queue)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tasks = [asyncio.create_task(subscriber(f"list-{i % LISTS}")) for i in range(size)]
+    await asyncio.sleep(0)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # each round publishes one event to every list, so each subscriber sees EVENTS messages
+    start = time.perf_counter()
+    for n in range(EVENTS):
+        for i in range(LISTS):
+            broker.publish({"type": "item-updated", "list_id": f"list-{i}", "item": {"id": n}})
+        await asyncio.sleep(0)
+    await asyncio.wait_for(done.wait(), timeout=120)
+    elapsed = time.perf_counter() - start
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return (after - before) / size, elapsed / EVENTS, expected / elapsed
+
+
+def main():
+    rows = []
+    for size in SIZES:
+        per_subscriber, per_event, throughput = asyncio.run(run(size))
+        rows.append((
+            size,
+            f"{per_subscriber / 1024:.2f}",
+            f"{size * per_subscriber / 1024 ** 2:.1f}",
+            f"{per_event * 1000:.2f}",
+            f"{throughput:,.0f}",
+        ))
+    print_table(("subscribers", "KiB/subscriber", "MiB total", "ms per event round", "deliveries/s"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Loading a dashboard of N lists: N ``GET /api/items`` calls against one ``GET /api/lists/batch``.
+
+Seeds the largest N lists with ``--items`` items each, starts the app under
+uvicorn, and loads the same dashboard ``--dashboards`` times each way:
+
+* ``separate``: one ``GET /api/items?list_id=`` per list, at most
+  ``--parallel`` in flight (a browser's connections per host),
+* ``batch``: a single ``GET /api/lists/batch?ids=...``.
+
+Reports the time to load the whole dashboard, HTTP requests and SQL
+statements per dashboard (from ``Server-Timing``). ``--list-cache off``
+measures the per-list calls without the rendered list cache.
+
+Needs Postgres (``DB_*`` from ``.env`` / the environment).
+
+    python -m benchmarks.bench_list_batch
+    python -m benchmarks.bench_list_batch --lists 5 20 100 --items 30 --list-cache off
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import Server, percentile, print_table, server_timing_queries
+from benchmarks.suite import seed
+
+import httpx
+
+from app.shared.constants import MAX_BATCH_LISTS
+
+
+def _queries(response) -> int:
+    return server_timing_queries(response.headers) or 0
+
+
+async def load_separate(client, list_ids: list, parallel: int) -> tuple:
+    semaphore = asyncio.Semaphore(parallel)
+
+    async def one(list_id):
+        async with semaphore:
+            response = await client.get("/api/items", params={"list_id": list_id})
+        response.raise_for_status()
+        return _queries(response)
+
+    return len(list_ids), sum(await asyncio.gather(*(one(list_id) for list_id in list_ids)))
+
+
+async def load_batch(client, list_ids: list, parallel: int) -> tuple:
+    response = await client.get("/api/lists/batch", params={"ids": ",".join(list_ids)})
+    response.raise_for_status()
+    assert len(response.json()["lists"]) == len(list_ids)
+    return 1, _queries(response)
+
+
+async def measure(base_url: str, load, list_ids: list, dashboards: int, parallel: int) -> dict:
+    latencies, requests, queries = [], 0, 0
+    limits = httpx.Limits(max_connections=parallel, max_keepalive_connections=parallel)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await load(client, list_ids, parallel)  # warm up (connections, list cache)
+        for _ in range(dashboards):
+            start = time.perf_counter()
+            sent, issued = await load(client, list_ids, parallel)
+            latencies.append(time.perf_counter() - start)
+            requests += sent
+            queries += issued
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "requests": requests / dashboards,
+        "queries": queries / dashboards,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lists", type=int, nargs="+", default=[5, 20, 100], help="lists per dashboard")
+    parser.add_argument("--items", type=int, default=30, help="items per list")
+    parser.add_argument("--dashboards", type=int, default=50, help="dashboard loads per case")
+    parser.add_argument("--parallel", type=int, default=6, help="GET /api/items calls in flight at once")
+    parser.add_argument("--list-cache", default="memory", help="LIST_CACHE_BACKEND of the server (memory / off)")
+    args = parser.parse_args()
+    if max(args.lists) > MAX_BATCH_LISTS:
+        parser.error(f"at most {MAX_BATCH_LISTS} lists per batch")
+
+    list_ids = [list_id for list_id, _, _ in seed(max(args.lists), args.items)]
+    env = {
+        "EVENTS_BACKEND": "postgres",
+        "LOG_LEVEL": "WARNING",
+        "LIST_CACHE_BACKEND": args.list_cache,
+        # one client sends everything; measure the endpoints, not the limits
+        "ADMISSION_MAX_READS": "0",
+        "RATE_LIMIT_PER_SECOND": "0",
+    }
+
+    rows = []
+    with Server(env) as server:
+        for lists in args.lists:
+            separate = asyncio.run(measure(server.url, load_separate, list_ids[:lists], args.dashboards, args.parallel))
+            batch = asyncio.run(measure(server.url, load_batch, list_ids[:lists], args.dashboards, args.parallel))
+            for name, result in (("separate", separate), ("batch", batch)):
+                rows.append((
+                    lists, name, f"{result['p50_ms']:.1f}", f"{result['p95_ms']:.1f}",
+                    f"{result['requests']:.0f}", f"{result['queries']:.0f}",
+                    f"{separate['p50_ms'] / result['p50_ms']:.2f}x",
+                ))
+
+    print(f"{args.items} items per list, list cache {args.list_cache}\n")
+    print_table(("lists", "mode", "p50 ms", "p95 ms", "requests", "SQL", "vs separate"), rows)
+
+
+if __name__ == "__main__":
+    main()
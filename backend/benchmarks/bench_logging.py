@@ -0,0 +1,116 @@
+"""Event-loop blocking caused by request logging, synchronous vs queued.
+
+Drives ``GET /`` in-process (``httpx.ASGITransport``, no database) at a fixed
+concurrency while a probe task measures how late the event loop wakes it
+from a 1 ms sleep. The log stream is a sink whose ``write`` blocks for
+``--write-delay-ms``, standing in for a stderr pipe that a log collector
+drains slowly. Modes:
+
+* ``sync``: the handler writes from the calling thread (the event loop), as
+  before the queued logging,
+* ``queue``: ``QueueHandler`` / ``QueueListener``, text format,
+* ``queue-json``: the same with JSON output,
+* ``sampled``: queued, keeping 1% of successful request lines.
+
+    python -m benchmarks.bench_logging
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import percentile, print_table
+
+import httpx
+
+from app.config import get_settings
+from app.logger import configure_logging
+from app.main import app
+from app.middleware import RequestTimingMiddleware
+
+MODES = {
+    "sync": dict(use_queue=False, log_format="text", log_sample_rate=1.0),
+    "queue": dict(use_queue=True, log_format="text", log_sample_rate=1.0),
+    "queue-json": dict(use_queue=True, log_format="json", log_sample_rate=1.0),
+    "sampled": dict(use_queue=True, log_format="json", log_sample_rate=0.01),
+}
+
+
+class SlowSink:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lines = 0
+
+    def write(self, text: str):
+        self.lines += text.count("\n")
+        if self.delay:
+            time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+async def probe_lag(stop: asyncio.Event, samples: list, interval: float = 0.001):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def drive(requests: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    lag, stop = [], asyncio.Event()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                await client.get("/")
+                # an in-process transport never waits on a socket; yield like real I/O would
+                await asyncio.sleep(0)
+
+        prober = asyncio.create_task(probe_lag(stop, lag))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await prober
+    return lag, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--write-delay-ms", type=float, default=0.2, help="time each write to the log sink blocks")
+    args = parser.parse_args()
+
+    rows = []
+    for mode, options in MODES.items():
+        settings = get_settings().model_copy(update={
+            "log_level": "INFO",
+            "log_format": options["log_format"],
+            "log_sample_rate": options["log_sample_rate"],
+        })
+        sink = SlowSink(args.write_delay_ms / 1000)
+        configure_logging(settings, stream=sink, use_queue=options["use_queue"])
+        # rebuild the middleware stack so the timing middleware picks up the sampling settings
+        for middleware in app.user_middleware:
+            if middleware.cls is RequestTimingMiddleware:
+                middleware.kwargs["settings"] = settings
+        app.middleware_stack = None
+        lag, elapsed = asyncio.run(drive(args.requests, args.concurrency))
+        configure_logging(settings, stream=sink, use_queue=False)  # drains the queue
+        rows.append((
+            mode,
+            f"{args.requests / elapsed:,.0f}",
+            f"{percentile(lag, 50) * 1000:.2f}",
+            f"{percentile(lag, 99) * 1000:.2f}",
+            f"{max(lag) * 1000:.2f}",
+            sink.lines,
+        ))
+
+    print_table(("mode", "req/s", "loop lag p50 ms", "loop lag p99 ms", "loop lag max ms", "lines written"), rows)
+
+
+if __name__ == "__main__":
+    main()
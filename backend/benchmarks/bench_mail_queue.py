@@ -0,0 +1,158 @@
+"""Outbound email throughput against a local SMTP sink.
+
+Starts an in-process SMTP server that accepts and discards every message
+(with an optional per-command latency, like a remote relay) and compares:
+
+* ``inline``: a new SMTP connection per message, sent in the caller (what
+  ``send_booking_email`` used to do),
+* ``queue``: ``MailQueue`` with pooled connections and batching, at several
+  worker counts; throughput counts until ``flush()`` returns.
+
+A last run makes the sink answer ``451`` to a share of messages to show the
+retries, and template rendering is timed cached against uncached.
+
+    python -m benchmarks.bench_mail_queue
+    python -m benchmarks.bench_mail_queue --messages 2000 --latency-ms 5
+"""
+import argparse
+import random
+import smtplib
+import socketserver
+import threading
+import time
+
+from benchmarks.common import print_table, summarize, timeit
+
+from app.utils.email import MailQueue, OutboundEmail, SMTPConnectionPool
+from app.utils.email_template import load_template, render_email
+
+SENDER = "Smart Shopping List <lists@example.com>"
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 sink ready")
+        for raw in self.rfile:
+            command = raw.decode("latin-1").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 sink")
+            elif command.startswith("DATA"):
+                self.reply("354 go ahead")
+                for line in self.rfile:
+                    if line in (b".\r\n", b".\n"):
+                        break
+                if random.random() < self.server.fail_rate:
+                    self.reply("451 try again later")
+                else:
+                    self.server.delivered += 1
+                    self.reply("250 queued")
+            elif command.startswith("QUIT"):
+                self.reply("221 bye")
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.reply("250 ok")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """SMTP server on 127.0.0.1 that accepts and drops every message."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.delivered = 0
+        self.connections = 0
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def messages(count: int) -> list:
+    subject, html, text = render_email("list_invite", inviter="Sam", list_name="Weekend", share_url="https://x/share/1")
+    return [OutboundEmail(f"user{n}@example.com", subject, html, text) for n in range(count)]
+
+
+def connector(sink: SMTPSink):
+    return lambda: smtplib.SMTP(*sink.server_address, timeout=10)
+
+
+def run_inline(sink: SMTPSink, count: int) -> dict:
+    start = time.perf_counter()
+    for message in messages(count):
+        with connector(sink)() as smtp:
+            smtp.send_message(MailQueue(None, SENDER, None)._build(message))
+    return {"elapsed": time.perf_counter() - start, "enqueue": None}
+
+
+def run_queue(sink: SMTPSink, count: int, workers: int, retry_backoff: float = 0.01) -> dict:
+    dead = []
+    queue = MailQueue(SMTPConnectionPool(connector(sink)), SENDER, dead.extend, workers=workers,
+                      retry_backoff=retry_backoff, retry_backoff_max=0.1)
+    batch = messages(count)
+    start = time.perf_counter()
+    for message in batch:
+        queue.send(message)
+    enqueued = time.perf_counter() - start
+    queue.flush()
+    elapsed = time.perf_counter() - start
+    queue.close()
+    return {"elapsed": elapsed, "enqueue": enqueued / count, "stats": queue.stats(), "dead": len(dead)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="sink delay per SMTP reply")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    rows = []
+    with SMTPSink(latency) as sink:
+        inline_count = min(args.messages, 200)
+        result = run_inline(sink, inline_count)
+        rows.append(("inline", inline_count, f"{inline_count / result['elapsed']:,.0f}", "-", inline_count, "-", "-"))
+        for workers in args.workers:
+            result = run_queue(sink, args.messages, workers)
+            stats = result["stats"]
+            rows.append((f"queue x{workers}", args.messages, f"{args.messages / result['elapsed']:,.0f}",
+                         f"{result['enqueue'] * 1e6:.1f}", stats["connections"], stats["batches"], stats["retried"]))
+    with SMTPSink(latency, fail_rate=0.2) as sink:
+        result = run_queue(sink, args.messages, 2)
+        stats = result["stats"]
+        rows.append(("queue x2, 20% 451", args.messages, f"{stats['sent'] / result['elapsed']:,.0f}",
+                     f"{result['enqueue'] * 1e6:.1f}", stats["connections"], stats["batches"], stats["retried"]))
+        print(f"with 20% transient failures: {stats['sent']} sent, {stats['retried']} retries, {result['dead']} dead letters")
+
+    print(f"sink latency {args.latency_ms}ms per reply\n")
+    print_table(("mode", "messages", "msgs / s", "enqueue us", "connections", "batches", "retries"), rows)
+
+    values = dict(inviter="Sam", list_name="Weekend", share_url="https://x/share/1")
+    cached, _ = summarize(timeit(lambda: [render_email("list_invite", **values) for _ in range(1000)], repeat=5))
+
+    def uncached():
+        for _ in range(1000):
+            load_template.cache_clear()
+            render_email("list_invite", **values)
+
+    rebuilt, _ = summarize(timeit(uncached, repeat=5))
+    print(f"\nrender_email: {cached * 1000:.1f}us cached, {rebuilt * 1000:.1f}us reading and compiling the template each time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare the two ways of rendering ``GET /api/items``.
+
+* ``pydantic``: load ORM objects, validate them through ``list[GroceryOut]``
+  and dump them the way FastAPI renders a ``response_model`` (``dump_python``
+  in JSON mode, then ``JSONResponse``'s ``json.dumps``).
+* ``fast``: select the ``GroceryOut`` columns as rows and render them with
+  ``app.shared.serialization`` (orjson).
+
+Lists are seeded in the database configured in ``.env`` / the environment.
+"total" includes the query; "serialize" is the rendering step alone. The script
+also checks that both paths produce the same bytes.
+
+    python -m benchmarks.bench_serialization
+"""
+import json
+
+from benchmarks.common import print_table, summarize, timeit
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.db.database import Base, SessionLocal, engine
+from app.models import items as models
+from app.schemas.items import GroceryCreate, GroceryOut
+from app.shared.serialization import render_items
+
+SIZES = (100, 1_000, 10_000)
+
+adapter = TypeAdapter(list[GroceryOut])
+
+
+def seed(size: int) -> str:
+    with SessionLocal() as db:
+        shopping_list = models.create_list(db, f"serialization {size}")
+        list_id = shopping_list.id
+        for start in range(0, size, 500):
+            models.add_items(db, [
+                GroceryCreate(name=f"item {i}", quantity=i % 7 + 1, list_id=list_id)
+                for i in range(start, min(start + 500, size))
+            ])
+        return list_id
+
+
+def load_orm(db, list_id):
+    return db.scalars(
+        select(models.GroceryItem)
+        .where(models.GroceryItem.list_id == list_id)
+        .order_by(models.GroceryItem.created_at.desc(), models.GroceryItem.id.desc())
+    ).all()
+
+
+def render_pydantic(items) -> bytes:
+    content = adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def main():
+    Base.metadata.create_all(engine)
+    rows = []
+    with SessionLocal() as db:
+        for size in SIZES:
+            list_id = seed(size)
+            orm_items = load_orm(db, list_id)
+            item_rows = models.get_items(db, list_id)
+            identical = render_pydantic(orm_items) == render_items(item_rows)
+            db.expunge_all()
+
+            repeat = 5 if size >= 10_000 else 20
+            slow_total = summarize(timeit(lambda: (render_pydantic(load_orm(db, list_id)), db.expunge_all()), repeat=repeat))
+            fast_total = summarize(timeit(lambda: render_items(models.get_items(db, list_id)), repeat=repeat))
+            slow_render = summarize(timeit(render_pydantic, orm_items, repeat=repeat))
+            fast_render = summarize(timeit(render_items, item_rows, repeat=repeat))
+            rows.append((
+                size,
+                f"{slow_total[1] * 1000:.2f}",
+                f"{fast_total[1] * 1000:.2f}",
+                f"{slow_render[1] * 1000:.2f}",
+                f"{fast_render[1] * 1000:.2f}",
+                f"{slow_total[1] / fast_total[1]:.1f}x",
+                "yes" if identical else "NO",
+            ))
+
+    print_table(
+        ("items", "pydantic total ms", "fast total ms", "pydantic serialize ms", "fast serialize ms", "speedup", "same bytes"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
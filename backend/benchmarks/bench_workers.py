@@ -0,0 +1,88 @@
+"""Throughput of the production server (gunicorn.conf.py) from 1 to N workers.
+
+Starts gunicorn with ``WEB_CONCURRENCY`` set to each worker count in turn and
+drives it from as many client processes, so the load generator scales with
+the server. Scenarios:
+
+* ``root``: ``GET /``, framework and event loop only,
+* ``load-items``: ``GET /api/items?list_id=`` on a seeded list (database and
+  list cache).
+
+Needs Postgres (``DB_*`` from ``.env`` / the environment) for the seeded list.
+On a machine with fewer cores than workers, extra workers only add contention;
+the table shows where that starts.
+
+    python -m benchmarks.bench_workers
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --requests 4000
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import Server, hammer, percentile, print_table
+from benchmarks.suite import seed
+
+import httpx
+
+GUNICORN_CONF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+def _client(base_url: str, url: str, requests: int, concurrency: int) -> tuple:
+    async def run():
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            return await hammer(client, "GET", url, requests, concurrency)
+
+    return asyncio.run(run())
+
+
+def measure(pool: ProcessPoolExecutor, base_url: str, url: str, requests: int, clients: int, concurrency: int) -> dict:
+    start = time.perf_counter()
+    futures = [pool.submit(_client, base_url, url, requests // clients, concurrency) for _ in range(clients)]
+    latencies, errors = [], 0
+    for future in futures:
+        client_latencies, _, client_errors = future.result()
+        latencies += client_latencies
+        errors += client_errors
+    elapsed = time.perf_counter() - start
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts (default: 1, 2, 4, ... up to the cores)")
+    parser.add_argument("--requests", type=int, default=4000, help="requests per scenario and worker count")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight per client process")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    counts = args.workers or sorted({1, cpus, *(2 ** n for n in range(1, 8) if 2 ** n < cpus)})
+    list_id = seed(1, 100)[0][0]
+    scenarios = {"root": "/", "load-items": f"/api/items?list_id={list_id}"}
+
+    rows, baseline = [], {}
+    with ProcessPoolExecutor(max(counts)) as pool:
+        for workers in counts:
+            env = {"WEB_CONCURRENCY": str(workers), "EVENTS_BACKEND": "postgres", "LOG_LEVEL": "WARNING",
+                   "RATE_LIMIT_PER_SECOND": "0"}
+            with Server(env, args=["--config", GUNICORN_CONF], gunicorn=True) as server:
+                for name, url in scenarios.items():
+                    measure(pool, server.url, url, min(args.requests, 200 * workers), workers, args.concurrency)  # warm up
+                    result = measure(pool, server.url, url, args.requests, workers, args.concurrency)
+                    baseline.setdefault(name, result["rps"])
+                    rows.append((name, workers, f"{result['rps']:,.0f}", f"{result['rps'] / baseline[name]:.2f}x",
+                                 f"{result['p50_ms']:.1f}", f"{result['p99_ms']:.1f}", result["errors"]))
+
+    print(f"{cpus} cores\n")
+    print_table(("scenario", "workers", "req/s", "vs 1 worker", "p50 ms", "p99 ms", "errors"), sorted(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Cold-start budget for the Lambda ``handler``.
+
+Each run starts a fresh interpreter, the way a new Lambda container does,
+and measures:
+
+* ``import``: ``import app.main`` (the Lambda init phase),
+* ``first``: the first ``handler`` invocation with a synthetic API Gateway
+  HTTP API (payload v2) event,
+* ``second``: a warm invocation, for comparison.
+
+It also prints the slowest imports from ``python -X importtime``. The script
+exits non-zero when the median of import + first response exceeds the budget,
+so CI can track it.
+
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --path "/api/items?list_id=<uuid>"   # includes the DB connect
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import BENCH_ENV, print_table
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLD_START_BUDGET_MS = 1500
+
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+from app.main import handler
+imported = time.perf_counter()
+
+path, _, query = sys.argv[1].partition("?")
+event = {
+    "version": "2.0",
+    "routeKey": "$default",
+    "rawPath": path,
+    "rawQueryString": query,
+    "headers": {"host": "bench.lambda-url.local", "user-agent": "cold-start-bench"},
+    "requestContext": {
+        "accountId": "123456789012",
+        "apiId": "bench",
+        "domainName": "bench.lambda-url.local",
+        "http": {"method": "GET", "path": path, "protocol": "HTTP/1.1",
+                 "sourceIp": "127.0.0.1", "userAgent": "cold-start-bench"},
+        "requestId": "bench",
+        "routeKey": "$default",
+        "stage": "$default",
+        "timeEpoch": 0,
+    },
+    "isBase64Encoded": False,
+}
+response = handler(event, None)
+first = time.perf_counter()
+handler(event, None)
+second = time.perf_counter()
+print(json.dumps({
+    "status": response["statusCode"],
+    "import": (imported - start) * 1000,
+    "first": (first - imported) * 1000,
+    "second": (second - first) * 1000,
+}))
+"""
+
+
+def child_env() -> dict:
+    env = {**BENCH_ENV, **os.environ}
+    env.setdefault("AWS_LAMBDA_FUNCTION_NAME", "cold-start-bench")
+    return env
+
+
+def probe(path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE, path],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int) -> list:
+    stderr = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, module = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        # only top-level packages and our own modules, nested imports are already in their parent's total
+        name = module.strip()
+        if "." not in name or name.startswith("app."):
+            rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/", help="path (and query) of the synthetic request")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=COLD_START_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to list")
+    args = parser.parse_args()
+
+    results = [probe(args.path) for _ in range(args.runs)]
+    statuses = {result["status"] for result in results}
+    medians = {key: statistics.median(r[key] for r in results) for key in ("import", "first", "second")}
+    total = medians["import"] + medians["first"]
+
+    print_table(
+        ("module", "cumulative ms", "self ms"),
+        [(name, f"{cum / 1000:.1f}", f"{own / 1000:.1f}") for cum, own, name in slowest_imports(args.top)],
+    )
+    print()
+    print_table(
+        ("path", "status", "import ms", "first ms", "cold total ms", "warm ms", "budget ms"),
+        [(args.path, ",".join(map(str, sorted(statuses))), f"{medians['import']:.1f}", f"{medians['first']:.1f}",
+          f"{total:.1f}", f"{medians['second']:.1f}", f"{args.budget_ms:.0f}")],
+    )
+    if total > args.budget_ms:
+        print(f"\ncold start {total:.1f}ms is over the {args.budget_ms:.0f}ms budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Shared helpers for the benchmark scripts.
+
+Run every benchmark from the ``backend`` directory, e.g.::
+
+    python -m benchmarks.bench_auto_categorize
+"""
+import os
+import re
+import statistics
+import time
+
+# Importing anything under ``app`` loads ``Settings``; give it harmless defaults
+# so benchmarks that never touch the database can run without a ``.env`` file.
+BENCH_ENV = {
+    "DB_ENGINE": "postgresql",
+    "DB_PORT": "5432",
+    "DB_HOST": "localhost",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+    "DB_NAME": "smart_shopping_list",
+    "API_KEY": "bench",
+}
+for _key, _value in BENCH_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+
+# The ``db`` entry of a ``Server-Timing`` header (app/shared/timing.py): ``db;dur=1.2;desc="3 queries"``
+_SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def server_timing_queries(headers):
+    """SQL statements a response reports in its ``Server-Timing`` header, or ``None`` without one."""
+    match = _SERVER_TIMING_QUERIES.search(headers.get("server-timing", ""))
+    return int(match.group(1)) if match else None
+
+
+def timeit(fn, *args, repeat: int = 5, number: int = 1):
+    """Run ``fn(*args)`` ``number`` times per round and return per-call seconds for each round."""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(*args)
+        rounds.append((time.perf_counter() - start) / number)
+    return rounds
+
+
+def summarize(samples):
+    """Return ``(best, median)`` of a list of timings."""
+    return min(samples), statistics.median(samples)
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (``pct`` in 0-100)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def free_port() -> int:
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """
+    Run ``app.main:app`` under uvicorn in a subprocess with extra environment
+    variables; ``gunicorn=True`` runs the production server (gunicorn.conf.py) instead.
+    """
+
+    def __init__(self, env: dict = None, args: list = None, port: int = None, gunicorn: bool = False):
+        self.env = {**os.environ, **(env or {})}
+        self.args = args or []
+        self.gunicorn = gunicorn
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process = None
+
+    def __enter__(self):
+        import subprocess
+        import sys
+
+        import httpx
+
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if self.gunicorn:
+            command = ["gunicorn", "app.main:app", "--bind", f"127.0.0.1:{self.port}"]
+        else:
+            command = ["uvicorn", "app.main:app", "--port", str(self.port)]
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", *command, "--log-level", "warning", *self.args],
+            cwd=backend_dir,
+            env=self.env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                httpx.get(self.url + "/", timeout=1)
+                return self
+            except httpx.HTTPError:
+                if self.process.poll() is not None:
+                    raise RuntimeError("server exited during startup")
+                time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise RuntimeError("server did not start")
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+async def hammer(client, method: str, url: str, requests: int, concurrency: int, **kwargs):
+    """Issue ``requests`` calls with at most ``concurrency`` in flight; return (latencies, elapsed, errors)."""
+    import asyncio
+
+    import httpx
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, time.perf_counter() - start, errors
@@ -0,0 +1,99 @@
+"""Load test of the threadpool (sync) and AsyncSession (async) database paths.
+
+Starts the app twice against the database configured in ``.env`` / the
+environment, once with ``DB_ASYNC=false`` and once with ``DB_ASYNC=true``,
+and drives ``GET /api/items`` at concurrency levels below and above the
+threadpool's 40-thread limit. The default pool of 90 connections fits
+Postgres' default ``max_connections`` of 100. "peak active" is the highest number of
+non-idle client backends seen in ``pg_stat_activity`` during the run, i.e.
+how many requests were really talking to Postgres at once.
+
+    python -m benchmarks.load_async_db
+"""
+import argparse
+import asyncio
+import threading
+
+from benchmarks.common import Server, hammer, percentile, print_table
+
+import httpx
+from sqlalchemy import text
+
+from app.db.database import Base, SessionLocal, engine
+from app.models import items as models
+from app.schemas.items import GroceryCreate
+
+CONCURRENCY = (10, 40, 80)
+
+
+def seed(size: int) -> str:
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        shopping_list = models.create_list(db, "load test")
+        models.add_items(db, [GroceryCreate(name=f"item {i}", list_id=shopping_list.id) for i in range(size)])
+        return str(shopping_list.id)
+
+
+class ActivitySampler(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        with engine.connect() as conn:
+            while not self.stopped.is_set():
+                active = conn.execute(text(
+                    "SELECT count(*) FROM pg_stat_activity "
+                    "WHERE backend_type = 'client backend' AND state <> 'idle' AND pid <> pg_backend_pid()"
+                )).scalar()
+                self.peak = max(self.peak, active)
+                self.stopped.wait(0.005)
+
+
+async def drive(url: str, list_id: str, requests: int, concurrency: int):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        return await hammer(client, "GET", "/api/items", requests, concurrency, params={"list_id": list_id})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50, help="items in the polled list")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    # The pool must cover the highest concurrency: with the sync path, requests that
+    # already hold a connection need a threadpool slot to serialize their response,
+    # so a pool smaller than the in-flight request count deadlocks until pool_timeout.
+    parser.add_argument("--pool-size", type=int, default=90, help="DB_POOL_SIZE for both runs")
+    args = parser.parse_args()
+
+    list_id = seed(args.items)
+    # admission control off: this measures how far each path scales, not where it sheds
+    env = {"DB_POOL_SIZE": str(args.pool_size), "DB_MAX_OVERFLOW": "0", "EVENTS_BACKEND": "memory",
+           "ADMISSION_MAX_READS": "0", "ADMISSION_MAX_POOL_WAIT_MS": "0", "RATE_LIMIT_PER_SECOND": "0"}
+
+    rows = []
+    for mode in ("sync", "async"):
+        with Server({**env, "DB_ASYNC": str(mode == "async").lower()}) as server:
+            asyncio.run(drive(server.url, list_id, 100, 10))  # warm up pools
+            for concurrency in CONCURRENCY:
+                sampler = ActivitySampler()
+                sampler.start()
+                latencies, elapsed, errors = asyncio.run(drive(server.url, list_id, args.requests, concurrency))
+                sampler.stopped.set()
+                sampler.join()
+                rows.append((
+                    mode,
+                    concurrency,
+                    f"{args.requests / elapsed:,.0f}",
+                    f"{percentile(latencies, 50) * 1000:.1f}",
+                    f"{percentile(latencies, 95) * 1000:.1f}",
+                    sampler.peak,
+                    errors,
+                ))
+
+    print_table(("mode", "concurrency", "req/s", "p50 ms", "p95 ms", "peak active", "errors"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Load and latency suite for the items API.
+
+Starts ``app.main:app`` under uvicorn against Postgres, seeds lists, and runs
+the scenarios the app sees in production:
+
+* ``poll-shared-list``: conditional ``GET /api/list/{share_code}`` (mostly 304),
+* ``load-shared-list``: the same without ``If-None-Match``,
+* ``load-items``: unconditional ``GET /api/items?list_id=`` (the list cache),
+* ``toggle-burst``: ``PUT /api/items/{id}`` flipping ``bought`` on random items,
+* ``toggle-batch``: ``PATCH /api/items/batch`` with 20 toggles per request,
+* ``bulk-add``: ``POST /api/items/bulk`` with 50 items per request,
+* ``cold-handler``: fresh interpreters invoking the Mangum ``handler`` once
+  (import + first ``GET /api/items``), see ``benchmarks.cold_start``.
+
+Each scenario reports p50/p95/p99 latency, throughput, errors and SQL
+statements per request (read from the ``Server-Timing`` header). Results are
+written as JSON so runs on different commits can be compared with
+``--compare``.
+
+    python -m benchmarks.suite                                 # DB_* from .env / the environment
+    python -m benchmarks.suite --postgres pgserver             # disposable local cluster (pip install pgserver)
+    python -m benchmarks.suite --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from benchmarks.common import Server, percentile, print_table, server_timing_queries
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@contextmanager
+def disposable_postgres():
+    """A throwaway cluster in a temporary directory, reachable over its Unix socket."""
+    import pgserver
+
+    with tempfile.TemporaryDirectory(prefix="bench-pg-") as pgdata:
+        server = pgserver.get_server(pgdata, cleanup_mode="stop")
+        try:
+            socket_dir = re.search(r"host=([^&]+)", server.get_uri()).group(1)
+            yield {"DB_HOST": socket_dir, "DB_PORT": "5432", "DB_USER": "postgres", "DB_PASSWORD": "", "DB_NAME": "postgres"}
+        finally:
+            server.cleanup()
+
+
+@contextmanager
+def environment_postgres():
+    yield {}
+
+
+def seed(lists: int, list_size: int) -> list:
+    """Create ``lists`` lists of ``list_size`` items; returns ``[(list_id, share_code, [item ids])]``."""
+    from app.db.database import Base, SessionLocal, get_engine
+    from app.models import items as models
+    from app.schemas.items import GroceryCreate
+
+    Base.metadata.create_all(get_engine())
+    seeded = []
+    with SessionLocal() as db:
+        for n in range(lists):
+            shopping_list = models.create_list(db, f"bench {n}")
+            list_id, share_code = shopping_list.id, shopping_list.share_code
+            created = []
+            for start in range(0, list_size, 500):
+                created += models.add_items(db, [
+                    GroceryCreate(name=f"item {i}", list_id=list_id) for i in range(start, min(start + 500, list_size))
+                ])
+            seeded.append((str(list_id), share_code, [item.id for item in created]))
+    return seeded
+
+
+async def run_requests(base_url: str, make_request, requests: int, concurrency: int) -> dict:
+    """Send ``requests`` requests built by ``make_request(i)`` with at most ``concurrency`` in flight."""
+    latencies, queries = [], []
+    errors = transport_errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def one(i):
+            nonlocal errors, transport_errors
+            method, url, kwargs = make_request(i)
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    errors += 1
+                    transport_errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            issued = server_timing_queries(response.headers)
+            if issued is not None:
+                queries.append(issued)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(latencies, errors, requests / elapsed, queries, transport_errors)
+
+
+def summarize(latencies: list, errors: int, throughput, queries: list, transport_errors: int = 0) -> dict:
+    """``errors`` counts every failed request, ``transport_errors`` those that got no response (and no latency)."""
+    return {
+        "requests": len(latencies) + transport_errors,
+        "errors": errors,
+        "throughput_rps": round(throughput, 1) if throughput is not None else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def http_scenarios(seeded: list, args) -> dict:
+    rng = random.Random(args.seed)
+    etags = {}
+
+    def poll(i, conditional=True):
+        _, share_code, _ = rng.choice(seeded)
+        headers = {"If-None-Match": etags[share_code]} if conditional and share_code in etags else {}
+        return "GET", f"/api/list/{share_code}", {"headers": headers}
+
+    def load_items(i):
+        list_id, _, _ = rng.choice(seeded)
+        return "GET", f"/api/items?list_id={list_id}", {}
+
+    def toggle(i):
+        _, _, item_ids = rng.choice(seeded)
+        return "PUT", f"/api/items/{rng.choice(item_ids)}", {"json": {"bought": rng.random() < 0.5}}
+
+    def toggle_batch(i):
+        _, _, item_ids = rng.choice(seeded)
+        changes = [{"id": item_id, "bought": rng.random() < 0.5} for item_id in rng.sample(item_ids, min(20, len(item_ids)))]
+        return "PATCH", "/api/items/batch", {"json": changes}
+
+    def bulk_add(i):
+        list_id, _, _ = rng.choice(seeded)
+        return "POST", "/api/items/bulk", {"json": [{"name": f"bulk {i}-{n}", "list_id": list_id} for n in range(50)]}
+
+    scenarios = {
+        "load-shared-list": lambda i: poll(i, conditional=False),
+        "poll-shared-list": poll,
+        "load-items": load_items,
+        "toggle-burst": toggle,
+        "toggle-batch": toggle_batch,
+        "bulk-add": bulk_add,
+    }
+    results = {}
+    with Server(server_env(args)) as server:
+        for _, share_code, _ in seeded:
+            etags[share_code] = httpx.get(f"{server.url}/api/list/{share_code}").headers["etag"]
+        for name, make_request in scenarios.items():
+            requests = args.requests // 5 if name == "bulk-add" else args.requests
+            asyncio.run(run_requests(server.url, make_request, min(requests, 50), args.concurrency))  # warm up
+            results[name] = asyncio.run(run_requests(server.url, make_request, requests, args.concurrency))
+            if name in ("toggle-burst", "toggle-batch"):
+                # writes moved the versions on; keep the polls conditional on current ETags
+                for _, share_code, _ in seeded:
+                    etags[share_code] = httpx.get(f"{server.url}/api/list/{share_code}").headers["etag"]
+    return results
+
+
+def cold_handler(list_id: str, runs: int) -> dict:
+    from benchmarks.cold_start import probe
+
+    totals = [(lambda r: r["import"] + r["first"])(probe(f"/api/items?list_id={list_id}")) / 1000 for _ in range(runs)]
+    return summarize(totals, 0, None, [])
+
+
+def server_env(args) -> dict:
+    return {
+        "EVENTS_BACKEND": "postgres",
+        "LOG_LEVEL": "WARNING",
+        "DB_POOL_SIZE": str(args.concurrency),
+        "DB_MAX_OVERFLOW": "0",
+        "DB_ASYNC": str(args.db_async).lower(),
+        # one client sends everything; measure capacity, not the per-client limit
+        "RATE_LIMIT_PER_SECOND": "0",
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = []
+    for name, result in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        rows.append((
+            name,
+            f"{before['p95_ms']:.1f} -> {result['p95_ms']:.1f}",
+            f"{result['p95_ms'] / before['p95_ms'] - 1:+.0%}" if before["p95_ms"] else "n/a",
+            f"{before['throughput_rps'] or 0:,.0f} -> {result['throughput_rps'] or 0:,.0f}",
+            f"{before['queries_per_request']} -> {result['queries_per_request']}",
+        ))
+    print(f"\ncompared with {baseline_path} ({baseline['meta']['commit']})")
+    print_table(("scenario", "p95 ms", "p95 change", "req/s", "queries/request"), rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--postgres", choices=("env", "pgserver"), default="env")
+    parser.add_argument("--lists", type=int, default=20, help="number of seeded lists")
+    parser.add_argument("--list-size", type=int, default=100, help="items per seeded list")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per HTTP scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--db-async", action="store_true", help="run the server with DB_ASYNC=true")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    args = parser.parse_args()
+
+    database = disposable_postgres if args.postgres == "pgserver" else environment_postgres
+    with database() as db_env:
+        os.environ.update(db_env)
+        seeded = seed(args.lists, args.list_size)
+        scenarios = http_scenarios(seeded, args)
+        scenarios["cold-handler"] = cold_handler(seeded[0][0], args.cold_runs)
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print_table(
+        ("scenario", "requests", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms", "queries/request"),
+        [
+            (name, r["requests"], r["errors"], r["throughput_rps"] if r["throughput_rps"] is not None else "-",
+             r["p50_ms"], r["p95_ms"], r["p99_ms"], r["queries_per_request"] if r["queries_per_request"] is not None else "-")
+            for name, r in scenarios.items()
+        ],
+    )
+    print(f"\nwrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
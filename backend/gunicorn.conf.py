@@ -0,0 +1,72 @@
+"""
+Production server: gunicorn managing uvicorn worker processes.
+
+    gunicorn app.main:app            # picks up this file from the working directory
+    python run.py --prod             # the same
+
+The app is imported once in the master (``preload_app``) and the workers are
+forked from it, sharing its memory copy-on-write. Pooled database
+connections and the log listener thread are not inherited: the fork hooks in
+app/db/database.py and app/logger.py dispose the engines and start a new
+listener in each worker. Workers use uvloop and httptools when they are
+installed (``uvicorn[standard]``), and asyncio / h11 otherwise.
+
+Signals to the master:
+
+* ``HUP``: reload this file and replace the workers gracefully (new ones
+  start before old ones stop taking requests),
+* ``TTIN`` / ``TTOU``: one worker more / less,
+* ``TERM``: graceful shutdown, in-flight requests get ``GRACEFUL_TIMEOUT``.
+
+Environment:
+
+* ``WEB_CONCURRENCY``: worker processes (default: one per available core),
+* ``BIND``: address (default ``0.0.0.0:80``),
+* ``MAX_REQUESTS``: recycle a worker after this many requests, 0 to never
+  (default 10000, spread by ``MAX_REQUESTS_JITTER`` so they do not all
+  restart at once),
+* ``GRACEFUL_TIMEOUT``: seconds a stopping worker gets to finish (default 30).
+"""
+import math
+import os
+
+
+def available_cpus() -> int:
+    """Cores this process may run on: its CPU affinity, capped by a cgroup v2 CPU quota (containers)."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+bind = os.environ.get("BIND", "0.0.0.0:80")
+# Async workers: one per core keeps every core busy without context switching between processes.
+workers = int(os.environ.get("WEB_CONCURRENCY") or available_cpus())
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+max_requests = int(os.environ.get("MAX_REQUESTS", 10_000))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", max_requests // 10))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", 30))
+# Workers that stop answering the master's heartbeat for this long are killed and replaced.
+timeout = 60
+keepalive = 5
+
+# Requests are logged by the app (app/middleware.py), not by gunicorn.
+accesslog = None
+errorlog = "-"
+
+
+def when_ready(server):
+    # Build the category matcher and map the classifier before forking, so
+    # workers share them instead of each loading its own copy.
+    from app.utils.auto_categorize import get_matcher, get_model
+
+    get_matcher()
+    get_model()
+    server.log.info("Forking %d workers (max_requests=%d)", workers, max_requests)
@@ -1,4 +1,13 @@
+import argparse
+import os
+import sys
+
 import uvicorn
 
 if __name__ =='__main__':
-    uvicorn.run('app:app', host='0.0.0.0', port=8003, reload=True, workers=1)
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--prod', action='store_true', help='multi-worker server configured by gunicorn.conf.py')
+    args = parser.parse_args()
+    if args.prod:
+        os.execv(sys.executable, [sys.executable, '-m', 'gunicorn', 'app.main:app'])
+    uvicorn.run('app:app', host='0.0.0.0', port=8003, reload=True, workers=1)
@@ -0,0 +1,78 @@
+"""Precompute the categories of the most common item names.
+
+Names are read from the database (the ``--top`` most frequent normalized
+names across all lists) or from a text file with one name per line, then
+categorized once and written to ``--out``, by default where
+``auto_categorize`` loads its pinned memo entries from. The file records a
+fingerprint of the taxonomy and model it was computed with; when either
+changes the app keeps the names but recomputes their categories at load.
+
+    python -m scripts.precompute_categories
+    python -m scripts.precompute_categories --names names.txt --top 5000
+"""
+import argparse
+import json
+import time
+from collections import Counter
+
+from app.utils.auto_categorize import (
+    COMMON_CATEGORIES_PATH,
+    categorize_normalized,
+    fingerprint,
+    get_matcher,
+    get_model,
+    normalize_name,
+)
+
+DEFAULT_TOP = 10_000
+
+
+def names_from_db(top: int) -> list:
+    from sqlalchemy import func, select
+
+    from app.db.database import SessionLocal
+    from app.models.items import GroceryItem
+
+    # Grouped by the raw name; plural and case variants are merged after normalizing.
+    stmt = (
+        select(GroceryItem.name, func.count().label("uses"))
+        .group_by(GroceryItem.name)
+        .order_by(func.count().desc())
+        .limit(top * 4)
+    )
+    with SessionLocal() as db:
+        rows = db.execute(stmt).all()
+    return _most_common(((name, uses) for name, uses in rows), top)
+
+
+def names_from_file(path: str, top: int) -> list:
+    with open(path, encoding="utf-8") as f:
+        return _most_common(((line, 1) for line in f), top)
+
+
+def _most_common(counted, top: int) -> list:
+    counts = Counter()
+    for name, uses in counted:
+        name = normalize_name(name)
+        if name:
+            counts[name] += uses
+    return [name for name, _ in counts.most_common(top)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", help="text file with one name per line instead of the database")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="number of names to precompute")
+    parser.add_argument("--out", default=COMMON_CATEGORIES_PATH)
+    args = parser.parse_args()
+
+    names = names_from_file(args.names, args.top) if args.names else names_from_db(args.top)
+    start = time.perf_counter()
+    categories = categorize_normalized(get_matcher(), get_model(), names)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint(), "categories": dict(zip(names, categories))}, f, indent=1)
+    print(f"categorized {len(names)} names in {time.perf_counter() - start:.2f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Train the fallback category classifier from a labeled CSV.
+
+The CSV needs ``name`` and ``category`` columns; names are normalized the way
+``auto_categorize`` normalizes them before classifying. A share of the rows is held
+out to report accuracy (and coverage at the confidence threshold) before the
+model is refit on all rows and written to ``--out`` (``<out>.npy`` and
+``<out>.json``), by default where ``auto_categorize`` looks for it.
+
+    python -m scripts.train_category_model
+    python -m scripts.train_category_model --csv ~/labels.csv --n-features 65536
+"""
+import argparse
+import csv
+import os
+import random
+import time
+
+import numpy as np
+
+from app.utils.auto_categorize import MODEL_PATH, normalize_name
+from app.utils.category_model import (
+    DEFAULT_MIN_CONFIDENCE,
+    DEFAULT_N_FEATURES,
+    train,
+)
+
+DEFAULT_CSV = os.path.join(os.path.dirname(MODEL_PATH), "item_categories.csv")
+
+
+def read_labels(path: str) -> tuple:
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [(row["name"].strip(), row["category"].strip()) for row in csv.DictReader(f)]
+    rows = [(name, category) for name, category in rows if name and category]
+    return [name for name, _ in rows], [category for _, category in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--out", default=MODEL_PATH, help="artifact path without extension")
+    parser.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES)
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--min-confidence", type=float, default=DEFAULT_MIN_CONFIDENCE)
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of rows held out for evaluation")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    names, labels = read_labels(args.csv)
+    names = [normalize_name(name) for name in names]
+    options = dict(n_features=args.n_features, epochs=args.epochs, min_confidence=args.min_confidence)
+
+    order = list(range(len(names)))
+    random.Random(args.seed).shuffle(order)
+    cut = int(len(order) * (1 - args.holdout))
+    if 0 < cut < len(order):
+        train_idx, test_idx = order[:cut], order[cut:]
+        model = train([names[i] for i in train_idx], [labels[i] for i in train_idx], **options)
+        test_names, test_labels = [names[i] for i in test_idx], np.array([labels[i] for i in test_idx])
+        predicted = np.array(model.predict(test_names), dtype=object)
+        answered = predicted != None  # noqa: E711  (element-wise)
+        accuracy = (predicted[answered] == test_labels[answered]).mean() if answered.any() else 0.0
+        print(f"holdout: {len(test_idx)} names, {answered.mean():.0%} answered, {accuracy:.1%} of those correct")
+
+    start = time.perf_counter()
+    model = train(names, labels, **options)
+    model.save(args.out)
+    print(f"trained on {len(names)} names, {len(model.categories)} categories in "
+          f"{time.perf_counter() - start:.1f}s -> {args.out}.npy / {args.out}.json")
+
+
+if __name__ == "__main__":
+    main()
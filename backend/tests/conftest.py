@@ -0,0 +1,56 @@
+"""
+Shared fixtures.
+
+Unit tests need nothing else. Tests that take ``database`` or ``client`` run
+against the Postgres configured in ``DB_*`` (``.env`` / the environment) and
+are skipped when it cannot be reached.
+"""
+import os
+
+import pytest
+
+# Importing anything under ``app`` loads ``Settings``; give it defaults so
+# unit tests run without a ``.env`` file.
+TEST_ENV = {
+    "DB_ENGINE": "postgresql",
+    "DB_PORT": "5432",
+    "DB_HOST": "localhost",
+    "DB_USER": "postgres",
+    "DB_PASSWORD": "postgres",
+    "DB_NAME": "smart_shopping_list",
+    "API_KEY": "test",
+    # the test client is one client sending everything
+    "RATE_LIMIT_PER_SECOND": "0",
+}
+for _key, _value in TEST_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+
+@pytest.fixture(scope="session")
+def database():
+    """The sync engine, with every table created; skips the test without Postgres."""
+    from sqlalchemy.exc import DBAPIError
+
+    import app.models.email  # noqa: F401  (register the tables)
+    import app.models.idempotency  # noqa: F401
+    import app.models.items  # noqa: F401
+    from app.db.database import Base, get_engine
+
+    engine = get_engine()
+    try:
+        with engine.connect():
+            pass
+    except DBAPIError as exc:
+        pytest.skip(f"Postgres is not available: {exc.orig}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,167 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from app.config import get_settings
+from app.middleware import AdmissionMiddleware
+from app.shared.admission import AdmissionController, RateLimiter, client_key, retry_after
+from app.shared.metrics import RequestMetrics
+
+API_KEY = b"secret"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_burst_then_refill():
+    clock = Clock()
+    limiter = RateLimiter(2, 3, clock=clock)
+    assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    assert limiter.acquire("b") == 0  # buckets are per key
+    clock.now += 0.5
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+
+
+def test_controller_sheds_reads_and_writes_separately():
+    controller = AdmissionController(max_reads=1, max_writes=1, max_pool_wait=0)
+    assert controller.admit("GET") is None
+    assert controller.admit("GET") == "reads"
+    assert controller.admit("POST") is None
+    assert controller.admit("DELETE") == "writes"
+    controller.release("GET")
+    assert controller.admit("HEAD") is None
+
+
+def test_controller_sheds_on_pool_wait():
+    wait = [0.0]
+    controller = AdmissionController(0, 0, max_pool_wait=0.1, pool_wait=lambda: wait[0])
+    assert controller.admit("GET") is None
+    wait[0] = 0.5
+    assert controller.admit("GET") == "pool_wait"
+    assert controller.reads == 1
+
+
+def scope(path, method="GET", query=b"", **headers):
+    return {
+        "path": path,
+        "method": method,
+        "query_string": query,
+        "headers": [(name.replace("_", "-").encode(), value) for name, value in headers.items()],
+    }
+
+
+def test_client_key():
+    assert client_key(scope("/api/items", x_api_key=API_KEY), API_KEY) == "key"
+    assert client_key(scope("/api/list/abc123")) == "share:abc123"
+    assert client_key(scope("/api/items", query=b"list_id=x&limit=3")) == "list:x"
+    assert client_key(scope("/api/items/7", method="PUT")) == "item:7"
+    assert client_key(scope("/api/items/7", method="DELETE")) == "item:7"
+    # lists only in the body: not keyed (see the module docstring)
+    assert client_key(scope("/api/items/bulk", method="POST")) is None
+    assert client_key(scope("/api/items/batch", method="PATCH")) is None
+
+
+def test_client_key_ignores_unknown_api_keys():
+    # a made-up key falls through to the list, so it cannot open a fresh bucket
+    assert client_key(scope("/api/items", query=b"list_id=x", x_api_key=b"guess"), API_KEY) == "list:x"
+    assert client_key(scope("/api/items", query=b"list_id=x", x_api_key=API_KEY)) == "list:x"
+    assert client_key(scope("/api/items", x_api_key=b"")) is None
+
+
+def test_retry_after_rounds_up():
+    assert retry_after(0.01) == "1"
+    assert retry_after(2.2) == "3"
+
+
+def middleware(app, **overrides):
+    settings = get_settings().model_copy(update={
+        "admission_max_reads": 0,
+        "admission_max_writes": 0,
+        "admission_max_pool_wait_ms": 0,
+        "rate_limit_per_second": 0,
+        "rate_limit_burst": 1,
+        "api_key": API_KEY.decode(),
+        **overrides,
+    })
+    metrics = RequestMetrics()
+    return AdmissionMiddleware(app, metrics=metrics, settings=settings, pool_wait=lambda: 0.0), metrics
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_rate_limit_answers_429_with_retry_after():
+    app, metrics = middleware(ok_app, rate_limit_per_second=1, rate_limit_burst=2)
+
+    async def scenario():
+        async with client(app) as http:
+            return [await http.get("/api/items", params={"list_id": "a"}) for _ in range(3)]
+
+    responses = asyncio.run(scenario())
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[2].headers["retry-after"] == "1"
+    assert responses[2].json()["status"] == 429
+    assert "http_requests_throttled_total 1" in metrics.render()
+
+
+def test_random_api_keys_do_not_bypass_the_limit():
+    app, _ = middleware(ok_app, rate_limit_per_second=1, rate_limit_burst=2)
+
+    async def scenario():
+        async with client(app) as http:
+            return [
+                (await http.get("/api/items", params={"list_id": "a"}, headers={"x-api-key": uuid.uuid4().hex})).status_code
+                for _ in range(3)
+            ]
+
+    assert asyncio.run(scenario()) == [200, 200, 429]
+
+
+def test_item_writes_are_rate_limited():
+    app, _ = middleware(ok_app, rate_limit_per_second=1, rate_limit_burst=1)
+
+    async def scenario():
+        async with client(app) as http:
+            return [(await http.put("/api/items/5", json={})).status_code, (await http.delete("/api/items/5")).status_code]
+
+    assert asyncio.run(scenario()) == [200, 429]
+
+
+def test_concurrency_sheds_with_503():
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await ok_app(scope, receive, send)
+
+    app, metrics = middleware(slow_app, admission_max_writes=1)
+
+    async def scenario():
+        async with client(app) as http:
+            first = asyncio.create_task(http.post("/api/items", json={}))
+            await asyncio.sleep(0.01)
+            shed = await http.post("/api/items", json={})
+            read = asyncio.create_task(http.get("/api/items"))  # reads are counted apart
+            await asyncio.sleep(0.01)
+            release.set()
+            return await first, shed, await read, await http.post("/api/items", json={})
+
+    first, shed, read, after = asyncio.run(scenario())
+    assert first.status_code == 200 and read.status_code == 200 and after.status_code == 200
+    assert shed.status_code == 503 and shed.headers["retry-after"] == "1"
+    assert 'http_requests_shed_total{reason="writes"} 1' in metrics.render()
@@ -0,0 +1,64 @@
+import pytest
+
+from app.utils.auto_categorize import KeywordMatcher, load_taxonomy, normalize_name
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Tomatoes", "tomato"),
+    ("potatoes", "potato"),
+    ("MANGOES", "mango"),
+    ("shoes", "shoe"),
+    ("toes", "toe"),
+    ("eggs", "egg"),
+    ("berries", "berry"),
+    ("peaches", "peach"),
+    ("dishes", "dish"),
+    ("boxes", "box"),
+    ("glasses", "glass"),
+    ("cookies", "cookie"),
+    ("loaves", "loaf"),
+    ("hummus", "hummus"),
+    ("asparagus", "asparagus"),
+    ("swiss", "swiss"),
+    ("peas", "pea"),
+    ("  Chicken   Breasts ", "chicken breast"),
+    ("Green\tBeans", "green bean"),
+])
+def test_normalize_name(name, expected):
+    assert normalize_name(name) == expected
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher({
+        normalize_name(keyword): category
+        for keyword, category in {
+            "milk": "Dairy", "egg": "Dairy", "olive oil": "Grocery", "oil": "Grocery", "chicken": "Meat",
+            "rice": "Grains", "tomatoes": "Vegetables", "potato": "Vegetables", "shoe": "Household",
+        }.items()
+    })
+
+
+@pytest.mark.parametrize("name, category", [
+    ("Eggs", "Dairy"),
+    ("brown eggs", "Dairy"),
+    ("tomato", "Vegetables"),
+    ("Cherry Tomatoes", "Vegetables"),
+    ("potatoes", "Vegetables"),
+    ("sweet potatoes", "Vegetables"),
+    ("shoes", "Household"),
+    ("Extra Virgin Olive Oil", "Grocery"),
+    ("chicken oil", "Meat"),
+    ("rice milk", "Grains"),
+    ("chicken breasts", "Meat"),
+    ("bananas", "Others"),
+])
+def test_keyword_matcher_plural_and_multi_word(matcher, name, category):
+    assert matcher.categorize(normalize_name(name)) == category
+
+
+def test_shipped_taxonomy():
+    matcher = KeywordMatcher(load_taxonomy())
+    for name, category in [("Eggs", "Dairy"), ("Free Range Eggs", "Dairy"), ("Potatoes", "Vegetables"),
+                           ("mangoes", "Fruits"), ("roma tomatoes", "Vegetables"), ("whole milk", "Dairy")]:
+        assert matcher.categorize(normalize_name(name)) == category, name
@@ -0,0 +1,78 @@
+import pytest
+
+
+@pytest.fixture
+def shopping_list(client):
+    list_id = client.post("/api/list").json()["id"]
+    items = [client.post("/api/items", json={"name": name, "list_id": list_id}).json() for name in ("milk", "bread")]
+    return list_id, items
+
+
+def etag(client, list_id):
+    return client.get("/api/items", params={"list_id": list_id}).headers["etag"]
+
+
+def patch(client, changes):
+    response = client.patch("/api/items/batch", json=changes)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_updates_and_recategorizes(client, shopping_list):
+    _, (milk, bread) = shopping_list
+    result = patch(client, [{"id": milk["id"], "bought": True}, {"id": bread["id"], "name": "apples", "quantity": 4}])
+    assert result["errors"] == []
+    updated = {item["id"]: item for item in result["updated"]}
+    assert updated[milk["id"]]["bought"] is True and updated[milk["id"]]["name"] == "milk"
+    assert updated[bread["id"]]["name"] == "apples" and updated[bread["id"]]["quantity"] == 4
+    assert updated[bread["id"]]["category"] == "Fruits"
+
+
+def test_repeated_ids_are_merged_last_write_wins(client, shopping_list):
+    list_id, (milk, _) = shopping_list
+    result = patch(client, [
+        {"id": milk["id"], "bought": True, "name": "oat milk"},
+        {"id": milk["id"], "bought": False, "quantity": 3},
+    ])
+    assert result["errors"] == [] and len(result["updated"]) == 1
+    item = result["updated"][0]
+    assert (item["name"], item["bought"], item["quantity"]) == ("oat milk", False, 3)
+    stored = {item["id"]: item for item in client.get("/api/items", params={"list_id": list_id}).json()}
+    assert stored[milk["id"]]["bought"] is False
+
+
+def test_unknown_ids_and_invalid_entries_are_reported(client, shopping_list):
+    _, (milk, _) = shopping_list
+    result = patch(client, [{"id": 0, "bought": True}, {"id": milk["id"], "quantity": 2}, {"bought": True}])
+    assert [item["id"] for item in result["updated"]] == [milk["id"]]
+    assert [error["index"] for error in result["errors"]] == [0, 2]
+    assert result["errors"][0]["message"] == "Item 0 not found"
+
+
+def test_empty_batch(client, shopping_list):
+    list_id, _ = shopping_list
+    before = etag(client, list_id)
+    assert patch(client, []) == {"updated": [], "errors": []}
+    assert etag(client, list_id) == before
+
+
+def test_writes_nothing_leaves_the_version(client, shopping_list):
+    list_id, (milk, _) = shopping_list
+    before = etag(client, list_id)
+    result = patch(client, [{"id": 0, "bought": True}])
+    assert result["updated"] == [] and len(result["errors"]) == 1
+    # an entry without fields is a read: the current row comes back
+    result = patch(client, [{"id": milk["id"]}])
+    assert result["errors"] == [] and result["updated"][0]["id"] == milk["id"]
+    assert etag(client, list_id) == before
+
+
+def test_batch_spanning_lists(client, shopping_list):
+    list_a, (milk, _) = shopping_list
+    list_b = client.post("/api/list").json()["id"]
+    eggs = client.post("/api/items", json={"name": "eggs", "list_id": list_b}).json()
+    before = etag(client, list_a), etag(client, list_b)
+    result = patch(client, [{"id": milk["id"], "bought": True}, {"id": eggs["id"], "bought": True}])
+    assert {(item["id"], item["list_id"]) for item in result["updated"]} == {(milk["id"], list_a), (eggs["id"], list_b)}
+    after = etag(client, list_a), etag(client, list_b)
+    assert after[0] != before[0] and after[1] != before[1]
@@ -0,0 +1,57 @@
+import uuid
+
+from app.shared.constants import MAX_BULK_ITEMS
+
+
+def test_returns_created_items_in_request_order(client):
+    list_id = client.post("/api/list").json()["id"]
+    names = ["milk", "apples", "bread", "chicken"]
+    response = client.post("/api/items/bulk", json=[{"name": name, "list_id": list_id} for name in names])
+    assert response.status_code == 200, response.text
+    created = response.json()["created"]
+    assert [item["name"] for item in created] == names
+    ids = [item["id"] for item in created]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+    # each item is categorised on its own
+    assert [item["category"] for item in created] == ["Dairy", "Fruits", "Bakery", "Meat"]
+    stored = client.get("/api/items", params={"list_id": list_id}).json()
+    assert {item["id"]: item["category"] for item in stored} == {item["id"]: item["category"] for item in created}
+
+
+def test_unknown_list_is_reported_per_entry(client):
+    list_id = client.post("/api/list").json()["id"]
+    missing = str(uuid.uuid4())
+    response = client.post("/api/items/bulk", json=[
+        {"name": "milk", "list_id": missing},
+        {"name": "bread", "list_id": list_id},
+        {"name": "eggs", "list_id": missing},
+    ])
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert [item["name"] for item in result["created"]] == ["bread"]
+    assert [(error["index"], error["message"]) for error in result["errors"]] == [
+        (0, f"List {missing} not found"), (2, f"List {missing} not found"),
+    ]
+
+
+def test_unknown_list_only(client):
+    missing = str(uuid.uuid4())
+    result = client.post("/api/items/bulk", json=[{"name": "milk", "list_id": missing}]).json()
+    assert result["created"] == []
+    assert [error["index"] for error in result["errors"]] == [0]
+
+
+def test_invalid_entries_are_reported_with_their_index(client):
+    list_id = client.post("/api/list").json()["id"]
+    result = client.post("/api/items/bulk", json=[{"list_id": list_id}, {"name": "milk", "list_id": list_id}]).json()
+    assert [item["name"] for item in result["created"]] == ["milk"]
+    assert [error["index"] for error in result["errors"]] == [0]
+
+
+def test_size_limit(client):
+    list_id = client.post("/api/list").json()["id"]
+    entries = [{"name": f"item {index}", "list_id": list_id} for index in range(MAX_BULK_ITEMS + 1)]
+    response = client.post("/api/items/bulk", json=entries)
+    assert response.status_code == 400
+    assert client.get("/api/items", params={"list_id": list_id}).json() == []
+    assert client.post("/api/items/bulk", json=entries[:MAX_BULK_ITEMS]).status_code == 200
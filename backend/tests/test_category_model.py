@@ -0,0 +1,106 @@
+import json
+import logging
+
+import numpy as np
+import pytest
+
+from app.utils import auto_categorize
+from app.utils.category_model import FORMAT_VERSION, HashedNgramModel, featurize, train
+
+NAMES = ["milk", "whole milk", "cheddar cheese", "greek yogurt", "apple", "green apple", "banana", "ripe banana"]
+LABELS = ["Dairy", "Dairy", "Dairy", "Dairy", "Fruits", "Fruits", "Fruits", "Fruits"]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return train(NAMES, LABELS, n_features=1 << 10, epochs=100)
+
+
+def row(features, i):
+    columns, starts, values = features
+    end = starts[i + 1] if i + 1 < len(starts) else len(columns)
+    return columns[starts[i]:end], values[starts[i]:end]
+
+
+def test_featurize_rows():
+    features = featurize(["milk", "a", "Whole   MILK"], n_features=64)
+    columns, starts, values = features
+    assert starts.tolist()[0] == 0 and len(starts) == 3
+    assert columns.min() >= 0 and columns.max() < 64
+    for i in range(3):
+        _, row_values = row(features, i)
+        # each row is L2-normalized
+        assert np.isclose(np.sum(row_values ** 2), 1.0)
+    # " milk " has 4 trigrams, 3 4-grams and 2 5-grams
+    assert len(row(features, 0)[0]) == 9
+    # names shorter than the smallest n-gram still get a feature
+    assert len(row(features, 1)[0]) == 1
+
+
+def test_featurize_normalizes_case_and_whitespace():
+    a, b = featurize(["whole milk", " Whole\tMILK "], n_features=1 << 15)[0].reshape(2, -1)
+    assert a.tolist() == b.tolist()
+
+
+def test_featurize_is_deterministic_per_batch():
+    alone = row(featurize(["banana"], n_features=1 << 15), 0)[0]
+    batched = row(featurize(["kiwi", "banana", "cheddar cheese"], n_features=1 << 15), 1)[0]
+    assert alone.tolist() == batched.tolist()
+
+
+def test_predict(model):
+    assert model.categories == ["Dairy", "Fruits"]
+    assert model.predict(["milk", "banana", "apples"]) == ["Dairy", "Fruits", "Fruits"]
+    proba = model.predict_proba(["milk", "banana"])
+    assert proba.shape == (2, 2) and np.allclose(proba.sum(axis=1), 1.0)
+    assert model.predict_proba([]).shape == (0, 2)
+    assert model.predict([]) == []
+
+
+def test_predict_abstains_below_min_confidence(model):
+    unsure = HashedNgramModel(model.weights, model.categories, model.ngram_range, min_confidence=1.0)
+    assert unsure.predict(["milk", "banana"], default="Others") == ["Others", "Others"]
+
+
+def test_save_load_round_trip(model, tmp_path):
+    path = str(tmp_path / "model")
+    model.save(path)
+    loaded = HashedNgramModel.load(path)
+    assert loaded.categories == model.categories
+    assert loaded.n_features == model.n_features and loaded.ngram_range == model.ngram_range
+    assert loaded.min_confidence == model.min_confidence
+    assert isinstance(loaded.weights, np.memmap)
+    names = ["skim milk", "bananas", "gouda"]
+    assert np.allclose(loaded.predict_proba(names), model.predict_proba(names))
+    with open(f"{path}.json", encoding="utf-8") as f:
+        assert len(json.load(f)["weights_sha256"]) == 64
+
+
+def test_load_rejects_other_formats(model, tmp_path):
+    path = str(tmp_path / "model")
+    model.save(path)
+    with open(f"{path}.json", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    with open(f"{path}.json", "w", encoding="utf-8") as f:
+        json.dump(dict(meta, format_version=FORMAT_VERSION + 1), f)
+    with pytest.raises(ValueError, match="format"):
+        HashedNgramModel.load(path)
+
+    with open(f"{path}.json", "w", encoding="utf-8") as f:
+        json.dump(dict(meta, n_features=meta["n_features"] * 2), f)
+    with pytest.raises(ValueError, match="do not match"):
+        HashedNgramModel.load(path)
+
+
+def test_missing_model_is_logged(tmp_path):
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    auto_categorize.logger.addHandler(handler)
+    try:
+        assert auto_categorize._load_model(str(tmp_path / "missing")) is None
+    finally:
+        auto_categorize.logger.removeHandler(handler)
+    assert [record.levelno for record in records] == [logging.WARNING]
+    assert "train_category_model" in records[0].getMessage()
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+import pytest
+from starlette.requests import Request
+
+from app.routers.items import _is_not_modified
+
+UPDATED_AT = datetime(2025, 10, 20, 10, 0, 0, 500_000, tzinfo=timezone.utc)
+
+
+def request(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.mark.parametrize("value", [
+    "Mon, 20 Oct 2025 10:00:00 GMT",
+    "Mon, 20 Oct 2025 10:00:00 +0000",
+    "Mon, 20 Oct 2025 10:00:00 -0000",
+    "Mon, 20 Oct 2025 12:00:00 +0200",
+])
+def test_if_modified_since_not_modified(value):
+    assert _is_not_modified(request(if_modified_since=value), 3, UPDATED_AT)
+
+
+@pytest.mark.parametrize("value", ["Mon, 20 Oct 2025 09:59:59 GMT", "Mon, 20 Oct 2025 09:59:59 -0000"])
+def test_if_modified_since_modified(value):
+    assert not _is_not_modified(request(if_modified_since=value), 3, UPDATED_AT)
+
+
+@pytest.mark.parametrize("value", ["yesterday", "", "Mon, 20 Oct", "Mon, 99 Oct 2025 10:00:00 GMT"])
+def test_if_modified_since_unparseable_is_ignored(value):
+    assert not _is_not_modified(request(if_modified_since=value), 3, UPDATED_AT)
+
+
+def test_naive_updated_at_is_utc():
+    assert _is_not_modified(request(if_modified_since="Mon, 20 Oct 2025 10:00:00 -0000"), 3, UPDATED_AT.replace(tzinfo=None))
+
+
+def test_if_none_match_wins_over_if_modified_since():
+    headers = dict(if_none_match='"2"', if_modified_since="Mon, 20 Oct 2025 10:00:00 GMT")
+    assert not _is_not_modified(request(**headers), 3, UPDATED_AT)
+    assert _is_not_modified(request(if_none_match='W/"3", "4"'), 3, UPDATED_AT)
+    assert _is_not_modified(request(if_none_match="*"), 3, UPDATED_AT)
+
+
+def test_get_items_if_modified_since_minus_zero(client):
+    list_id = client.post("/api/list").json()["id"]
+    response = client.get("/api/items", params={"list_id": list_id},
+                          headers={"If-Modified-Since": "Mon, 20 Oct 2025 10:00:00 -0000"})
+    assert response.status_code == 200
+    response = client.get("/api/items", params={"list_id": list_id},
+                          headers={"If-Modified-Since": response.headers["last-modified"].replace("GMT", "-0000")})
+    assert response.status_code == 304
@@ -0,0 +1,191 @@
+import asyncio
+import smtplib
+import threading
+
+import pytest
+
+from app.utils import email
+from app.utils.email import MailQueue, OutboundEmail, SMTPConnectionPool, flush_mail, send_email
+
+TRANSIENT = smtplib.SMTPResponseException(451, b"try again later")
+PERMANENT = smtplib.SMTPResponseException(550, b"no such mailbox")
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def message(n: int = 0) -> OutboundEmail:
+    return OutboundEmail(f"user{n}@example.com", "Your list", "<p>hi</p>", "hi")
+
+
+def retry_queue(dead: list, **kwargs) -> MailQueue:
+    options = dict(retry_backoff=2, retry_backoff_max=10, max_attempts=5, clock=Clock())
+    return MailQueue(None, "lists@example.com", dead.extend, **dict(options, **kwargs))
+
+
+def next_delay(queue: MailQueue) -> float:
+    """Seconds until the one delayed message is due; takes it off the retry heap."""
+    due, _, _ = queue._delayed.pop()
+    return due - queue._clock()
+
+
+@pytest.mark.parametrize("jitter, delays", [
+    (lambda low, high: high, [2, 4, 8, 10]),  # doubled each attempt, capped at retry_backoff_max
+    (lambda low, high: low, [1, 2, 4, 5]),  # jitter never goes below half the delay
+])
+def test_retry_backoff_schedule(monkeypatch, jitter, delays):
+    monkeypatch.setattr(email.random, "uniform", jitter)
+    dead = []
+    queue = retry_queue(dead)
+    queued = message()
+    seen = []
+    for _ in range(4):
+        queue._failed([queued], TRANSIENT)
+        seen.append(next_delay(queue))
+        queue._clock.now += 100
+    assert seen == delays
+    assert queue.retried == 4 and not dead
+
+    # the fifth failed delivery is the last attempt
+    queue._failed([queued], TRANSIENT)
+    assert not queue._delayed
+    assert dead == [queued] and queued.attempts == 5 and queued.error.startswith("SMTPResponseException")
+
+
+def test_jitter_spreads_messages_that_failed_together():
+    queue = retry_queue([])
+    queue._failed([message(n) for n in range(20)], TRANSIENT)
+    dues = {due for due, _, _ in queue._delayed}
+    assert len(dues) > 1 and all(1 <= due <= 2 for due in dues)
+
+
+@pytest.mark.parametrize("exc", [
+    PERMANENT,
+    smtplib.SMTPRecipientsRefused({"user0@example.com": (550, b"unknown user")}),
+])
+def test_permanent_errors_are_not_retried(exc):
+    dead = []
+    queue = retry_queue(dead)
+    queue._failed([message()], exc)
+    assert not queue._delayed and len(dead) == 1 and queue.retried == 0
+
+
+@pytest.mark.parametrize("exc", [
+    smtplib.SMTPServerDisconnected("gone"),
+    ConnectionResetError("reset"),
+    TimeoutError("timed out"),
+    smtplib.SMTPRecipientsRefused({"user0@example.com": (450, b"mailbox busy")}),
+])
+def test_transient_errors_are_retried(exc):
+    dead = []
+    queue = retry_queue(dead)
+    queue._failed([message()], exc)
+    assert len(queue._delayed) == 1 and not dead
+
+
+class FakeSMTP:
+    def __init__(self, failures: list):
+        self.failures = failures
+        self.sent = []
+
+    def send_message(self, mime):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append(mime["To"])
+
+    def noop(self):
+        return 250, b"ok"
+
+    def quit(self):
+        pass
+
+    close = quit
+
+
+def test_delivers_in_batches_and_retries():
+    failures = [TRANSIENT]
+    connections = []
+
+    def connect():
+        connections.append(FakeSMTP(failures))
+        return connections[-1]
+
+    dead = []
+    queue = MailQueue(SMTPConnectionPool(connect), "lists@example.com", dead.extend,
+                      workers=1, batch_size=10, retry_backoff=0.01, retry_backoff_max=0.01)
+    for n in range(5):
+        assert queue.send(message(n))
+    assert queue.flush(5)
+    queue.close()
+
+    delivered = sorted(to for smtp in connections for to in smtp.sent)
+    assert delivered == sorted(f"user{n}@example.com" for n in range(5))
+    stats = queue.stats()
+    assert stats["sent"] == 5 and stats["retried"] == 1 and stats["dead"] == 0
+    # a 451 reply leaves the connection usable: one connection for everything
+    assert stats["connections"] == 1 and not dead
+
+
+class RecordingQueue:
+    def __init__(self):
+        self.sent = []
+        self.flushes = 0
+
+    def send(self, message):
+        self.sent.append(message)
+        return True
+
+    def flush(self, timeout=None):
+        self.flushes += 1
+        return True
+
+
+def test_send_email_only_queues(monkeypatch):
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "smart-shop-list")
+    queue = RecordingQueue()
+    monkeypatch.setattr(email, "_mail_queue", queue)
+    assert send_email("a@example.com", "s", "<p>h</p>", "t")
+    assert send_email("b@example.com", "s", "<p>h</p>", "t")
+    assert len(queue.sent) == 2 and queue.flushes == 0
+    assert flush_mail()
+    assert queue.flushes == 1
+
+
+def test_flush_mail_without_a_queue(monkeypatch):
+    monkeypatch.setattr(email, "_mail_queue", None)
+    assert flush_mail()
+
+
+def test_lambda_handler_flushes_once_per_invocation(monkeypatch):
+    from app import main
+
+    calls = []
+    monkeypatch.setattr(main, "flush_mail", lambda: calls.append(threading.current_thread()))
+    event = {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": "/",
+        "rawQueryString": "",
+        "headers": {"host": "test.lambda-url.local"},
+        "requestContext": {
+            "http": {"method": "GET", "path": "/", "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1"},
+            "requestId": "test",
+            "stage": "$default",
+        },
+        "isBase64Encoded": False,
+    }
+    # Mangum runs the app on the thread's current event loop; earlier asyncio.run() calls leave none.
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        response = main.handler(event, None)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+    assert response["statusCode"] == 200
+    assert len(calls) == 1
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.shared import events
+
+
+@pytest.fixture
+def listener(database, monkeypatch):
+    if get_settings().events_backend != "postgres":
+        pytest.skip("needs EVENTS_BACKEND=postgres")
+    monkeypatch.setattr(events, "_listener", None)
+    connects = []
+    connect = events.PostgresListener._connect
+
+    def recording_connect(self):
+        connects.append(threading.get_ident())
+        return connect(self)
+
+    monkeypatch.setattr(events.PostgresListener, "_connect", recording_connect)
+    yield connects
+    if events._listener is not None:
+        events._listener.stop()
+
+
+def notify(database, message: dict):
+    with database.begin() as conn:
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": events.CHANNEL, "payload": json.dumps(message)})
+
+
+def test_listener_connects_off_the_event_loop(listener):
+    async def scenario():
+        await asyncio.gather(*(events.ensure_listener() for _ in range(5)))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert events._listener.running
+    assert len(listener) == 1 and listener[0] != loop_thread
+
+
+def test_notifications_reach_subscribers(listener, database):
+    list_id = "2f1c8e4e-2a5c-4b0e-9d7e-0a4c2f5e6b71"
+
+    async def scenario():
+        await events.ensure_listener()
+        queue = events.broker.subscribe(list_id)
+        try:
+            message = {"type": events.ITEM_DELETED, "list_id": list_id, "item": {"id": 1}}
+            await asyncio.to_thread(notify, database, message)
+            return message, await asyncio.wait_for(queue.get(), timeout=5)
+        finally:
+            events.broker.unsubscribe(list_id, queue)
+
+    sent, received = asyncio.run(scenario())
+    assert received == sent
+
+
+def test_reconnects_after_losing_the_connection(listener):
+    async def scenario():
+        await events.ensure_listener()
+        listener_ = events._listener
+        listener_.reconnect_delay = 0.01
+        first = listener_._conn
+        first.close()
+        listener_._on_readable()
+        assert not listener_.running
+        await asyncio.wait_for(listener_._reconnecting, timeout=5)
+        return first, listener_._conn
+
+    first, second = asyncio.run(scenario())
+    assert second is not None and second is not first
+    assert len(listener) == 2
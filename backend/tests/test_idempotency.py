@@ -0,0 +1,223 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app import middleware
+from app.config import get_settings
+from app.middleware import IdempotencyMiddleware
+from app.shared.idempotency import MemoryIdempotencyStore, client_scope
+
+LIST_A = "2f1c8e4e-2a5c-4b0e-9d7e-0a4c2f5e6b71"
+LIST_B = "8d0b5a3c-1e2f-4a6b-9c8d-7e6f5a4b3c2d"
+API_KEY = "secret"
+
+
+class Endpoint:
+    """``POST /api/items`` and ``POST /api/list`` stand-ins that count the requests reaching them."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = None  # an asyncio.Event to hold requests in flight
+        self.fail = False
+
+    async def handle(self, request: Request):
+        self.calls += 1
+        fail = self.fail
+        body = await request.json() if await request.body() else {}
+        if self.release is not None:
+            await self.release.wait()
+        if fail:
+            return JSONResponse({"error": "boom"}, status_code=500)
+        return JSONResponse({"call": self.calls, **body}, status_code=200, headers={"X-Call": str(self.calls)})
+
+
+@pytest.fixture
+def endpoint():
+    return Endpoint()
+
+
+def client_for(endpoint, peer=("10.0.0.1", 1234)):
+    app = Starlette(routes=[Route("/api/items", endpoint.handle, methods=["POST"]), Route("/api/list", endpoint.handle, methods=["POST"])])
+    settings = get_settings().model_copy(update={"api_key": API_KEY})
+    wrapped = IdempotencyMiddleware(app, store=MemoryIdempotencyStore(), settings=settings)
+    return wrapped, lambda wrapped=wrapped, peer=peer: httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=wrapped, client=peer), base_url="http://test")
+
+
+def post(client, key, body=None, path="/api/items", **headers):
+    return client.post(path, json=body, headers={"Idempotency-Key": key, **headers})
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_replay(endpoint):
+    _, make_client = client_for(endpoint)
+
+    async def scenario():
+        async with make_client() as client:
+            first = await post(client, "k1", {"name": "milk", "list_id": LIST_A})
+            second = await post(client, "k1", {"name": "milk", "list_id": LIST_A})
+            return first, second
+
+    first, second = run(scenario())
+    assert endpoint.calls == 1
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content and second.headers["x-call"] == "1"
+    assert second.headers["idempotent-replayed"] == "true" and "idempotent-replayed" not in first.headers
+
+
+def test_mismatch(endpoint):
+    _, make_client = client_for(endpoint)
+
+    async def scenario():
+        async with make_client() as client:
+            await post(client, "k1", {"name": "milk", "list_id": LIST_A})
+            return await post(client, "k1", {"name": "bread", "list_id": LIST_A})
+
+    assert run(scenario()).status_code == 422
+    assert endpoint.calls == 1
+
+
+def test_without_header_nothing_is_stored(endpoint):
+    _, make_client = client_for(endpoint)
+
+    async def scenario():
+        async with make_client() as client:
+            for _ in range(2):
+                await client.post("/api/items", json={"name": "milk", "list_id": LIST_A})
+            return await post(client, "x" * 300)
+
+    assert run(scenario()).status_code == 400
+    assert endpoint.calls == 2
+
+
+def test_in_flight_retries_wait_for_the_first(endpoint):
+    _, make_client = client_for(endpoint)
+    body = {"name": "milk", "list_id": LIST_A}
+
+    async def scenario():
+        endpoint.release = asyncio.Event()
+        async with make_client() as client:
+            requests = [asyncio.create_task(post(client, "k1", body)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            assert endpoint.calls == 1  # the others are waiting, not running
+            endpoint.release.set()
+            return await asyncio.gather(*requests)
+
+    responses = run(scenario())
+    assert endpoint.calls == 1
+    assert {response.content for response in responses} == {responses[0].content}
+    assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == 4
+
+
+def test_in_flight_wait_times_out_with_409(endpoint, monkeypatch):
+    monkeypatch.setattr(middleware, "IDEMPOTENCY_WAIT_SECONDS", 0.05)
+    _, make_client = client_for(endpoint)
+    body = {"name": "milk", "list_id": LIST_A}
+
+    async def scenario():
+        endpoint.release = asyncio.Event()
+        async with make_client() as client:
+            first = asyncio.create_task(post(client, "k1", body))
+            await asyncio.sleep(0.01)
+            retry = await post(client, "k1", body)
+            endpoint.release.set()
+            return await first, retry
+
+    first, retry = run(scenario())
+    assert first.status_code == 200
+    assert retry.status_code == 409 and retry.headers["retry-after"]
+
+
+def test_5xx_is_released_and_retried(endpoint):
+    _, make_client = client_for(endpoint)
+    body = {"name": "milk", "list_id": LIST_A}
+
+    async def scenario():
+        async with make_client() as client:
+            endpoint.fail = True
+            failed = await post(client, "k1", body)
+            endpoint.fail = False
+            retried = await post(client, "k1", body)
+            replayed = await post(client, "k1", body)
+            return failed, retried, replayed
+
+    failed, retried, replayed = run(scenario())
+    assert failed.status_code == 500
+    assert retried.status_code == 200 and "idempotent-replayed" not in retried.headers
+    assert replayed.headers["idempotent-replayed"] == "true"
+    assert endpoint.calls == 2
+
+
+def test_waiters_run_the_request_when_the_first_fails(endpoint):
+    _, make_client = client_for(endpoint)
+    body = {"name": "milk", "list_id": LIST_A}
+
+    async def scenario():
+        endpoint.release, endpoint.fail = asyncio.Event(), True
+        async with make_client() as client:
+            first = asyncio.create_task(post(client, "k1", body))
+            await asyncio.sleep(0.01)
+            retry = asyncio.create_task(post(client, "k1", body))
+            await asyncio.sleep(0.01)
+            endpoint.fail = False
+            endpoint.release.set()
+            return await first, await retry
+
+    first, retry = run(scenario())
+    assert first.status_code == 500
+    assert retry.status_code == 200 and "idempotent-replayed" not in retry.headers
+
+
+def test_keys_are_scoped_per_client(endpoint):
+    wrapped, _ = client_for(endpoint)
+
+    def client(peer):
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=wrapped, client=peer), base_url="http://test")
+
+    async def scenario():
+        async with client(("10.0.0.1", 1)) as alice, client(("10.0.0.2", 1)) as bob, client(("10.0.0.3", 1)) as mallory:
+            # same key, different lists: independent requests
+            a = await post(alice, "1", {"name": "milk", "list_id": LIST_A})
+            b = await post(bob, "1", {"name": "eggs", "list_id": LIST_B})
+            # creating a list has no list id: the peer scopes it, so bob never gets alice's list
+            list_a = await post(alice, "1", None, path="/api/list")
+            list_b = await post(bob, "1", None, path="/api/list")
+            # the API key scopes across addresses
+            keyed_a = await post(alice, "2", None, path="/api/list", **{"x-api-key": API_KEY})
+            keyed_b = await post(bob, "2", None, path="/api/list", **{"x-api-key": API_KEY})
+            # a wrong key is ignored: mallory stays in her own peer scope
+            forged = await post(mallory, "2", None, path="/api/list", **{"x-api-key": "guess"})
+            return a, b, list_a, list_b, keyed_a, keyed_b, forged
+
+    a, b, list_a, list_b, keyed_a, keyed_b, forged = run(scenario())
+    assert a.status_code == b.status_code == 200 and a.json()["name"] == "milk" and b.json()["name"] == "eggs"
+    assert "idempotent-replayed" not in list_b.headers and list_a.json() != list_b.json()
+    assert keyed_b.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in forged.headers and forged.json() != keyed_a.json()
+    assert endpoint.calls == 6
+
+
+def test_client_scope():
+    def scope(client=("10.0.0.1", 1), **headers):
+        return {"client": client, "headers": [(name.encode(), value.encode()) for name, value in headers.items()]}
+
+    item = json.dumps({"name": "milk", "list_id": LIST_A}).encode()
+    bulk = json.dumps([{"list_id": LIST_B}, {"list_id": LIST_A}, {"list_id": LIST_A}]).encode()
+    reordered = json.dumps([{"list_id": LIST_A}, {"list_id": LIST_B}]).encode()
+    assert client_scope(scope(), item) == client_scope(scope(("10.9.9.9", 2)), item)
+    assert client_scope(scope(), bulk) == client_scope(scope(), reordered) != client_scope(scope(), item)
+    assert client_scope(scope(), b"") != client_scope(scope(("10.0.0.2", 1)), b"")
+    assert client_scope(scope(), b"not json") == client_scope(scope(), b"")
+    keyed = scope(**{"x-api-key": "k"})
+    assert client_scope(keyed, item, b"k") == client_scope(scope(("10.0.0.2", 1), **{"x-api-key": "k"}), b"", b"k")
+    # unvalidated keys do not scope
+    assert client_scope(keyed, item) == client_scope(scope(**{"x-api-key": "guess"}), item, b"k") == client_scope(scope(), item)
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.shared import list_cache
+from app.shared.list_cache import FakeKeyValueStore, KeyValueBackend, ListCache, MemoryBackend
+from app.shared.metrics import render_cache_metrics
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def memory_cache(clock, maxsize=2, ttl=60, **kwargs):
+    return ListCache(MemoryBackend(maxsize=maxsize, ttl=ttl, clock=clock), **kwargs)
+
+
+def shared_cache(clock, ttl=60):
+    store = FakeKeyValueStore(clock=clock)
+    return ListCache(KeyValueBackend(store, ttl=ttl)), store
+
+
+def test_hit_only_at_current_version(clock):
+    cache = memory_cache(clock)
+    cache.set("a", 3, b"[1]")
+    assert cache.get("a", 3) == b"[1]"
+    assert cache.get("a", 4) is None
+    assert cache.get("b", 3) is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.3333, "size": 1, "evictions": 0}
+
+
+def test_lru_eviction(clock):
+    cache = memory_cache(clock, maxsize=2)
+    cache.set("a", 1, b"a")
+    cache.set("b", 1, b"b")
+    assert cache.get("a", 1) == b"a"  # "b" is now the least recently used
+    cache.set("c", 1, b"c")
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == b"a" and cache.get("c", 1) == b"c"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_ttl_expiry(clock):
+    cache = memory_cache(clock, ttl=60)
+    cache.set("a", 1, b"a")
+    clock.now += 59
+    assert cache.get("a", 1) == b"a"
+    clock.now += 2
+    assert cache.get("a", 1) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_oversized_bodies_are_not_cached(clock):
+    cache = memory_cache(clock, max_entry_bytes=4)
+    cache.set("a", 1, b"12345")
+    assert cache.get("a", 1) is None
+
+
+def test_shared_backend(clock):
+    cache, store = shared_cache(clock, ttl=60)
+    list_id = uuid.uuid4()
+    cache.set(list_id, 7, b'[{"name":"milk"}]\n')
+    assert store.get(f"list-items:{list_id}") == b'7\n[{"name":"milk"}]\n'
+    assert cache.get(list_id, 7) == b'[{"name":"milk"}]\n'
+    assert cache.get(list_id, 8) is None
+    clock.now += 61
+    assert cache.get(list_id, 7) is None
+    # size and evictions belong to the store: not reported, not rendered
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.3333}
+    lines = render_cache_metrics({"list_items": cache.stats()})
+    assert 'cache_hits_total{cache="list_items"} 1' in lines
+    assert not any(line.startswith(("cache_entries", "cache_evictions_total")) for line in lines)
+
+
+@pytest.fixture
+def active_cache(monkeypatch, clock):
+    cache = memory_cache(clock, maxsize=10)
+    monkeypatch.setattr(list_cache, "get_list_cache", lambda: cache)
+    return cache
+
+
+def test_invalidate_on_commit(active_cache):
+    active_cache.set("a", 1, b"a")
+    active_cache.set("b", 1, b"b")
+    session = Session()
+    list_cache.invalidate_on_commit(session, "a")
+    assert active_cache.get("a", 1) == b"a"  # not before the commit
+    session.commit()
+    assert active_cache.get("a", 1) is None
+    assert active_cache.get("b", 1) == b"b"
+
+
+def test_rollback_keeps_entries(active_cache):
+    active_cache.set("a", 1, b"a")
+    session = Session()
+    session.begin()
+    list_cache.invalidate_on_commit(session, "a")
+    session.rollback()
+    session.commit()
+    assert active_cache.get("a", 1) == b"a"
+
+
+class FailingStore(FakeKeyValueStore):
+    def __init__(self):
+        super().__init__()
+        self.deleted_in = []
+
+    def delete(self, *keys):
+        self.deleted_in.append(threading.current_thread())
+        raise ConnectionError("store is down")
+
+
+def test_shared_invalidation_from_the_event_loop_runs_in_a_thread(monkeypatch):
+    store = FailingStore()
+    monkeypatch.setattr(list_cache, "get_list_cache", lambda: ListCache(KeyValueBackend(store, ttl=60)))
+
+    async def commit():
+        session = Session()
+        list_cache.invalidate_on_commit(session, "a")
+        session.commit()  # a store error must not fail the committed write
+        await asyncio.sleep(0.05)
+
+    asyncio.run(commit())
+    assert len(store.deleted_in) == 1 and store.deleted_in[0] is not threading.main_thread()
+
+    session = Session()
+    list_cache.invalidate_on_commit(session, "a")
+    session.commit()
+    assert store.deleted_in[1] is threading.main_thread()
@@ -0,0 +1,63 @@
+import uuid
+
+import pytest
+
+from app.shared.constants import MAX_BATCH_LISTS
+
+
+@pytest.fixture
+def lists(client):
+    weekly = client.post("/api/list", params={"name": "weekly"}).json()["id"]
+    empty = client.post("/api/list", params={"name": "empty"}).json()["id"]
+    party = client.post("/api/list", params={"name": "party"}).json()["id"]
+    client.post("/api/items/bulk", json=[{"name": name, "list_id": weekly} for name in ("milk", "bread", "eggs")])
+    client.post("/api/items", json={"name": "chips", "list_id": party})
+    return weekly, empty, party
+
+
+def batch(client, *ids):
+    return client.get("/api/lists/batch", params=[("ids", value) for value in ids])
+
+
+def test_response_shape_and_order(client, lists):
+    weekly, empty, party = lists
+    response = batch(client, f"{party},{weekly}", empty)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert set(body) == {"lists", "missing"} and body["missing"] == []
+    assert [shopping_list["id"] for shopping_list in body["lists"]] == [party, weekly, empty]
+    first = body["lists"][0]
+    assert set(first) == {"id", "name", "share_code", "created_at", "items"} and first["name"] == "party"
+    assert set(first["items"][0]) == {"id", "list_id", "name", "quantity", "category", "bought", "created_at", "updated_at"}
+    # items newest first, as GET /api/items returns them
+    assert body["lists"][1]["items"] == client.get("/api/items", params={"list_id": weekly}).json()
+    assert body["lists"][2]["items"] == []
+
+
+def test_missing_and_duplicate_ids(client, lists):
+    weekly, _, party = lists
+    ghost = str(uuid.uuid4())
+    body = batch(client, f"{weekly},{ghost}", weekly, f" {party} ,", weekly.upper()).json()
+    assert [shopping_list["id"] for shopping_list in body["lists"]] == [weekly, party]
+    assert body["missing"] == [ghost]
+
+
+@pytest.mark.parametrize("ids, detail", [
+    (("junk",), "Invalid list id 'junk'"),
+    ((",",), "No list ids"),
+    ((",".join(str(uuid.uuid4()) for _ in range(MAX_BATCH_LISTS + 1)),), f"At most {MAX_BATCH_LISTS} lists per request"),
+])
+def test_invalid_requests(client, ids, detail):
+    response = batch(client, *ids)
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
+
+
+def test_ids_are_required(client):
+    assert client.get("/api/lists/batch").status_code == 400
+
+
+def test_size_limit_counts_distinct_ids(client, lists):
+    weekly, _, _ = lists
+    response = batch(client, *[weekly] * (MAX_BATCH_LISTS + 1))
+    assert response.status_code == 200 and len(response.json()["lists"]) == 1
@@ -0,0 +1,110 @@
+import asyncio
+import io
+
+import httpx
+import orjson
+import pytest
+
+from app import logger as app_logger
+from app.config import get_settings
+from app.logger import configure_logging, logger
+from app.middleware import RequestTimingMiddleware
+from app.shared.metrics import RequestMetrics
+
+
+@pytest.fixture
+def output():
+    """Log to a buffer through the queue, restoring the app's logging after the test."""
+    stream = io.StringIO()
+    configure_logging(get_settings().model_copy(update={"log_format": "json", "log_level": "info"}), stream=stream, use_queue=True)
+    yield stream
+    configure_logging(get_settings())
+
+
+def lines(stream: io.StringIO) -> list[dict]:
+    app_logger._stop_listener()  # drains the queue
+    return [orjson.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_record_reaches_the_listener(output):
+    assert logger.handlers == [app_logger._queue_handler]
+    items = ["milk"]
+    logger.info("added %s", items, extra={"list_id": 7})
+    items.append("eggs")  # arguments are resolved by the caller, not the listener
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed")
+    first, second = lines(output)
+    assert first["message"] == "added ['milk']"
+    assert first["list_id"] == 7
+    assert second["message"] == "failed"
+    assert "ValueError: boom" in second["exc"]
+
+
+def test_restart_after_fork_installs_a_working_queue(output):
+    old_queue, old_listener = app_logger._queue_handler.queue, app_logger._listener
+    app_logger._restart_listener_after_fork()
+    assert app_logger._queue_handler.queue is not old_queue
+    assert app_logger._listener is not old_listener
+    assert app_logger._listener._thread.is_alive()
+    logger.warning("from the child")
+    old_listener.stop()
+    assert [line["message"] for line in lines(output)] == ["from the child"]
+
+
+def test_restart_after_fork_without_a_listener_is_a_noop():
+    stream = io.StringIO()
+    configure_logging(get_settings(), stream=stream, use_queue=False)
+    try:
+        app_logger._restart_listener_after_fork()
+        assert app_logger._listener is None
+        assert logger.handlers == [app_logger._output]
+    finally:
+        configure_logging(get_settings())
+
+
+async def ok_app(scope, receive, send):
+    status = 500 if scope["path"] == "/error" else 200
+    await send({"type": "http.response.start", "status": status, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def logged_requests(monkeypatch, output, paths, random_value, **overrides) -> list[dict]:
+    settings = get_settings().model_copy(update=overrides)
+    app = RequestTimingMiddleware(ok_app, metrics=RequestMetrics(), settings=settings)
+    monkeypatch.setattr("app.middleware.random.random", lambda: random_value)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for path in paths:
+                await client.get(path)
+
+    asyncio.run(scenario())
+    return [line for line in lines(output) if "route" in line]
+
+
+def test_sample_rate_drops_successful_requests(monkeypatch, output):
+    logged = logged_requests(monkeypatch, output, ["/ok", "/error"], 0.5, log_sample_rate=0.1)
+    # the successful request lost the draw; the error is always logged
+    assert [line["status"] for line in logged] == [500]
+    assert logged[0]["sample_rate"] == 1.0
+
+
+def test_sample_rate_keeps_requests_under_the_rate(monkeypatch, output):
+    logged = logged_requests(monkeypatch, output, ["/ok"], 0.05, log_sample_rate=0.1)
+    assert [line["sample_rate"] for line in logged] == [0.1]
+
+
+def test_slow_requests_are_always_logged(monkeypatch, output):
+    logged = logged_requests(monkeypatch, output, ["/ok"], 0.99, log_sample_rate=0.0, log_slow_request_ms=0)
+    assert [line["status"] for line in logged] == [200]
+
+
+def test_sample_rate_per_route():
+    settings = get_settings().model_copy(update={"log_sample_rate": 0.5, "log_sample_routes": {"GET /api/items": 0.01}})
+    middleware = RequestTimingMiddleware(ok_app, metrics=RequestMetrics(), settings=settings)
+    assert middleware._sample_rate("GET", "/api/items", 200, 0.001) == 0.01
+    assert middleware._sample_rate("POST", "/api/items", 201, 0.001) == 0.5
+    assert middleware._sample_rate("GET", "/api/items", 404, 0.001) == 1.0
+    assert middleware._sample_rate("GET", "/api/items", 200, 10.0) == 1.0
@@ -0,0 +1,95 @@
+import re
+
+import pytest
+
+from app.shared import metrics
+from app.shared.metrics import CONTENT_TYPE, LATENCY_BUCKETS, RequestMetrics, UNMATCHED_ROUTE
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Value of one sample in Prometheus text, 0 when absent."""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(name + (f"{{{label_text}}}" if labels else "")) + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_histogram_buckets_are_cumulative():
+    request_metrics = RequestMetrics()
+    for seconds in (0.004, 0.02, 0.02, 3.0, 60.0):
+        request_metrics.started()
+        request_metrics.finished("GET", "/api/items", 200, seconds)
+    text = "\n".join(request_metrics.render())
+
+    buckets = [sample(text, "http_request_duration_seconds_bucket", method="GET", route="/api/items", le=bound)
+               for bound in LATENCY_BUCKETS + ("+Inf",)]
+    assert buckets == sorted(buckets)
+    assert sample(text, "http_request_duration_seconds_bucket", method="GET", route="/api/items", le=0.005) == 1
+    assert sample(text, "http_request_duration_seconds_bucket", method="GET", route="/api/items", le=0.025) == 3
+    assert sample(text, "http_request_duration_seconds_bucket", method="GET", route="/api/items", le=5.0) == 4
+    assert buckets[-1] == 5
+    assert sample(text, "http_request_duration_seconds_count", method="GET", route="/api/items") == 5
+    assert sample(text, "http_request_duration_seconds_sum", method="GET", route="/api/items") == pytest.approx(63.044)
+    assert sample(text, "http_requests_total", method="GET", route="/api/items", status=200) == 5
+    assert sample(text, "http_requests_in_flight") == 0
+
+
+def test_counters_and_help_lines():
+    request_metrics = RequestMetrics()
+    request_metrics.started()
+    request_metrics.shed("writes")
+    request_metrics.shed("writes")
+    request_metrics.throttled()
+    request_metrics.over_query_budget("PATCH", "/api/items/batch")
+    lines = request_metrics.render()
+    text = "\n".join(lines)
+    assert sample(text, "http_requests_in_flight") == 1
+    assert sample(text, "http_requests_shed_total", reason="writes") == 2
+    assert sample(text, "http_requests_throttled_total") == 1
+    assert sample(text, "http_requests_over_query_budget_total", method="PATCH", route="/api/items/batch") == 1
+    for name, kind in (("http_requests_total", "counter"), ("http_request_duration_seconds", "histogram"),
+                       ("http_requests_in_flight", "gauge")):
+        assert f"# TYPE {name} {kind}" in lines
+        assert any(line.startswith(f"# HELP {name} ") for line in lines)
+
+
+def test_label_values_are_escaped():
+    request_metrics = RequestMetrics()
+    request_metrics.finished("GET", 'a"b\\c\nd', 200, 0.1)
+    assert 'http_requests_total{method="GET",route="a\\"b\\\\c\\nd",status="200"} 1' in request_metrics.render()
+
+
+def test_pool_cache_and_mail_metrics():
+    pools = {"sync": {"checkouts": 3, "timeouts": 0, "wait_seconds_total": 0.5, "wait_seconds_max": 0.2,
+                      "wait_seconds_recent": 0.1, "checked_out": 1, "capacity": 10}, "async": None}
+    lines = metrics.render_pool_metrics(pools)
+    assert 'db_pool_checkouts_total{engine="sync"} 3' in lines
+    assert not any('engine="async"' in line for line in lines)
+
+    caches = {"list_items": {"hits": 4, "misses": 1}, "share_code": {"hits": 2, "misses": 0, "evictions": 1, "size": 5},
+              "off": None}
+    lines = metrics.render_cache_metrics(caches)
+    assert 'cache_hits_total{cache="list_items"} 4' in lines and 'cache_entries{cache="share_code"} 5' in lines
+    # shared stores report no size or evictions
+    assert not any('cache="list_items"' in line for line in lines if line.startswith(("cache_entries", "cache_evictions")))
+    assert not any('cache="off"' in line for line in lines)
+
+    assert metrics.render_mail_metrics(None) == []
+    mail = metrics.render_mail_metrics({"queued": 2, "sent": 7, "retried": 1, "dead": 0, "connections": 1})
+    assert "mail_sent_total 7" in mail and "# TYPE mail_queued gauge" in mail
+
+
+def test_metrics_endpoint(client):
+    before = client.get("/metrics").text
+    client.get("/")
+    client.get("/no/such/route")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    text = response.text
+    assert text.endswith("\n")
+    for labels in ({"method": "GET", "route": "/", "status": 200},
+                   {"method": "GET", "route": UNMATCHED_ROUTE, "status": 404}):
+        assert sample(text, "http_requests_total", **labels) == sample(before, "http_requests_total", **labels) + 1
+    assert 'cache_hits_total{cache="share_code"}' in text
+    assert re.search(r'^http_request_duration_seconds_bucket\{method="GET",route="/",le="\+Inf"\} \d+$', text, re.MULTILINE)
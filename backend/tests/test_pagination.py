@@ -0,0 +1,65 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils.pagination import decode_cursor, decode_sync_cursor, encode_cursor, encode_sync_cursor
+
+
+def raw_cursor(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 10, 20, 10, 0, 0, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    assert decode_cursor(encode_cursor(created_at, 2 ** 31 - 1))[1] == 2 ** 31 - 1
+
+
+def test_sync_cursor_round_trip():
+    assert decode_sync_cursor(encode_sync_cursor(7)) == 7
+
+
+@pytest.mark.parametrize("cursor", [
+    "junk",
+    "",
+    raw_cursor("[]"),
+    raw_cursor('["2020-01-01T00:00:00", Infinity]'),
+    raw_cursor('["2020-01-01T00:00:00", NaN]'),
+    raw_cursor('["2020-01-01T00:00:00", 1.5]'),
+    raw_cursor('["2020-01-01T00:00:00", true]'),
+    raw_cursor('["2020-01-01T00:00:00", "1"]'),
+    raw_cursor('["2020-01-01T00:00:00", 99999999999999999999]'),
+    # grocery_items.id is INTEGER: past it asyncpg raises DataError
+    raw_cursor('["2020-01-01T00:00:00", 2147483648]'),
+    raw_cursor('["2020-01-01T00:00:00", 9223372036854775807]'),
+    raw_cursor('["not a date", 1]'),
+    raw_cursor('[1, 1]'),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("cursor", [
+    raw_cursor('["v", Infinity]'),
+    raw_cursor('["v", 2147483648]'),
+    raw_cursor('["v", "3"]'),
+    raw_cursor('["x", 3]'),
+    raw_cursor('["v"]'),
+])
+def test_invalid_sync_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_sync_cursor(cursor)
+
+
+def test_get_items_invalid_cursor_is_400(client):
+    list_id = client.post("/api/list").json()["id"]
+    for cursor in (
+        raw_cursor('["2020-01-01T00:00:00", Infinity]'),
+        raw_cursor('["2020-01-01T00:00:00", 99999999999999999999]'),
+        raw_cursor('["2020-01-01T00:00:00", 4294967296]'),
+    ):
+        response = client.get("/api/items", params={"list_id": list_id, "limit": 10, "cursor": cursor})
+        assert response.status_code == 400, response.text
+        assert response.json() == {"detail": "Invalid cursor"}
@@ -0,0 +1,111 @@
+"""
+Statements per request of every item and list endpoint, counted with a
+``before_cursor_execute`` listener on the engine(s) and held to a budget, so a
+reintroduced select-then-refresh or N+1 fails the build.
+
+Budgets count statements; a write also pays one ``COMMIT``. They assume
+``EVENTS_BACKEND=postgres`` (the default), where every write adds one
+``pg_notify``. Run with ``DB_ASYNC=true`` to check the async routes.
+"""
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from app.config import get_settings
+from app.db.database import SessionLocal, get_async_engine
+from app.models import items as items_models
+
+# (label, method, path template, budget)
+BUDGETS = (
+    ("create list", "POST", "/api/list", 2),
+    ("add item", "POST", "/api/items", 4),
+    ("bulk add", "POST", "/api/items/bulk", 3),
+    ("get items", "GET", "/api/items", 2),
+    ("get items 304", "GET", "/api/items", 1),
+    ("get shared list", "GET", "/api/list/{share_code}", 1),
+    ("get lists batch", "GET", "/api/lists/batch", 1),
+    ("update item", "PUT", "/api/items/{item_id}", 2),
+    ("update missing", "PUT", "/api/items/0", 1),
+    ("batch update", "PATCH", "/api/items/batch", 2),
+    ("item changes", "GET", "/api/items/changes", 3),
+    ("item changes idle", "GET", "/api/items/changes", 1),
+    ("delete item", "DELETE", "/api/items/{item_id}", 2),
+    ("delete missing", "DELETE", "/api/items/0", 1),
+)
+
+
+class StatementCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.count += 1
+
+    def take(self) -> int:
+        with self._lock:
+            count, self.count = self.count, 0
+        return count
+
+
+@pytest.fixture(scope="module")
+def statements(database, client):
+    """``{label: (status, statements)}`` for one request to each endpoint of ``BUDGETS``, in order."""
+    if get_settings().events_backend != "postgres":
+        pytest.skip("budgets assume EVENTS_BACKEND=postgres")
+    counter = StatementCounter()
+    engines = [database] + ([get_async_engine().sync_engine] if get_async_engine() is not None else [])
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", counter)
+    try:
+        shopping_list = client.post("/api/list").json()
+        list_id = shopping_list["id"]
+        item = client.post("/api/items", json={"name": "milk", "list_id": list_id}).json()
+        client.get("/api/items", params={"list_id": list_id})
+        cursor = client.get("/api/items/changes", params={"list_id": list_id}).json()["cursor"]
+        with SessionLocal() as db:
+            # due once per process; keep it out of the DELETE measured below
+            items_models.prune_tombstones(db)
+        counter.take()
+
+        requests = {
+            "add item": dict(json={"name": "bread", "list_id": list_id}),
+            "bulk add": dict(json=[{"name": "rice", "list_id": list_id}]),
+            "get items": dict(params={"list_id": list_id}),
+            "get items 304": dict(params={"list_id": list_id}),
+            "get lists batch": dict(params={"ids": list_id}),
+            "update item": dict(json={"bought": True}),
+            "update missing": dict(json={"bought": True}),
+            "batch update": dict(json=[{"id": item["id"], "bought": False}, {"id": item["id"], "name": "cheese"}]),
+            "item changes": dict(params={"list_id": list_id, "since": cursor}),
+            "item changes idle": dict(params={"list_id": list_id}),
+        }
+        results = {}
+        for label, method, template, _ in BUDGETS:
+            kwargs = requests.get(label, {})
+            if label == "get items 304":
+                # the writes above moved the version on; revalidate against the current one
+                etag = client.get("/api/items", **kwargs).headers["etag"]
+                counter.take()
+                kwargs = dict(kwargs, headers={"If-None-Match": etag})
+            if label == "item changes idle":
+                # nothing changed since the latest cursor
+                latest = client.get(template, **kwargs).json()["cursor"]
+                counter.take()
+                kwargs = dict(params=dict(kwargs["params"], since=latest))
+            path = template.format(share_code=shopping_list["share_code"], item_id=item["id"])
+            response = client.request(method, path, **kwargs)
+            results[label] = (response.status_code, counter.take())
+        return results
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", counter)
+
+
+@pytest.mark.parametrize("label, method, template, budget", BUDGETS, ids=[budget[0] for budget in BUDGETS])
+def test_statements_within_budget(statements, label, method, template, budget):
+    status, count = statements[label]
+    assert status < 500, f"{method} {template} answered {status}"
+    assert count <= budget, f"{method} {template} sent {count} statements, budget {budget}"
@@ -0,0 +1,55 @@
+"""The pre-rendered responses must be byte for byte what the pydantic response models produce."""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.schemas.items import GroceryOut, ListBatchOut, ListOut
+from app.shared.serialization import ITEM_FIELDS, LIST_FIELDS, render_item_lines, render_items, render_lists
+
+
+class AsyncpgUUID(uuid.UUID):
+    """asyncpg hands out a uuid.UUID subclass, which orjson does not encode natively."""
+
+
+LIST_ID = uuid.UUID("2f1c8e4e-2a5c-4b0e-9d7e-0a4c2f5e6b71")
+
+# In ITEM_FIELDS order: name, quantity, id, list_id, category, bought, created_at, updated_at
+ROWS = [
+    ("milk", 2, 1, LIST_ID, "Dairy", False,
+     datetime(2025, 10, 20, 10, 0, 0, 123456, tzinfo=timezone.utc), datetime(2025, 10, 20, 10, 0, 1, tzinfo=timezone.utc)),
+    ("café \"noir\" \U0001F600", None, 2**40, AsyncpgUUID(str(LIST_ID)), "Others", True,
+     datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=5, minutes=30))), datetime(2025, 1, 2, 3, 4, 5, 1)),
+]
+LIST_ROW = (LIST_ID, "weekly", "ab12cd34", datetime(2025, 10, 1, tzinfo=timezone.utc))
+
+
+def test_field_orders():
+    assert ITEM_FIELDS == tuple(GroceryOut.model_fields) == (
+        "name", "quantity", "id", "list_id", "category", "bought", "created_at", "updated_at",
+    )
+    assert LIST_FIELDS == tuple(ListOut.model_fields) == ("id", "name", "share_code", "created_at")
+
+
+@pytest.mark.parametrize("row", ROWS, ids=["utc", "offset-and-naive"])
+def test_render_items_matches_pydantic(row):
+    expected = GroceryOut.model_validate(dict(zip(ITEM_FIELDS, row))).model_dump_json().encode()
+    assert render_items([row]) == b"[" + expected + b"]"
+    assert render_item_lines([row]) == expected + b"\n"
+
+
+def test_render_items_empty():
+    assert render_items([]) == b"[]"
+    assert render_item_lines([]) == b""
+
+
+def test_render_lists_matches_pydantic():
+    missing = [uuid.UUID("00000000-0000-0000-0000-000000000001")]
+    expected = ListBatchOut.model_validate({
+        "lists": [
+            {**dict(zip(LIST_FIELDS, LIST_ROW)), "items": [dict(zip(ITEM_FIELDS, row)) for row in ROWS]},
+            {**dict(zip(LIST_FIELDS, LIST_ROW)), "items": []},
+        ],
+        "missing": missing,
+    }).model_dump_json().encode()
+    assert render_lists([(LIST_ROW, ROWS), (LIST_ROW, [])], missing) == expected
@@ -0,0 +1,67 @@
+import uuid
+
+import pytest
+
+from app.routers.items import share_code_cache
+
+
+@pytest.fixture
+def shared_list(client):
+    share_code_cache.clear()
+    shopping_list = client.post("/api/list", params={"name": "party"}).json()
+    client.post("/api/items", json={"name": "milk", "list_id": shopping_list["id"]})
+    return shopping_list
+
+
+def get_shared(client, share_code, **headers):
+    return client.get(f"/api/list/{share_code}", headers=headers)
+
+
+def test_resolves_and_caches_the_code(client, shared_list):
+    response = get_shared(client, shared_list["share_code"])
+    assert response.status_code == 200
+    assert response.json()["id"] == shared_list["id"]
+    assert [item["name"] for item in response.json()["items"]] == ["milk"]
+    hits = share_code_cache.hits
+    assert get_shared(client, shared_list["share_code"]).json() == response.json()
+    assert share_code_cache.hits == hits + 1
+
+
+@pytest.mark.parametrize("write", ["add", "update", "delete"])
+def test_write_to_the_list_is_seen_through_the_cache(client, shared_list, write):
+    share_code = shared_list["share_code"]
+    first = get_shared(client, share_code)
+    assert share_code_cache.get(share_code) is not None
+    milk = first.json()["items"][0]
+    if write == "add":
+        client.post("/api/items", json={"name": "bread", "list_id": shared_list["id"]})
+        expected = ["bread", "milk"]
+    elif write == "update":
+        client.put(f"/api/items/{milk['id']}", json={"name": "oat milk"})
+        expected = ["oat milk"]
+    else:
+        client.delete(f"/api/items/{milk['id']}")
+        expected = []
+
+    # a poll with the old validator is no longer answered with 304
+    polled = get_shared(client, share_code, **{"if-none-match": first.headers["etag"]})
+    assert polled.status_code == 200
+    assert polled.headers["etag"] != first.headers["etag"]
+    assert sorted(item["name"] for item in polled.json()["items"]) == expected
+    assert get_shared(client, share_code, **{"if-none-match": polled.headers["etag"]}).status_code == 304
+
+
+def test_unknown_code_is_404_and_not_cached(client, shared_list):
+    hits = share_code_cache.hits
+    for _ in range(2):
+        response = get_shared(client, "no-such-code")
+        assert response.status_code == 404
+        assert response.json()["message"] == "List not found"
+    assert share_code_cache.get("no-such-code") is None
+    assert share_code_cache.hits == hits
+
+
+def test_cached_code_of_a_missing_list_is_dropped(client, shared_list):
+    share_code_cache.set("stale", uuid.uuid4())
+    assert get_shared(client, "stale").status_code == 404
+    assert len(share_code_cache) == 0
@@ -0,0 +1,80 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app.db.database import get_async_engine
+from app.shared import timing
+from app.shared.timing import RequestTiming
+from benchmarks.common import server_timing_queries
+
+SERVER_TIMING = re.compile(r'^db;dur=[\d.]+;desc="(\d+) queries"(?:, handler;dur=[\d.]+, serialize;dur=[\d.]+)?, app;dur=[\d.]+$')
+
+
+def durations(header: str) -> dict:
+    return {entry.split(";")[0]: float(re.search(r"dur=([\d.]+)", entry).group(1)) for entry in header.split(", ")}
+
+
+@pytest.fixture
+def statements(database):
+    """Statements sent to the database(s) while the test runs."""
+    sent = []
+    engines = [database] + ([get_async_engine().sync_engine] if get_async_engine() is not None else [])
+    listener = lambda *args: sent.append(args[2])  # noqa: E731
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", listener)
+    yield sent
+    for engine in engines:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+def test_routed_request_reports_every_phase(client, statements):
+    list_id = client.post("/api/list").json()["id"]
+    client.post("/api/items", json={"name": "milk", "list_id": list_id})
+    statements.clear()
+    response = client.get("/api/items", params={"list_id": list_id}, headers={"cache-control": "no-cache"})
+    header = response.headers["server-timing"]
+    assert SERVER_TIMING.match(header), header
+    assert list(durations(header)) == ["db", "handler", "serialize", "app"]
+    # the count the benchmarks read is the number of statements sent
+    assert server_timing_queries(response.headers) == len(statements) > 0
+    phases = durations(header)
+    assert phases["db"] + phases["handler"] <= phases["app"] + 0.01
+
+
+def test_unrouted_request_reports_db_and_app(client):
+    response = client.get("/no/such/route")
+    header = response.headers["server-timing"]
+    assert list(durations(header)) == ["db", "app"]
+    assert server_timing_queries(response.headers) == 0
+
+
+def test_phases_split_database_time_out_of_handler_and_serialize():
+    request_timing = RequestTiming()
+    request_timing.start = 0.0
+    request_timing.endpoint_seconds = 0.050
+    request_timing.endpoint_end = 0.060
+    request_timing.db_seconds_in_endpoint = 0.020
+    request_timing.db_seconds = 0.025  # 5 ms of lazy loads after the endpoint returned
+    request_timing.render_seconds = 0.010
+    request_timing.response_start = 0.080
+    request_timing.db_count = 3
+    phases = request_timing.phases()
+    assert phases == {"db": 25.0, "app": 80.0, "handler": 20.0, "serialize": 25.0}
+    assert request_timing.server_timing(phases) == (
+        'db;dur=25.0;desc="3 queries", handler;dur=20.0, serialize;dur=25.0, app;dur=80.0'
+    )
+
+
+def test_rendering_counts_only_inside_a_request():
+    with timing.rendering():
+        pass  # no request: nothing to record
+    request_timing, token = timing.start_request()
+    try:
+        assert timing.current() is request_timing
+        with timing.rendering():
+            pass
+        assert request_timing.render_seconds > 0
+    finally:
+        timing.end_request(token)
+    assert timing.current() is None
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, update
+
+from app.db.database import SessionLocal
+from app.models import items as models
+from app.shared import constants
+
+
+@pytest.fixture
+def shopping_list(client):
+    list_id = client.post("/api/list").json()["id"]
+    ids = [client.post("/api/items", json={"name": name, "list_id": list_id}).json()["id"] for name in ("milk", "eggs", "bread")]
+    return list_id, ids
+
+
+def changes(client, list_id, since=None):
+    response = client.get("/api/items/changes", params={"list_id": list_id, **({"since": since} if since else {})})
+    assert response.status_code == 200
+    return response.json()
+
+
+def age_tombstones(item_ids, days):
+    with SessionLocal() as db:
+        db.execute(
+            update(models.ItemTombstone)
+            .where(models.ItemTombstone.item_id.in_(item_ids))
+            .values(deleted_at=func.now() - timedelta(days=days))
+        )
+        db.commit()
+
+
+def prune(retention_seconds=constants.TOMBSTONE_RETENTION_SECONDS):
+    with SessionLocal() as db:
+        db.execute(models.prune_tombstones_stmt(retention_seconds))
+        db.commit()
+
+
+def tombstones(list_id):
+    with SessionLocal() as db:
+        return set(db.scalars(models.deleted_items_stmt(list_id, -1)))
+
+
+def test_first_sync_is_a_reset(client, shopping_list):
+    list_id, ids = shopping_list
+    first = changes(client, list_id)
+    assert first["reset"] is True and first["deleted"] == []
+    assert {item["id"] for item in first["items"]} == set(ids)
+
+
+def test_recent_cursor_gets_deltas(client, shopping_list):
+    list_id, ids = shopping_list
+    cursor = changes(client, list_id)["cursor"]
+    client.delete(f"/api/items/{ids[0]}")
+    prune()
+    delta = changes(client, list_id, cursor)
+    assert delta["reset"] is False and delta["deleted"] == [ids[0]] and delta["items"] == []
+
+
+def test_only_expired_tombstones_are_pruned(client, shopping_list):
+    list_id, ids = shopping_list
+    for item_id in ids[:2]:
+        client.delete(f"/api/items/{item_id}")
+    age_tombstones([ids[0]], days=constants.TOMBSTONE_RETENTION_SECONDS // 86400 + 1)
+    prune()
+    assert tombstones(list_id) == {ids[1]}
+
+
+def test_cursor_older_than_the_window_gets_a_full_resync(client, shopping_list):
+    list_id, ids = shopping_list
+    stale = changes(client, list_id)["cursor"]
+    client.delete(f"/api/items/{ids[0]}")
+    after_first_delete = changes(client, list_id)["cursor"]
+    client.delete(f"/api/items/{ids[1]}")
+    age_tombstones([ids[0]], days=constants.TOMBSTONE_RETENTION_SECONDS // 86400 + 1)
+    prune()
+
+    resync = changes(client, list_id, stale)
+    assert resync["reset"] is True and resync["deleted"] == []
+    assert [item["id"] for item in resync["items"]] == [ids[2]]
+    # the pruned delete is behind this cursor; the kept one still comes as a delta
+    delta = changes(client, list_id, after_first_delete)
+    assert delta["reset"] is False and delta["deleted"] == [ids[1]]
+
+
+def test_horizon_only_moves_forward(client, shopping_list):
+    list_id, ids = shopping_list
+    client.delete(f"/api/items/{ids[0]}")
+    prune(0)
+    with SessionLocal() as db:
+        horizon = db.execute(models.changes_version_stmt(list_id)).one().horizon
+        assert horizon > 0
+        db.add(models.ItemTombstone(item_id=ids[1] + 10_000, list_id=list_id, version=horizon - 1))
+        db.commit()
+    prune(0)
+    with SessionLocal() as db:
+        assert db.execute(models.changes_version_stmt(list_id)).one().horizon == horizon
+
+
+def test_delete_prunes_once_per_interval(client, shopping_list, monkeypatch):
+    list_id, ids = shopping_list
+    monkeypatch.setattr(models, "_tombstones_pruned_at", None)
+    client.delete(f"/api/items/{ids[0]}")
+    age_tombstones([ids[0]], days=constants.TOMBSTONE_RETENTION_SECONDS // 86400 + 1)
+    client.delete(f"/api/items/{ids[1]}")  # pruned a moment ago: not due yet
+    assert tombstones(list_id) == {ids[0], ids[1]}
+
+    monkeypatch.setattr(models, "_tombstones_pruned_at", None)
+    client.delete(f"/api/items/{ids[2]}")
+    assert tombstones(list_id) == {ids[1], ids[2]}
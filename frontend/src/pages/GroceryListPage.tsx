@@ -1,15 +1,26 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { Share2, ArrowLeft, RefreshCw } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { AddItemForm } from '@/components/AddItemForm';
 import { CategoryGroup } from '@/components/CategoryGroup';
 import { ShareModal } from '@/components/ShareModal';
-import { getItems, createItem, updateItem, deleteItem } from '@/services/api';
+import { getItemChanges, createItem, updateItem, deleteItem } from '@/services/api';
 import { groupItemsByCategory } from '@/utils/categories';
-import type { GroceryItem, ShoppingList } from '@/types';
+import type { GroceryItem, ItemChanges, ShoppingList } from '@/types';
 import { toast } from 'react-hot-toast';
 
+const applyChanges = (items: GroceryItem[], changes: ItemChanges): GroceryItem[] => {
+  if (changes.reset) return changes.items;
+  const changed = new Map(changes.items.map((item) => [item.id, item]));
+  const deleted = new Set(changes.deleted);
+  const kept = items
+    .filter((item) => !deleted.has(item.id))
+    .map((item) => changed.get(item.id) ?? item);
+  const known = new Set(items.map((item) => item.id));
+  return [...kept, ...changes.items.filter((item) => !known.has(item.id))];
+};
+
 const GroceryListPage = () => {
   const { listId } = useParams<{ listId: string }>();
   const navigate = useNavigate();
@@ -18,6 +29,8 @@ const GroceryListPage = () => {
   const [isLoading, setIsLoading] = useState(true);
   const [isRefreshing, setIsRefreshing] = useState(false);
   const [isShareModalOpen, setIsShareModalOpen] = useState(false);
+  // Delta sync cursor: refreshes only download what changed since the last one
+  const syncCursor = useRef<string | undefined>(undefined);
 
   const fetchItems = async (showRefreshingState = false) => {
     if (!listId) return;
@@ -27,8 +40,9 @@ const GroceryListPage = () => {
     }
     
     try {
-      const data = await getItems(listId);
-      setItems(data);
+      const changes = await getItemChanges(listId, syncCursor.current);
+      syncCursor.current = changes.cursor;
+      setItems((prev) => applyChanges(prev, changes));
       // Set mock list info for sharing - in production you'd fetch this separately
       if (!listInfo) {
         setListInfo({
@@ -51,6 +65,8 @@ const GroceryListPage = () => {
   };
 
   useEffect(() => {
+    syncCursor.current = undefined;
+    setItems([]);
     fetchItems();
     // Removed automatic polling - now manual refresh only!
   }, [listId]);
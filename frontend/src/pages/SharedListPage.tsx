@@ -3,7 +3,7 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { Share2, RefreshCw, ArrowLeft } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { CategoryGroup } from '@/components/CategoryGroup';
-import { getListByShareCode, getItems, updateItem, deleteItem } from '@/services/api';
+import { getListByShareCode, updateItem, deleteItem } from '@/services/api';
 import { groupItemsByCategory } from '@/utils/categories';
 import type { GroceryItem, ShoppingList } from '@/types';
 import { toast } from 'react-hot-toast';
@@ -19,9 +19,8 @@ const SharedListPage = () => {
     if (!shareCode) return;
 
     try {
-      const listData = await getListByShareCode(shareCode);
+      const { items: itemsData, ...listData } = await getListByShareCode(shareCode);
       setList(listData);
-      const itemsData = await getItems(listData.id);
       setItems(itemsData);
     } catch (error) {
       toast.error('Failed to load shared list');
@@ -1,7 +1,10 @@
 import axios from 'axios';
 import type { 
   ShoppingList, 
+  SharedList,
+  ListBatch,
   GroceryItem, 
+  ItemChanges,
   CreateListRequest, 
   CreateItemRequest, 
   UpdateItemRequest 
@@ -14,20 +17,50 @@ const api = axios.create({
   },
 });
 
+// The server sheds load with 503 and rate limits with 429, both with Retry-After.
+// Reads, and creates sent with an Idempotency-Key, are safe to repeat: retry them
+// once after the advised delay. Keyed creates are also retried after a network
+// error, since the first attempt may have reached the server.
+const isRetryable = (config: any) => config.method === 'get' || Boolean(config.headers?.['Idempotency-Key']);
+
+api.interceptors.response.use(undefined, async (error) => {
+  const { config, response } = error;
+  const retryStatus = response ? [409, 429, 503].includes(response.status) : config?.method !== 'get';
+  if (config && !config._retried && isRetryable(config) && retryStatus) {
+    config._retried = true;
+    const seconds = Number(response?.headers?.['retry-after']) || 1;
+    await new Promise((resolve) => setTimeout(resolve, Math.min(seconds, 10) * 1000));
+    return api.request(config);
+  }
+  return Promise.reject(error);
+});
+
 // Shopping List APIs
 export const createList = async (data: CreateListRequest): Promise<ShoppingList> => {
-  const response = await api.post<ShoppingList>('/api/list', data);
+  const response = await api.post<ShoppingList>('/api/list', data, {
+    headers: { 'Idempotency-Key': crypto.randomUUID() },
+  });
   return response.data;
 };
 
-export const getListByShareCode = async (shareCode: string): Promise<ShoppingList> => {
-  const response = await api.get<ShoppingList>(`/api/list/${shareCode}`);
+export const getListByShareCode = async (shareCode: string): Promise<SharedList> => {
+  const response = await api.get<SharedList>(`/api/list/${shareCode}`);
+  return response.data;
+};
+
+// Several lists with their items in one request (at most 100 ids)
+export const getListsBatch = async (listIds: string[]): Promise<ListBatch> => {
+  const response = await api.get<ListBatch>('/api/lists/batch', {
+    params: { ids: listIds.join(',') },
+  });
   return response.data;
 };
 
 // Grocery Items APIs
 export const createItem = async (data: CreateItemRequest): Promise<GroceryItem> => {
-  const response = await api.post<GroceryItem>('/api/items', data);
+  const response = await api.post<GroceryItem>('/api/items', data, {
+    headers: { 'Idempotency-Key': crypto.randomUUID() },
+  });
   return response.data;
 };
 
@@ -38,6 +71,14 @@ export const getItems = async (listId: string): Promise<GroceryItem[]> => {
   return response.data;
 };
 
+// Items added/updated and ids deleted since `since` (every item when omitted)
+export const getItemChanges = async (listId: string, since?: string): Promise<ItemChanges> => {
+  const response = await api.get<ItemChanges>('/api/items/changes', {
+    params: { list_id: listId, since },
+  });
+  return response.data;
+};
+
 export const updateItem = async (
   itemId: number, 
   data: UpdateItemRequest
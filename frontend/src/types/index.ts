@@ -16,6 +16,23 @@ export interface GroceryItem {
   updated_at?: string;
 }
 
+export interface SharedList extends ShoppingList {
+  items: GroceryItem[];
+}
+
+export interface ListBatch {
+  lists: SharedList[];
+  missing: string[];
+}
+
+export interface ItemChanges {
+  items: GroceryItem[];
+  deleted: number[];
+  cursor: string;
+  // items is the whole list: replace instead of merging
+  reset: boolean;
+}
+
 export interface CreateListRequest {
   name: string;
 }